@@ -1,13 +1,15 @@
-from typing import Generator
-from jose import jwt
+import secrets
+from typing import Generator, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, OAuth2PasswordBearer
 
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.principal_cache import principal_cache
+from app.core.security import REFRESH_TOKEN, token_codec
 from app.crud.user import user_crud
 from app.models.user import User
 from app.schemas.user import TokenData
@@ -23,15 +25,17 @@ async def get_current_user(db: AsyncSession = Depends(get_db), token: str = Depe
     )
     
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = token_codec.decode(token)
         username: str = payload.get("sub")
-        if username is None:
+        if username is None or payload.get("type") == REFRESH_TOKEN:
             raise credentials_exception
         token_data = TokenData(username=username)
     except Exception:
         raise credentials_exception
     
-    user = await user_crud.get_by_username(db, username=token_data.username)
+    user = await principal_cache.get_or_load(
+        token_data.username, lambda: user_crud.get_by_username(db, username=token_data.username)
+    )
     if user is None:
         raise credentials_exception
     return user
@@ -46,4 +50,17 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
 async def get_current_superuser(current_user: User=Depends(get_current_active_user)) -> User:
     if not current_user.role == 'admin':
         raise HTTPException(status_code=403,detail = "Forbidden")
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+def verify_metrics_token(authorization: Optional[str] = Header(None)) -> None:
+    """Scrapers send the static METRICS_TOKEN; the endpoint does not exist while it is unset"""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    expected = f"Bearer {settings.METRICS_TOKEN}".encode()
+    if authorization is None or not secrets.compare_digest(authorization.encode(), expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -0,0 +1,113 @@
+import logging
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_superuser
+from app.core.analytics import analytics_rebuilder
+from app.core.bulk_import import detect_format, import_enrollments, import_users, iter_records
+from app.core.database import get_db, get_read_db
+from app.core.export import stream_export
+from app.crud.analytics import analytics_crud
+from app.models.user import User
+from app.schemas.admin import ExportParams
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post("/users/import")
+async def bulk_import_users(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_superuser),
+):
+    """Create users from a streamed CSV or NDJSON body.
+
+    Columns: email, username, first_name, last_name, optional role, and either
+    password or password_hash (an existing bcrypt hash, which skips hashing).
+    """
+    fmt = detect_format(request.headers.get("content-type"), format)
+    logger.info(f"Admin {current_user.username} started a user import ({fmt})")
+    return await import_users(db, iter_records(request.stream(), fmt))
+
+
+@router.post("/enrollments/import")
+async def bulk_import_enrollments(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_superuser),
+):
+    """Enroll students from a streamed CSV or NDJSON body.
+
+    Columns: course_id and one of student_id, username or email.
+    """
+    fmt = detect_format(request.headers.get("content-type"), format)
+    logger.info(f"Admin {current_user.username} started an enrollment import ({fmt})")
+    return await import_enrollments(db, iter_records(request.stream(), fmt))
+
+
+@router.get("/export/{entity}")
+async def export_table(
+    entity: Literal["courses", "enrollments", "progress"],
+    params: ExportParams = Depends(),
+    current_user: User = Depends(get_current_superuser),
+):
+    """Stream a whole table as CSV or NDJSON, optionally gzipped and limited to a date range.
+
+    The range applies to created_at for courses, enrolled_at for enrollments
+    and completed_at for progress.
+    """
+    if params.date_from and params.date_to and params.date_from >= params.date_to:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="date_from must be before date_to")
+
+    logger.info(f"Admin {current_user.username} started a {entity} export ({params.format})")
+    filename = f"{entity}-{datetime.now(timezone.utc):%Y%m%d}.{params.format}"
+    media_type = "text/csv" if params.format == "csv" else "application/x-ndjson"
+    if params.gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        stream_export(entity, params.format, params.gzip, params.date_from, params.date_to),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/analytics/courses")
+async def course_analytics(
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_superuser),
+):
+    """Completion rate and average time per course, read from the progress rollups"""
+    return {"courses": await analytics_crud.list_courses(db, limit=limit, offset=offset)}
+
+
+@router.get("/analytics/courses/{course_id}")
+async def course_analytics_report(
+    course_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_superuser),
+):
+    """Course totals plus per-lesson completion, time, drop-off and completion histogram"""
+    report = await analytics_crud.course_report(db, course_id)
+    if report is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
+    return report
+
+
+@router.post("/analytics/rebuild")
+async def rebuild_analytics(current_user: User = Depends(get_current_superuser)):
+    """Recompute the rollups from the progress table now instead of waiting for the periodic job"""
+    logger.info(f"Admin {current_user.username} started a progress rollup rebuild")
+    if not await analytics_rebuilder.rebuild():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A rebuild is already running")
+    return analytics_rebuilder.stats()
@@ -3,20 +3,26 @@ from datetime import timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
 from app.core.config import settings
 from app.core.database import get_db
-from app.core.security import create_access_token
+from app.core.security import REFRESH_TOKEN, create_access_token, create_refresh_token, token_codec
+from app.core.tokens import revoked_tokens
 from app.crud.user import user_crud
-from app.schemas.user import Token, UserCreate, UserInDB, PasswordResetRequest, PasswordResetVerify
+from app.schemas.course import MessageResponse
+from app.schemas.user import (
+    Token, UserCreate, UserInDB, PasswordResetRequest, PasswordResetResponse, PasswordResetVerify,
+    RefreshTokenRequest
+)
 
 
 logger= logging.getLogger(__name__)
 router = APIRouter()
 
-@router.post("/register")
+@router.post("/register", response_model=UserInDB)
 async def register(user_in: UserCreate=Depends(), db: AsyncSession = Depends(get_db)):
     """Register a new user"""
     try:
@@ -45,10 +51,69 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
     access_token = create_access_token(
         subject=user.username, expires_delta=access_token_expires
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    token = {"access_token": access_token, "token_type": "bearer"}
+    if revoked_tokens.enabled:
+        token["refresh_token"] = create_refresh_token(user.username, user.credential_version)
+    return token
 
 
-@router.post("/reset-password", response_model=dict)
+def require_refresh_tokens() -> None:
+    if not revoked_tokens.enabled:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Refresh tokens are disabled; log in again",
+        )
+
+
+def invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def decode_refresh_token(token: str) -> dict:
+    try:
+        claims = token_codec.decode(token)
+    except JWTError:
+        raise invalid_refresh_token()
+    if claims.get("type") != REFRESH_TOKEN or not all(claims.get(key) for key in ("sub", "jti", "fam")):
+        raise invalid_refresh_token()
+    return claims
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(request: RefreshTokenRequest, db: AsyncSession = Depends(get_db)):
+    """Exchange a refresh token for a new access and refresh token; each refresh token works once"""
+    require_refresh_tokens()
+    claims = decode_refresh_token(request.refresh_token)
+
+    # Read from the database, not the per-worker principal cache, so a
+    # password reset on another worker takes effect immediately
+    username = claims["sub"]
+    user = await user_crud.get_by_username(db, username=username)
+    if user is None or not user.is_active or claims.get("cv", 0) != user.credential_version:
+        raise invalid_refresh_token()
+    if not await revoked_tokens.rotate(claims):
+        raise invalid_refresh_token()
+
+    return {
+        "access_token": create_access_token(subject=username),
+        "token_type": "bearer",
+        "refresh_token": create_refresh_token(username, user.credential_version, family=claims["fam"]),
+    }
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(request: RefreshTokenRequest):
+    """Revoke the refresh token and every token rotated from the same login"""
+    require_refresh_tokens()
+    claims = decode_refresh_token(request.refresh_token)
+    await revoked_tokens.revoke_family(claims["fam"])
+
+
+@router.post("/reset-password", response_model=PasswordResetResponse)
 async def request_password_reset(
     request: PasswordResetRequest = Depends(),
     db: AsyncSession = Depends(get_db)
@@ -60,10 +125,10 @@ async def request_password_reset(
         
         # Send OTP via email
         from app.core.email import email_service
-        email_sent = await email_service.send_otp_email(request.email, otp_code, expires_minutes=5)
+        email_queued = email_service.enqueue_otp_email(request.email, otp_code, expires_minutes=settings.OTP_EXPIRE_MINUTES)
         
-        if not email_sent:
-            logger.warning(f"Failed to send OTP email to {request.email}")
+        if not email_queued:
+            logger.warning(f"Failed to queue OTP email to {request.email}")
             # Note: We still return success for security reasons
         
         logger.info(f"Password reset requested for email: {request.email}")
@@ -86,42 +151,15 @@ async def request_password_reset(
             detail="Failed to process password reset request"
         )
 
-@router.post("/reset-password/verify")
+@router.post("/reset-password/verify", response_model=MessageResponse)
 async def verify_password_reset(
     verify_data: PasswordResetVerify = Depends(),
     db: AsyncSession = Depends(get_db)
 ):
     """Verify OTP and reset password"""
     try:
-        # First verify the OTP code
-        await user_crud.verify_reset_code(db, verify_data.reset_id, verify_data.otp_code)
-        
-        # Get the reset request to find the email
-        from app.models.user import ResetPassword
-        from sqlalchemy import select
-        
-        result = await db.execute(
-            select(ResetPassword).where(ResetPassword.id == verify_data.reset_id)
-        )
-        reset_record = result.scalar_one_or_none()
-        
-        if not reset_record:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid reset request"
-            )
-        
-        # Update the password
-        await user_crud.update_password_by_email(
-            db, 
-            reset_record.email, 
-            verify_data.new_password
-        )
-        
-        # Clean up the reset request
-        await user_crud.complete_password_reset(db, verify_data.reset_id, reset_record.email)
-        
-        logger.info(f"Password successfully reset for email: {reset_record.email}")
+        await user_crud.reset_password(db, verify_data.reset_id, verify_data.otp_code, verify_data.new_password)
+        logger.info(f"Password successfully reset for reset request {verify_data.reset_id}")
         return {"message": "Password has been successfully reset"}
         
     except HTTPException:
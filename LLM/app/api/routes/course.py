@@ -1,46 +1,160 @@
 import logging
 
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.crud.course import course_crud
-from app.crud.lesson import lesson_crud
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
+from app.core.recommender import course_recommender
+from app.core.search import course_search
+from app.crud.course import course_crud, parse_fields
 from app.models.user import User
 from app.api.deps import get_current_superuser ,get_current_user
-from app.schemas.course import CourseCreate, CoursePublish
+from app.schemas.course import (
+    CatalogPage,
+    CourseCreate,
+    CourseListParams,
+    CourseOut,
+    CoursePage,
+    CoursePublish,
+    CourseSearchParams,
+    CourseSearchResponse,
+    DEFAULT_PAGE_SIZE,
+    MessageResponse,
+    PurchaseResponse,
+    RecommendationResponse,
+    SimilarCoursesResponse,
+)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger=logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.get("/courses")
-async def get_courses(db: AsyncSession = Depends(get_db)):
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _is_catalog_page(params: CourseListParams) -> bool:
+    """An unfiltered, default-size page, which is served from the snapshot cache"""
+    return params.model_copy(update={"cursor": None}) == CourseListParams(limit=DEFAULT_PAGE_SIZE)
+
+
+@router.get("/courses", response_model=CatalogPage, response_model_exclude_unset=True)
+async def get_courses(request: Request, params: CourseListParams = Depends(), db: AsyncSession = Depends(get_read_db)):
     logger.info("Fetching all courses")
-    courses = await course_crud.get_published_courses_from_db(db)
-    if not courses:
+    if not _is_catalog_page(params):
+        courses, next_cursor = await course_crud.list_courses(
+            db,
+            limit=params.limit,
+            cursor=params.cursor,
+            published=True,
+            teacher_id=params.teacher_id,
+            min_price=params.min_price,
+            max_price=params.max_price,
+            fields=parse_fields(params.fields),
+        )
+        return {'courses:': courses, 'next_cursor': next_cursor}
+
+    catalog = await course_crud.get_published_catalog(db, params.cursor)
+    if not catalog.count and not params.cursor:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No courses found")
-    return {'courses:':courses.scalars().all()}
 
+    headers = {"ETag": catalog.etag, "Cache-Control": "public, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), catalog.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=catalog.body, media_type="application/json", headers=headers)
+
+
+@router.get("/search", response_model=CourseSearchResponse, response_model_exclude_unset=True)
+async def search_courses(params: CourseSearchParams = Depends(), db: AsyncSession = Depends(get_read_db)):
+    if not course_search.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Search index is still building",
+            headers={"Retry-After": str(max(1, round(settings.SEARCH_REFRESH_INTERVAL_SECONDS)))},
+        )
+    total, hits = course_search.search(params.q, limit=params.limit, offset=params.offset)
+    scores = dict(hits)
+    fields = parse_fields(params.fields)
+    courses = await course_crud.get_courses_by_ids(db, list(scores), fields=fields)
+    return {
+        "query": params.q,
+        "total": total,
+        "results": [{**course, "score": round(scores[course["id"]], 4)} for course in courses],
+    }
+
+
+def _require_recommendations() -> None:
+    if not course_recommender.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Recommendations are still being computed",
+            headers={"Retry-After": str(max(1, round(settings.RECOMMENDER_REFRESH_INTERVAL_SECONDS)))},
+        )
+
+
+async def _with_scores(db: AsyncSession, ranked: list[tuple[int, float]]) -> list[dict]:
+    scores = dict(ranked)
+    courses = await course_crud.get_courses_by_ids(db, list(scores))
+    return [{**course, "score": round(scores[course["id"]], 4)} for course in courses]
+
+
+@router.get("/recommendations", response_model=RecommendationResponse)
+async def get_recommendations(
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    _require_recommendations()
+    enrolled = await course_crud.enrolled_course_ids(db, current_user.id)
+    strategy, ranked = course_recommender.recommend(enrolled, limit)
+    return {"strategy": strategy, "courses": await _with_scores(db, ranked)}
 
-@router.get("/course/{id}")
-async def get_course(id:int,db: AsyncSession = Depends(get_db)):
-    logger.info("Fetching all courses")
-    courses = await course_crud.get_courses_from_db(db)
-    return courses.scalars().all()
 
+@router.get("/course/{id}/similar", response_model=SimilarCoursesResponse)
+async def get_similar_courses(id: int, limit: int = Query(10, ge=1, le=50), db: AsyncSession = Depends(get_read_db)):
+    _require_recommendations()
+    return {"course_id": id, "courses": await _with_scores(db, course_recommender.similar(id, limit))}
 
-@router.get("/courses_for_superuser")
-async def get_courses_for_superuser(db: AsyncSession = Depends(get_db),current_user:User=Depends(get_current_superuser)):
-    logger.info("Fetching all courses for superuser")
-    courses = await course_crud.get_courses_from_db(db)
-    return courses.scalars().all()
 
+@router.get("/course/{id}", response_model=CourseOut, response_model_exclude_unset=True)
+async def get_course(id:int, fields: str | None = None, db: AsyncSession = Depends(get_read_db)):
+    logger.info(f"Fetching course {id}")
+    course = await course_crud.get_course(db, id, published=True, fields=parse_fields(fields))
+    if not course:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
+    return course
 
-@router.post("/creating_courses")
+
+@router.get("/courses_for_superuser", response_model=CoursePage, response_model_exclude_unset=True)
+async def get_courses_for_superuser(
+    is_published: bool | None = None,
+    params: CourseListParams = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user:User=Depends(get_current_superuser)
+):
+    logger.info("Fetching all courses for superuser")
+    courses, next_cursor = await course_crud.list_courses(
+        db,
+        limit=params.limit,
+        cursor=params.cursor,
+        published=is_published,
+        teacher_id=params.teacher_id,
+        min_price=params.min_price,
+        max_price=params.max_price,
+        fields=parse_fields(params.fields),
+    )
+    return {'courses': courses, 'next_cursor': next_cursor}
+
+
+@router.post("/creating_courses", response_model=MessageResponse)
 async def create_courses(
     db: AsyncSession = Depends(get_db),
     current_user: User=Depends(get_current_superuser),
@@ -51,7 +165,7 @@ async def create_courses(
     except Exception as e:
         raise e
     
-@router.post("/publish_course")
+@router.post("/publish_course", response_model=MessageResponse)
 async def publish_courses(
     db: AsyncSession = Depends(get_db),
     current_user: User=Depends(get_current_superuser),
@@ -62,20 +176,34 @@ async def publish_courses(
     except Exception :
         raise Exception
 
-@router.post("/purchase_course/{course_id}",status_code=200)
+@router.post("/purchase_course/{course_id}", status_code=200, response_model=PurchaseResponse)
 async def purchase_course(
     course_id: int,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User=Depends(get_current_user),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key", max_length=255),
 ):
-    try:
-        await course_crud.purchase_course(db=db,student_id=current_user.id,course_id=course_id)
-        await lesson_crud.enroll_lesson(db,student_id=current_user.id,course_id=course_id)
-        return {'message':'Course was purchased'}
-    except HTTPException as e:
-        return {'message': e}
-
-
-
-    
-
+    student_id = current_user.id
+    if idempotency_key is None:
+        return await course_crud.purchase_course(db=db, student_id=student_id, course_id=course_id)
+
+    replayed = True
+
+    async def purchase():
+        nonlocal replayed
+        replayed = False
+        result = await course_crud.purchase_course(db=db, student_id=student_id, course_id=course_id)
+        return {"course_id": course_id, "response": result}
+
+    cached = await cache.get_or_compute(
+        f"idem:{student_id}:{idempotency_key}", purchase, ttl=settings.IDEMPOTENCY_KEY_TTL_SECONDS
+    )
+    if cached["course_id"] != course_id:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different course",
+        )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return cached["response"]
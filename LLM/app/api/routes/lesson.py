@@ -1,5 +1,20 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_current_active_user
+from app.core.progress_buffer import progress_buffer
+from app.models.user import User
+from app.schemas.course import MessageResponse, ProgressHeartbeat
 
 router=APIRouter()
 
 
+@router.post("/progress", status_code=202, response_model=MessageResponse)
+async def record_progress(heartbeat: ProgressHeartbeat, current_user: User = Depends(get_current_active_user)):
+    """Accept a player heartbeat; it is coalesced and written in the background"""
+    progress_buffer.add(
+        student_id=current_user.id,
+        lesson_id=heartbeat.lesson_id,
+        completion_percentage=heartbeat.completion_percentage,
+        time_spent_seconds=heartbeat.time_spent_seconds,
+    )
+    return {"message": "accepted"}
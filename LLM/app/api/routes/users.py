@@ -1,13 +1,13 @@
-from typing import List
+from typing import List, Union
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.deps import get_current_active_user, get_current_user, get_current_superuser
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.crud.user import user_crud
 from app.crud.course import course_crud
 from app.models.user import User
 from app.schemas.user import UserInDB, UserUpdate
-from app.schemas.course import ContentSchema
+from app.schemas.course import ContentRead, ContentSchema, EnrolledCourse, MessageResponse
 
 router = APIRouter()
 
@@ -28,22 +28,22 @@ async def update_user_me(
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
-@router.get('/my_courses')
-async def get_my_courses(db:AsyncSession=Depends(get_db),current_user:User=Depends(get_current_user)):
+@router.get('/my_courses', response_model=Union[tuple[str, list[EnrolledCourse]], MessageResponse])
+async def get_my_courses(db:AsyncSession=Depends(get_read_db),current_user:User=Depends(get_current_user)):
     try:
         return await user_crud.get_my_course(db=db,id=current_user.id)
     except Exception as e:
         raise e
     
-@router.get('/get_content')
-async def get_content(course_id:int, db:AsyncSession=Depends(get_db)):
+@router.get('/get_content', response_model=ContentRead)
+async def get_content(course_id:int, db:AsyncSession=Depends(get_read_db)):
     try:
         return await course_crud.get_content(db,course_id)
     except HTTPException as e:
         raise e
 
     
-@router.post('/add_content',status_code=201)
+@router.post('/add_content', status_code=201, response_model=MessageResponse)
 async def add_content(content:ContentSchema=Depends(), db:AsyncSession=Depends(get_db),current_user:User=Depends(get_current_superuser)):
     try:
         await course_crud.add_content(db,content.course_id,content.link,content.url)
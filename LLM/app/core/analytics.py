@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.analytics import analytics_crud
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsRebuilder:
+    """Recomputes the progress rollups from scratch every ``interval``.
+
+    Progress flushes keep the rollups current incrementally. The rebuild
+    corrects any drift, such as lessons added to a course after students
+    finished it. Every
+    worker runs the job, but an advisory lock lets only one rebuild at a
+    time.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.rebuilds = 0
+        self.skipped = 0
+        self.failures = 0
+        self.last_rebuilt_at: Optional[datetime] = None
+        self.last_rebuild_seconds: Optional[float] = None
+
+    async def rebuild(self) -> bool:
+        started = time.perf_counter()
+        async with SessionLocal() as db:
+            rebuilt = await analytics_crud.rebuild(db)
+        if not rebuilt:
+            self.skipped += 1
+            return False
+        self.rebuilds += 1
+        self.last_rebuilt_at = datetime.now(timezone.utc)
+        self.last_rebuild_seconds = time.perf_counter() - started
+        logger.info(f"Progress rollups rebuilt in {self.last_rebuild_seconds:.2f}s")
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.rebuild()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Rebuilding progress rollups failed: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "rebuilds": self.rebuilds,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "last_rebuilt_at": self.last_rebuilt_at.isoformat() if self.last_rebuilt_at else None,
+            "last_rebuild_seconds": self.last_rebuild_seconds,
+        }
+
+
+analytics_rebuilder = AnalyticsRebuilder(interval=settings.ANALYTICS_REBUILD_INTERVAL_SECONDS)
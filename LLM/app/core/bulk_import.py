@@ -0,0 +1,227 @@
+import codecs
+import csv
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.security import password_hasher
+from app.crud.course import course_crud
+from app.crud.user import user_crud
+from app.schemas.course import EnrollmentImportRow
+from app.schemas.user import UserImportRow
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ImportReport:
+    """Running totals for one upload; only the first ``max_errors`` failures are itemised"""
+    max_errors: int
+    processed: int = 0
+    created: int = 0
+    failed: int = 0
+    errors: list[dict] = field(default_factory=list)
+
+    def error(self, row: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "error": message})
+
+    def summary(self) -> dict:
+        return {
+            "processed": self.processed,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda e: e["row"]),
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def detect_format(content_type: Optional[str], explicit: Optional[str]) -> str:
+    if explicit:
+        return explicit
+    if content_type and "csv" in content_type:
+        return "csv"
+    if content_type and ("ndjson" in content_type or "jsonl" in content_type):
+        return "ndjson"
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson",
+    )
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into lines without buffering more than one partial line"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload must be UTF-8")
+    if pending:
+        yield pending
+
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[tuple[int, Optional[dict], Optional[str]]]:
+    """Yield ``(row, record, error)`` per data row, numbered from 1"""
+    row = 0
+    header: Optional[list[str]] = None
+    record = ""
+    async for line in iter_lines(chunks):
+        if fmt == "ndjson":
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                value = json.loads(line)
+            except ValueError as e:
+                yield row, None, f"invalid JSON: {e}"
+                continue
+            if isinstance(value, dict):
+                yield row, value, None
+            else:
+                yield row, None, "expected a JSON object"
+            continue
+
+        # CSV: a quoted field may span lines, so join until the quotes balance
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue
+        text, record = record.rstrip("\r"), ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, None, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        yield row, {name: value or None for name, value in zip(header, values)}, None
+
+    if record:
+        yield row + 1, None, "unterminated quoted field"
+
+
+async def iter_chunks(records: AsyncIterator, size: int) -> AsyncIterator[list]:
+    chunk = []
+    async for item in records:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()
+    )
+
+
+def _validate(chunk: list, model, report: ImportReport) -> list[tuple[int, object]]:
+    valid = []
+    for row, record, error in chunk:
+        report.processed += 1
+        if error is not None:
+            report.error(row, error)
+            continue
+        try:
+            valid.append((row, model.model_validate(record)))
+        except ValidationError as e:
+            report.error(row, _validation_message(e))
+    return valid
+
+
+async def import_users(db: AsyncSession, records: AsyncIterator) -> dict:
+    """Create users chunk by chunk: validate, hash in parallel, then one multi-row insert per chunk"""
+    report = ImportReport(max_errors=settings.IMPORT_MAX_ERRORS)
+    seen_emails: set[str] = set()
+    seen_usernames: set[str] = set()
+
+    async for chunk in iter_chunks(records, settings.IMPORT_CHUNK_SIZE):
+        users = []
+        for row, user in _validate(chunk, UserImportRow, report):
+            if user.email in seen_emails or user.username in seen_usernames:
+                report.error(row, "duplicate email or username earlier in this upload")
+                continue
+            seen_emails.add(user.email)
+            seen_usernames.add(user.username)
+            users.append((row, user))
+
+        to_hash = [user.password for _, user in users if user.password is not None]
+        hashed = iter(await password_hasher.hash_many(to_hash))
+        values = [
+            {
+                "email": user.email,
+                "username": user.username,
+                "hashed_password": user.password_hash or next(hashed),
+                "first_name": user.first_name,
+                "last_name": user.last_name,
+                "role": user.role,
+                "is_active": True,
+                "is_verified": False,
+            }
+            for _, user in users
+        ]
+
+        created = await user_crud.bulk_create(db, values)
+        report.created += len(created)
+        for row, user in users:
+            if user.email not in created:
+                report.error(row, "a user with this email or username already exists")
+
+    logger.info(f"User import: {report.created} created, {report.failed} failed of {report.processed}")
+    return report.summary()
+
+
+async def import_enrollments(db: AsyncSession, records: AsyncIterator) -> dict:
+    """Enroll students chunk by chunk, resolving usernames/emails and course ids once per chunk"""
+    report = ImportReport(max_errors=settings.IMPORT_MAX_ERRORS)
+
+    async for chunk in iter_chunks(records, settings.IMPORT_CHUNK_SIZE):
+        rows = _validate(chunk, EnrollmentImportRow, report)
+        students = await user_crud.resolve_ids(
+            db,
+            ids={row.student_id for _, row in rows if row.student_id is not None},
+            usernames={row.username for _, row in rows if row.username is not None},
+            emails={row.email for _, row in rows if row.email is not None},
+        )
+        courses = await course_crud.existing_ids(db, {row.course_id for _, row in rows})
+
+        pairs: dict[tuple[int, int], int] = {}
+        for row, enrollment in rows:
+            student_id = students.get(
+                ("id", enrollment.student_id) if enrollment.student_id is not None
+                else ("username", enrollment.username) if enrollment.username is not None
+                else ("email", enrollment.email)
+            )
+            if student_id is None:
+                report.error(row, "student not found")
+            elif enrollment.course_id not in courses:
+                report.error(row, "course not found")
+            elif (student_id, enrollment.course_id) in pairs:
+                report.error(row, "duplicate enrollment earlier in this chunk")
+            else:
+                pairs[(student_id, enrollment.course_id)] = row
+
+        created = await course_crud.bulk_enroll(db, list(pairs))
+        report.created += len(created)
+        for pair, row in pairs.items():
+            if pair not in created:
+                report.error(row, "student is already enrolled in this course")
+
+    logger.info(f"Enrollment import: {report.created} created, {report.failed} failed of {report.processed}")
+    return report.summary()
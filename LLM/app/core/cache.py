@@ -0,0 +1,341 @@
+import asyncio
+import functools
+import inspect
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, Optional, Sequence
+
+import orjson
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """Byte-level storage used by ``Cache``; values are already serialized.
+
+    Every tag has a version that ``invalidate_tags`` bumps. A ``set`` given
+    the ``versions`` read before computing its value is skipped if any of
+    them moved since, so a slow load can't write back what an invalidation
+    has already dropped.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[int] = None,
+        tags: Sequence[str] = (),
+        versions: Optional[Sequence[int]] = None,
+    ) -> bool:
+        """Store ``value``; False if ``versions`` no longer match the tags and nothing was written"""
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        ...
+
+    @abstractmethod
+    async def tag_versions(self, tags: Sequence[str]) -> list[int]:
+        ...
+
+    @abstractmethod
+    async def invalidate_tags(self, *tags: str) -> None:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process LRU backend; used in development and tests."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[Optional[float], bytes, tuple[str, ...]]] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+        self._versions: dict[str, int] = {}
+
+    def _remove(self, key: str) -> None:
+        """Drop an entry and its tag memberships, removing tags left empty"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[int] = None,
+        tags: Sequence[str] = (),
+        versions: Optional[Sequence[int]] = None,
+    ) -> bool:
+        tags = tuple(tags)
+        if versions is not None and list(versions) != await self.tag_versions(tags):
+            return False
+        self._remove(key)
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._entries[key] = (expires_at, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._remove(key)
+
+    async def tag_versions(self, tags: Sequence[str]) -> list[int]:
+        return [self._versions.get(tag, 0) for tag in tags]
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        for tag in tags:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+            for key in self._tags.pop(tag, ()):
+                self._remove(key)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Shared backend so every worker process sees the same entries.
+
+    Tags are stored as Redis sets of member keys under ``<prefix>tag:<tag>``,
+    expiring with their longest-lived member, and tag versions as counters
+    under ``<prefix>tagver:<tag>``.
+    """
+
+    def __init__(self, url: str, prefix: str = "lms:"):
+        from redis import asyncio as redis
+
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def _version_key(self, tag: str) -> str:
+        return f"{self.prefix}tagver:{tag}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(self._key(key))
+
+    async def set(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[int] = None,
+        tags: Sequence[str] = (),
+        versions: Optional[Sequence[int]] = None,
+    ) -> bool:
+        from redis.exceptions import WatchError
+
+        async with self._redis.pipeline(transaction=True) as pipe:
+            if versions is not None and tags:
+                # An invalidation between WATCH and EXEC aborts the write
+                version_keys = [self._version_key(tag) for tag in tags]
+                await pipe.watch(*version_keys)
+                if [int(version or 0) for version in await pipe.mget(version_keys)] != list(versions):
+                    return False
+                pipe.multi()
+            pipe.set(self._key(key), value, ex=ttl)
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                pipe.sadd(tag_key, self._key(key))
+                if ttl:
+                    # Give a new set this TTL, and only ever extend an existing one
+                    pipe.expire(tag_key, ttl, nx=True)
+                    pipe.expire(tag_key, ttl, gt=True)
+                else:
+                    pipe.persist(tag_key)
+            try:
+                await pipe.execute()
+            except WatchError:
+                return False
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._redis.delete(*(self._key(key) for key in keys))
+
+    async def tag_versions(self, tags: Sequence[str]) -> list[int]:
+        if not tags:
+            return []
+        return [int(version or 0) for version in await self._redis.mget([self._version_key(tag) for tag in tags])]
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.incr(self._version_key(tag))
+                pipe.smembers(tag_key)
+                _, members = await pipe.execute()
+            if members:
+                # SREM rather than DEL keeps members added after SMEMBERS
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    pipe.delete(*members)
+                    pipe.srem(tag_key, *members)
+                    await pipe.execute()
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+class Cache:
+    """Get-or-compute cache with per-key TTL, tags and single-flight loading.
+
+    Values are stored as JSON, so they must be JSON-serializable and come
+    back as plain dicts, lists and scalars. Concurrent misses for the same
+    key inside one process share a single ``compute`` call instead of
+    stampeding the database.
+    """
+
+    def __init__(self, backend: CacheBackend, default_ttl: Optional[int] = None):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale_writes = 0
+
+    async def get(self, key: str) -> Any:
+        raw = await self.backend.get(key)
+        return None if raw is None else orjson.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Iterable[str] = ()) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        await self.backend.set(key, orjson.dumps(value), ttl=ttl, tags=tuple(tags))
+
+    async def delete(self, *keys: str) -> None:
+        await self.backend.delete(*keys)
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        await self.backend.invalidate_tags(*tags)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        raw = await self.backend.get(key)
+        if raw is not None:
+            self.hits += 1
+            return orjson.loads(raw)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        tags = tuple(tags)
+        try:
+            versions = await self.backend.tag_versions(tags)
+            raw = orjson.dumps(await compute())
+            written = await self.backend.set(
+                key, raw, ttl=self.default_ttl if ttl is None else ttl, tags=tags, versions=versions
+            )
+            if not written:
+                # A tag was invalidated while computing; serve the value but don't cache it
+                self.stale_writes += 1
+            # Decode what was stored so misses return the same types as hits
+            value = orjson.loads(raw)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "stale_writes": self.stale_writes,
+            "inflight": len(self._inflight),
+        }
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def create_cache_backend() -> CacheBackend:
+    if settings.CACHE_BACKEND == "redis":
+        logger.info("Using Redis cache backend")
+        return RedisCacheBackend(settings.REDIS_URL)
+    if settings.WEB_CONCURRENCY > 1:
+        logger.warning(
+            f"CACHE_BACKEND=memory with {settings.WEB_CONCURRENCY} workers: an invalidation only reaches the worker "
+            f"that made it, so the others serve cached catalog pages and content for up to "
+            f"{settings.CACHE_DEFAULT_TTL_SECONDS}s; use CACHE_BACKEND=redis"
+        )
+    return MemoryCacheBackend(max_entries=settings.CACHE_MAX_ENTRIES)
+
+
+cache = Cache(create_cache_backend(), default_ttl=settings.CACHE_DEFAULT_TTL_SECONDS)
+
+
+def cached(key: str, ttl: Optional[int] = None, tags: Iterable[str] = ()):
+    """Opt a CRUD method into the shared cache.
+
+    ``key`` and ``tags`` are format strings over the method's arguments
+    (``self`` and ``db`` excluded), e.g. ``@cached("course:{id}:content",
+    tags=("course:{id}",))``.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = {k: v for k, v in bound.arguments.items() if k not in ("self", "db")}
+            return await cache.get_or_compute(
+                key.format(**params),
+                lambda: func(*args, **kwargs),
+                ttl=ttl,
+                tags=[tag.format(**params) for tag in tags],
+            )
+
+        return wrapper
+
+    return decorator
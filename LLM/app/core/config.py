@@ -4,28 +4,123 @@ from typing import Optional
 class Settings(BaseSettings):
     # Database
     DATABASE_URL1: str 
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PGBOUNCER_MODE: bool = False
+    DB_SCHEMA_CHECK: bool = True  # refuse to start unless the schema is at the Alembic head
+    
+    # Read replicas (comma-separated URLs; empty means primary only)
+    DATABASE_REPLICA_URLS: str = ""
+    DB_REPLICA_STRATEGY: str = "round_robin"  # "round_robin" or "least_connections"
+    DB_REPLICA_RETRY_SECONDS: float = 30.0
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
     
+    # Cache
+    CACHE_BACKEND: str = "memory"  # "memory" (per worker) or "redis" (shared; needed with several workers)
+    CACHE_DEFAULT_TTL_SECONDS: int = 300
+    CACHE_MAX_ENTRIES: int = 10000
+    
     # Kafka
     KAFKA_BOOTSTRAP_SERVERS: str = "localhost:9092"
+    KAFKA_CLIENT_ID: str = "intelligent-lms"
+    KAFKA_CONSUMER_GROUP: str = "intelligent-lms"
+    
+    # Domain events (transactional outbox)
+    EVENT_BROKER: str = "memory"  # "memory" or "kafka"
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_PUBLISH_CONCURRENCY: int = 4  # publishes in flight per pass; in-memory handlers each hold a DB connection
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_RETENTION_HOURS: int = 72
     
     # Security
     SECRET_KEY: str 
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    TOKEN_REVOCATION_BACKEND: str = "memory"  # "memory" (single worker only) or "redis" (shared)
+    WEB_CONCURRENCY: int = 1  # worker processes; uvicorn and gunicorn read the same variable
+    
+    # Rate limiting of auth endpoints, as "<requests>/<seconds>" token buckets
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per worker) or "redis" (shared)
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_TRUSTED_PROXIES: int = 0  # proxies appending to X-Forwarded-For; 0 keys by the peer address
+    RATE_LIMIT_LOGIN_IP: str = "20/60"
+    RATE_LIMIT_LOGIN_USERNAME: str = "5/300"
+    RATE_LIMIT_RESET_REQUEST_IP: str = "5/600"
+    RATE_LIMIT_RESET_REQUEST_EMAIL: str = "3/900"
+    RATE_LIMIT_RESET_VERIFY_IP: str = "10/600"
+    RATE_LIMIT_RESET_VERIFY_ID: str = "5/900"  # OTP guesses per reset request
+    
+    # Password hashing
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # "thread" or "process"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    
+    # Authenticated principal cache
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    
+    # Progress write-behind buffer
+    PROGRESS_FLUSH_INTERVAL_SECONDS: float = 5.0
+    PROGRESS_FLUSH_MAX_ITEMS: int = 1000
+    PROGRESS_MAX_PENDING: int = 50000  # buffered keys; heartbeats for new keys get a 503 beyond this
     
     # Email
     SMTP_HOST: Optional[str] = None
     SMTP_PORT: int = 587
     SMTP_USER: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
+    SMTP_START_TLS: bool = True
     EMAIL_FROM_NAME: str = "Intelligent LMS"
     
+    # Outbound mail queue
+    SMTP_POOL_SIZE: int = 2
+    SMTP_BATCH_SIZE: int = 20
+    SMTP_MAX_RETRIES: int = 5
+    SMTP_RETRY_BACKOFF_SECONDS: float = 2.0
+    MAIL_QUEUE_MAX_SIZE: int = 10000
+    MAIL_DEAD_LETTER_SIZE: int = 1000
+    
+    # Course search index
+    SEARCH_REFRESH_INTERVAL_SECONDS: float = 30.0
+    
+    # Course recommendations
+    RECOMMENDER_NEIGHBORS: int = 20  # similar courses kept per course
+    RECOMMENDER_CONTENT_WEIGHT: float = 0.3  # share of text similarity vs co-enrollment
+    RECOMMENDER_REFRESH_INTERVAL_SECONDS: float = 60.0
+    RECOMMENDER_REBUILD_INTERVAL_SECONDS: float = 3600.0
+    
+    # Progress analytics rollups
+    ANALYTICS_REBUILD_INTERVAL_SECONDS: float = 6 * 3600.0
+    
+    # Admin bulk imports
+    IMPORT_CHUNK_SIZE: int = 1000
+    IMPORT_MAX_ERRORS: int = 1000  # per-row errors reported back; the rest are only counted
+    IMPORT_HASH_WORKERS: int = 0  # processes hashing imported passwords; 0 leaves one CPU free and uses the rest
+    IMPORT_HASH_ROUNDS: int = 10  # bcrypt cost for imported passwords, raised to the full cost at first login
+    
+    # Admin exports: rows fetched per server-side cursor round trip
+    EXPORT_YIELD_PER: int = 1000
+    
+    # Idempotency-Key responses are replayed for this long
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 86400
+    
+    # Metrics
+    SLOW_QUERY_SECONDS: float = 0.2
+    METRICS_TOKEN: str = ""  # bearer token Prometheus sends to /metrics; empty disables the endpoint
+    
     # OTP Settings
     OTP_EXPIRE_MINUTES: int = 5
+    PASSWORD_RESET_PURGE_INTERVAL_SECONDS: float = 300
     
     class Config:
         env_file = ".env"
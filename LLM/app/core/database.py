@@ -1,15 +1,261 @@
-from sqlalchemy.ext.asyncio import create_async_engine,async_sessionmaker, AsyncSession
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+from uuid import uuid4
 
-from sqlalchemy.orm import DeclarativeBase
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine,async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from sqlalchemy.orm import DeclarativeBase, Session
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from app.core.config import settings
 
-engine = create_async_engine(settings.DATABASE_URL1)
+logger = logging.getLogger(__name__)
+
+# Unix time of the client's last committed write, for read-your-writes routing
+LAST_WRITE_COOKIE = "lms_last_write"
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout takes.
+
+    Checkout time covers waiting for a free connection as well as opening a
+    new one; checkouts slower than ``SLOW_CHECKOUT_SECONDS`` are counted as
+    waits.
+    """
+
+    SLOW_CHECKOUT_SECONDS = 0.005
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            if waited > self.SLOW_CHECKOUT_SECONDS:
+                self.waits += 1
+
+
+def create_engine_from_settings(url: str) -> AsyncEngine:
+    connect_args = {}
+    if make_url(url).get_driver_name() == "asyncpg":
+        if settings.DB_PGBOUNCER_MODE:
+            # PgBouncer in transaction mode can't keep server-side prepared statements
+            connect_args = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        else:
+            connect_args = {
+                "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+                "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            }
+
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+def pool_stats(engine: AsyncEngine) -> dict:
+    pool = engine.sync_engine.pool
+    stats = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+    }
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update({
+            "checkouts": pool.checkouts,
+            "waits": pool.waits,
+            "wait_seconds_total": round(pool.wait_seconds_total, 3),
+            "wait_seconds_max": round(pool.wait_seconds_max, 3),
+            "timeouts": pool.timeouts,
+        })
+    return stats
+
+
+class ReplicaRouter:
+    """Chooses a read replica per request and tracks replica health.
+
+    Replicas that fail to hand out a connection are skipped for
+    ``retry_seconds``. A client that committed a write within
+    ``sticky_seconds`` reads from the primary so it sees its own writes.
+    The write time travels with the client in the ``LAST_WRITE_COOKIE``
+    cookie, so this holds whichever worker serves the read.
+    """
+
+    def __init__(self, urls: list[str], strategy: str, retry_seconds: float, sticky_seconds: float):
+        self.engines = [create_engine_from_settings(url) for url in urls]
+        self.sessionmakers = [
+            async_sessionmaker(autocommit=False, class_=AsyncSession, autoflush=False, bind=replica)
+            for replica in self.engines
+        ]
+        self.strategy = strategy
+        self.retry_seconds = retry_seconds
+        self.sticky_seconds = sticky_seconds
+        self._next = 0
+        self._unhealthy_until = [0.0] * len(self.engines)
+        self.replica_reads = [0] * len(self.engines)
+        self.primary_fallbacks = 0
+        self.sticky_reads = 0
+
+    def candidates(self) -> list[int]:
+        now = time.monotonic()
+        healthy = [i for i, until in enumerate(self._unhealthy_until) if until <= now]
+        if self.strategy == "least_connections":
+            return sorted(healthy, key=lambda i: self.engines[i].sync_engine.pool.checkedout())
+        if not healthy:
+            return []
+        start = self._next % len(healthy)
+        self._next += 1
+        return healthy[start:] + healthy[:start]
+
+    def mark_unhealthy(self, index: int) -> None:
+        self._unhealthy_until[index] = time.monotonic() + self.retry_seconds
+
+    def is_sticky(self, last_write: Optional[float]) -> bool:
+        return last_write is not None and last_write > time.time() - self.sticky_seconds
+
+    def last_write_cookie(self, last_write: float) -> str:
+        max_age = math.ceil(self.sticky_seconds)
+        return f"{LAST_WRITE_COOKIE}={last_write:.3f}; Max-Age={max_age}; Path=/; HttpOnly; SameSite=lax"
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "replicas": [
+                {**pool_stats(replica), "healthy": self._unhealthy_until[i] <= now, "reads": self.replica_reads[i]}
+                for i, replica in enumerate(self.engines)
+            ],
+            "primary_fallbacks": self.primary_fallbacks,
+            "sticky_reads": self.sticky_reads,
+        }
+
+    async def dispose(self) -> None:
+        for replica in self.engines:
+            await replica.dispose()
+
+
+def _last_write(request: Request) -> Optional[float]:
+    try:
+        return float(request.cookies[LAST_WRITE_COOKIE])
+    except (KeyError, ValueError):
+        return None
+
+
+engine = create_engine_from_settings(settings.DATABASE_URL1)
 SessionLocal = async_sessionmaker(autocommit=False, class_=AsyncSession, autoflush=False, bind=engine)
 
+replica_router = ReplicaRouter(
+    urls=[url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()],
+    strategy=settings.DB_REPLICA_STRATEGY,
+    retry_seconds=settings.DB_REPLICA_RETRY_SECONDS,
+    sticky_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_write(session: Session) -> None:
+    state = session.info.get("request_state")
+    if state is not None:
+        state.last_write = time.time()
+
+
+class ReadYourWritesMiddleware:
+    """Pure ASGI middleware setting ``LAST_WRITE_COOKIE`` on responses to requests that committed.
+
+    A no-op when there are no read replicas.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not replica_router.engines:
+            await self.app(scope, receive, send)
+            return
+
+        # The same dict backs request.state in the endpoint and its dependencies
+        state = scope.setdefault("state", {})
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and "last_write" in state:
+                cookie = replica_router.last_write_cookie(state["last_write"])
+                MutableHeaders(scope=message).append("set-cookie", cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
 class Base(DeclarativeBase):
     pass
 
-async def get_db():
+async def get_db(request: Request):
     async with SessionLocal() as db:
+        db.sync_session.info["request_state"] = request.state
+        yield db
+
+
+@asynccontextmanager
+async def read_session(last_write: Optional[float] = None):
+    """Session on a healthy read replica, or on the primary when there is none
+    or the client's ``last_write`` was recent"""
+    if replica_router.engines:
+        if replica_router.is_sticky(last_write):
+            replica_router.sticky_reads += 1
+        else:
+            for index in replica_router.candidates():
+                db = replica_router.sessionmakers[index]()
+                try:
+                    await db.connection()
+                except Exception as e:
+                    logger.warning(f"Read replica {index} unavailable, skipping it: {e}")
+                    replica_router.mark_unhealthy(index)
+                    await db.close()
+                    continue
+                replica_router.replica_reads[index] += 1
+                try:
+                    yield db
+                finally:
+                    await db.close()
+                return
+            replica_router.primary_fallbacks += 1
+
+    async with SessionLocal() as db:
+        yield db
+
+
+async def get_read_db(request: Request):
+    """Session for read-only endpoints, served by a replica when one is healthy"""
+    async with read_session(_last_write(request)) as db:
         yield db
- 
\ No newline at end of file
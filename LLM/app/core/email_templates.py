@@ -0,0 +1,123 @@
+import base64
+import html
+import logging
+import re
+import uuid
+from dataclasses import dataclass
+from email.header import Header
+from pathlib import Path
+from typing import Callable, Sequence
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+
+TEMPLATE_SUBJECTS = {
+    "password_reset_otp": "Password Reset - OTP Code",
+    "enrollment_receipt": "Enrollment confirmed: {{ course_title }}",
+    "course_published": "New course: {{ course_title }}",
+}
+
+PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+@dataclass
+class PreparedEmail:
+    """A fully encoded message, ready for ``SMTP.sendmail``"""
+    sender: str
+    recipients: list[str]
+    data: bytes
+
+
+class CompiledTemplate:
+    """Template split once into literal chunks and placeholder names"""
+
+    def __init__(self, source: str, escape: Callable[[str], str]):
+        parts = PLACEHOLDER.split(source)
+        self.literals = parts[0::2]
+        self.names = parts[1::2]
+        self.escape = escape
+
+    def render(self, values: dict) -> str:
+        out = [self.literals[0]]
+        for name, literal in zip(self.names, self.literals[1:]):
+            out.append(self.escape(str(values[name])))
+            out.append(literal)
+        return "".join(out)
+
+
+def _header_value(value: str) -> str:
+    value = " ".join(value.splitlines())
+    return value if value.isascii() else Header(value, "utf-8").encode()
+
+
+def _base64_body(text: str) -> bytes:
+    return base64.encodebytes(text.encode("utf-8")).replace(b"\n", b"\r\n")
+
+
+class EmailTemplate:
+    """Subject, text and HTML bodies of one email, plus its static MIME framing.
+
+    Part headers and boundaries are encoded once; a send only renders the
+    variable fragments and base64-encodes the two bodies.
+    """
+
+    def __init__(self, name: str, subject: str, text: str, html_source: str):
+        self.name = name
+        self.subject = CompiledTemplate(subject, str)
+        self.text = CompiledTemplate(text, str)
+        self.html = CompiledTemplate(html_source, html.escape)
+
+        boundary = f"=============={uuid.uuid4().hex}=="
+        part_headers = "Content-Type: text/{subtype}; charset=\"utf-8\"\r\nMIME-Version: 1.0\r\nContent-Transfer-Encoding: base64\r\n\r\n"
+        self._content_headers = (
+            f"Content-Type: multipart/alternative; boundary=\"{boundary}\"\r\nMIME-Version: 1.0\r\n"
+        ).encode()
+        self._text_part_start = (f"\r\n--{boundary}\r\n" + part_headers.format(subtype="plain")).encode()
+        self._html_part_start = (f"--{boundary}\r\n" + part_headers.format(subtype="html")).encode()
+        self._closing = f"--{boundary}--\r\n".encode()
+
+    def render(self, sender: str, recipients: Sequence[str], **values) -> PreparedEmail:
+        headers = (
+            f"Subject: {_header_value(self.subject.render(values))}\r\n"
+            f"From: {_header_value(sender)}\r\n"
+            f"To: {_header_value(', '.join(recipients))}\r\n"
+        ).encode()
+        data = b"".join((
+            self._content_headers,
+            headers,
+            self._text_part_start,
+            _base64_body(self.text.render(values)),
+            self._html_part_start,
+            _base64_body(self.html.render(values)),
+            self._closing,
+        ))
+        return PreparedEmail(sender=sender, recipients=list(recipients), data=data)
+
+
+class EmailTemplateRegistry:
+
+    def __init__(self, directory: Path = TEMPLATE_DIR):
+        self.directory = directory
+        self._templates: dict[str, EmailTemplate] = {}
+
+    def load(self) -> None:
+        for name, subject in TEMPLATE_SUBJECTS.items():
+            self._templates[name] = EmailTemplate(
+                name,
+                subject=subject,
+                text=(self.directory / f"{name}.txt").read_text(encoding="utf-8"),
+                html_source=(self.directory / f"{name}.html").read_text(encoding="utf-8"),
+            )
+        logger.info(f"Compiled {len(self._templates)} email templates")
+
+    def get(self, name: str) -> EmailTemplate:
+        if not self._templates:
+            self.load()
+        return self._templates[name]
+
+    def render(self, name: str, sender: str, recipients: Sequence[str], **values) -> PreparedEmail:
+        return self.get(name).render(sender, recipients, **values)
+
+
+email_templates = EmailTemplateRegistry()
@@ -0,0 +1,62 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.core.database import SessionLocal
+from app.core.email import email_service
+from app.core.events import COURSE_PUBLISHED, ENROLLMENT_CREATED, Event, EventBroker
+from app.models.course import Course, Enrollment
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+async def send_enrollment_receipt(event: Event) -> None:
+    if event.payload.get("source") == "admin_import":
+        return  # nothing was purchased
+    async with SessionLocal() as db:
+        res = await db.execute(
+            select(User.email, User.first_name, Course.title, Course.price)
+            .select_from(User)
+            .join(Course, Course.id == event.payload["course_id"])
+            .where(User.id == event.payload["student_id"])
+        )
+        row = res.one_or_none()
+    if row is None:
+        logger.warning(f"Enrollment event {event.id} refers to a missing student or course")
+        return
+
+    email_service.enqueue_enrollment_receipt_email(
+        email=row.email,
+        student_name=row.first_name,
+        course_title=row.title,
+        price=f"{row.price:.2f}",
+        enrolled_at=datetime.fromisoformat(event.payload["enrolled_at"]).strftime("%Y-%m-%d"),
+    )
+
+
+async def announce_published_course(event: Event) -> None:
+    """Tell students of the teacher's other courses about the new one"""
+    course_id = event.payload["course_id"]
+    async with SessionLocal() as db:
+        course = await db.get(Course, course_id)
+        if course is None or not course.is_published:
+            return
+        res = await db.execute(
+            select(User.email)
+            .join(Enrollment, Enrollment.student_id == User.id)
+            .join(Course, Course.id == Enrollment.course_id)
+            .where(Course.teacher_id == course.teacher_id, Course.id != course_id, User.is_active)
+            .distinct()
+        )
+        emails = res.scalars().all()
+
+    for email in emails:
+        email_service.enqueue_course_published_email([email], course.title, course.description or "")
+    logger.info(f"Announced course {course_id} to {len(emails)} students")
+
+
+def register_event_handlers(broker: EventBroker) -> None:
+    broker.subscribe(ENROLLMENT_CREATED, send_enrollment_receipt)
+    broker.subscribe(COURSE_PUBLISHED, announce_published_course)
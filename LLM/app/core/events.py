@@ -0,0 +1,195 @@
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ENROLLMENT_CREATED = "enrollment.created"
+COURSE_PUBLISHED = "course.published"
+USER_REGISTERED = "user.registered"
+
+
+@dataclass
+class Event:
+    id: int
+    topic: str
+    key: Optional[str]
+    payload: dict
+    created_at: Optional[datetime] = None
+    # Handlers that already succeeded for this event; a retry skips them
+    handled: set[str] = field(default_factory=set)
+
+    def encode(self) -> bytes:
+        return json.dumps({
+            "id": self.id,
+            "topic": self.topic,
+            "payload": self.payload,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }).encode()
+
+    @classmethod
+    def decode(cls, key: Optional[bytes], value: bytes) -> "Event":
+        data = json.loads(value)
+        created_at = data.get("created_at")
+        return cls(
+            id=data["id"],
+            topic=data["topic"],
+            key=key.decode() if key else None,
+            payload=data["payload"],
+            created_at=datetime.fromisoformat(created_at) if created_at else None,
+        )
+
+
+EventHandler = Callable[[Event], Awaitable[None]]
+
+
+def handler_name(handler: EventHandler) -> str:
+    return f"{handler.__module__}.{handler.__qualname__}"
+
+
+class EventBroker(ABC):
+    """Where the outbox relay delivers events, and where handlers subscribe.
+
+    Delivery is at-least-once: ``publish`` raising means the relay will retry
+    the event. Handlers that succeeded are recorded on the event, so a retry
+    only re-runs the ones that failed.
+    """
+
+    def __init__(self):
+        self._handlers: dict[str, list[EventHandler]] = {}
+
+    def subscribe(self, topic: str, handler: EventHandler) -> None:
+        self._handlers.setdefault(topic, []).append(handler)
+
+    async def dispatch(self, event: Event) -> None:
+        """Run every handler not yet in ``event.handled``, then re-raise the first failure"""
+        error: Optional[Exception] = None
+        for handler in self._handlers.get(event.topic, ()):
+            name = handler_name(handler)
+            if name in event.handled:
+                continue
+            try:
+                await handler(event)
+            except Exception as e:
+                error = error or e
+                continue
+            event.handled.add(name)
+        if error is not None:
+            raise error
+
+    async def start(self) -> None:
+        pass
+
+    @abstractmethod
+    async def publish(self, event: Event) -> None:
+        ...
+
+    async def stop(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"broker": type(self).__name__}
+
+
+class InMemoryBroker(EventBroker):
+    """Runs subscribers in-process as events are published; used in development and tests"""
+
+    def __init__(self, history_size: int = 1000):
+        super().__init__()
+        self.published: deque[Event] = deque(maxlen=history_size)
+
+    async def publish(self, event: Event) -> None:
+        await self.dispatch(event)
+        self.published.append(event)
+
+
+class KafkaBroker(EventBroker):
+    """Publishes to Kafka, one topic per event type, keyed for per-entity ordering.
+
+    Subscribed handlers run in a consumer that shares ``group_id`` across all
+    workers, so each event is handled once per deployment.
+    """
+
+    def __init__(self, bootstrap_servers: str, client_id: str, group_id: str):
+        super().__init__()
+        self.bootstrap_servers = bootstrap_servers
+        self.client_id = client_id
+        self.group_id = group_id
+        self._producer = None
+        self._consumer = None
+        self._consumer_task: Optional[asyncio.Task] = None
+        self.consumed = 0
+        self.handler_failures = 0
+
+    async def start(self) -> None:
+        from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
+
+        self._producer = AIOKafkaProducer(
+            bootstrap_servers=self.bootstrap_servers,
+            client_id=self.client_id,
+            acks="all",
+            enable_idempotence=True,
+        )
+        await self._producer.start()
+
+        if self._handlers:
+            self._consumer = AIOKafkaConsumer(
+                *self._handlers,
+                bootstrap_servers=self.bootstrap_servers,
+                client_id=self.client_id,
+                group_id=self.group_id,
+                enable_auto_commit=False,
+            )
+            await self._consumer.start()
+            self._consumer_task = asyncio.create_task(self._consume())
+
+    async def publish(self, event: Event) -> None:
+        await self._producer.send_and_wait(
+            event.topic,
+            value=event.encode(),
+            key=event.key.encode() if event.key else None,
+        )
+
+    async def _consume(self) -> None:
+        async for message in self._consumer:
+            event = Event.decode(message.key, message.value)
+            try:
+                await self.dispatch(event)
+                self.consumed += 1
+            except Exception as e:
+                # The event is still in the outbox history; a poisoned message must not stall the partition
+                self.handler_failures += 1
+                logger.exception(f"Handler for {event.topic} event {event.id} failed: {e}")
+            await self._consumer.commit()
+
+    async def stop(self) -> None:
+        if self._consumer_task is not None:
+            self._consumer_task.cancel()
+            await asyncio.gather(self._consumer_task, return_exceptions=True)
+            await self._consumer.stop()
+        if self._producer is not None:
+            await self._producer.stop()
+
+    def stats(self) -> dict:
+        return {**super().stats(), "consumed": self.consumed, "handler_failures": self.handler_failures}
+
+
+def create_event_broker() -> EventBroker:
+    if settings.EVENT_BROKER == "kafka":
+        logger.info(f"Publishing events to Kafka at {settings.KAFKA_BOOTSTRAP_SERVERS}")
+        return KafkaBroker(
+            bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+            client_id=settings.KAFKA_CLIENT_ID,
+            group_id=settings.KAFKA_CONSUMER_GROUP,
+        )
+    return InMemoryBroker()
+
+
+event_broker = create_event_broker()
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass
+from email.message import Message
+from typing import Optional, Union
+
+import aiosmtplib
+
+from app.core.config import settings
+from app.core.email_templates import PreparedEmail
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPConnectionPool:
+    """Small pool of long-lived, already authenticated SMTP sessions"""
+
+    def __init__(
+        self,
+        hostname: Optional[str],
+        port: int,
+        username: Optional[str],
+        password: Optional[str],
+        start_tls: bool,
+        size: int,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.size = size
+        self._idle: asyncio.Queue[aiosmtplib.SMTP] = asyncio.Queue()
+        self._created = 0
+        self.connects = 0
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            start_tls=self.start_tls,
+        )
+        await client.connect()
+        self.connects += 1
+        return client
+
+    async def acquire(self) -> aiosmtplib.SMTP:
+        if self._idle.empty() and self._created < self.size:
+            self._created += 1
+            try:
+                return await self._connect()
+            except Exception:
+                self._created -= 1
+                raise
+
+        client = await self._idle.get()
+        if not client.is_connected:
+            try:
+                client = await self._connect()
+            except Exception:
+                self._created -= 1
+                raise
+        return client
+
+    async def release(self, client: aiosmtplib.SMTP, healthy: bool = True) -> None:
+        if healthy and client.is_connected:
+            self._idle.put_nowait(client)
+            return
+        self._created -= 1
+        client.close()
+
+    async def close(self) -> None:
+        while not self._idle.empty():
+            client = self._idle.get_nowait()
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+        self._created = 0
+
+
+@dataclass
+class OutboundMail:
+    message: Union[Message, PreparedEmail]
+    attempts: int = 0
+    last_error: Optional[str] = None
+
+    @property
+    def recipients(self) -> str:
+        if isinstance(self.message, PreparedEmail):
+            return ", ".join(self.message.recipients)
+        return self.message["To"]
+
+
+class MailQueue:
+    """Background outbound mail queue with batching, retry and a dead-letter list.
+
+    Each worker takes up to ``batch_size`` queued messages and sends them over
+    one pooled SMTP session. Failed messages are retried with exponential
+    backoff and moved to ``dead_letters`` after ``max_retries`` attempts.
+    """
+
+    def __init__(
+        self,
+        pool: SMTPConnectionPool,
+        batch_size: int,
+        max_retries: int,
+        retry_backoff: float,
+        max_size: int,
+        dead_letter_size: int,
+    ):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queue: asyncio.Queue[OutboundMail] = asyncio.Queue(maxsize=max_size)
+        self._workers: list[asyncio.Task] = []
+        self._retries: set[asyncio.Task] = set()
+        self.dead_letters: deque[OutboundMail] = deque(maxlen=dead_letter_size)
+        self.sent = 0
+        self.failed_attempts = 0
+        self.dropped = 0
+
+    def enqueue(self, message: Union[Message, PreparedEmail]) -> bool:
+        mail = OutboundMail(message=message)
+        try:
+            self._queue.put_nowait(mail)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.error(f"Mail queue full, dropping message to {mail.recipients}")
+            return False
+
+    async def _retry_later(self, mail: OutboundMail) -> None:
+        await asyncio.sleep(self.retry_backoff * 2 ** (mail.attempts - 1))
+        await self._queue.put(mail)
+
+    def _handle_failure(self, mail: OutboundMail, error: Exception) -> None:
+        self.failed_attempts += 1
+        mail.attempts += 1
+        mail.last_error = str(error)
+        if mail.attempts >= self.max_retries:
+            logger.error(f"Giving up on mail to {mail.recipients} after {mail.attempts} attempts: {error}")
+            self.dead_letters.append(mail)
+            return
+        task = asyncio.create_task(self._retry_later(mail))
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
+
+    async def _send_batch(self, batch: list[OutboundMail]) -> None:
+        try:
+            client = await self.pool.acquire()
+        except Exception as e:
+            logger.warning(f"SMTP connection failed: {e}")
+            for mail in batch:
+                self._handle_failure(mail, e)
+            return
+
+        healthy = True
+        for mail in batch:
+            if not healthy:
+                self._handle_failure(mail, RuntimeError("SMTP session lost"))
+                continue
+            try:
+                if isinstance(mail.message, PreparedEmail):
+                    await client.sendmail(mail.message.sender, mail.message.recipients, mail.message.data)
+                else:
+                    await client.send_message(mail.message)
+                self.sent += 1
+                logger.info(f"Email sent successfully to {mail.recipients}")
+            except aiosmtplib.SMTPRecipientsRefused as e:
+                # Permanent for this message; the session is still usable
+                mail.attempts = self.max_retries
+                self._handle_failure(mail, e)
+            except Exception as e:
+                healthy = client.is_connected
+                self._handle_failure(mail, e)
+        await self.pool.release(client, healthy=healthy)
+
+    async def _worker(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._send_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def start(self) -> None:
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.pool.size)]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Drain what is already queued (bounded by ``timeout``), then shut down"""
+        if self._workers:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            try:
+                while True:
+                    await asyncio.wait_for(self._queue.join(), timeout=deadline - loop.time())
+                    if not self._retries:
+                        break
+                    await asyncio.wait(set(self._retries), timeout=deadline - loop.time())
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Mail queue stopped with {self._queue.qsize() + len(self._retries)} undelivered messages"
+                )
+        for task in [*self._workers, *self._retries]:
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._retries, return_exceptions=True)
+        self._workers = []
+        await self.pool.close()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "retrying": len(self._retries),
+            "sent": self.sent,
+            "failed_attempts": self.failed_attempts,
+            "dead_letters": len(self.dead_letters),
+            "dropped": self.dropped,
+            "smtp_connects": self.pool.connects,
+        }
+
+
+mail_queue = MailQueue(
+    pool=SMTPConnectionPool(
+        hostname=settings.SMTP_HOST,
+        port=settings.SMTP_PORT,
+        username=settings.SMTP_USER,
+        password=settings.SMTP_PASSWORD,
+        start_tls=settings.SMTP_START_TLS,
+        size=settings.SMTP_POOL_SIZE,
+    ),
+    batch_size=settings.SMTP_BATCH_SIZE,
+    max_retries=settings.SMTP_MAX_RETRIES,
+    retry_backoff=settings.SMTP_RETRY_BACKOFF_SECONDS,
+    max_size=settings.MAIL_QUEUE_MAX_SIZE,
+    dead_letter_size=settings.MAIL_DEAD_LETTER_SIZE,
+)
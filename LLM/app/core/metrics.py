@@ -0,0 +1,156 @@
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+registry = CollectorRegistry()
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP responses by route template and status code",
+    ["method", "route", "status"], registry=registry,
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route"], registry=registry,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served",
+    ["method"], registry=registry,
+)
+DB_QUERIES = Counter(
+    "db_queries_total", "SQL statements executed, by the route that issued them",
+    ["route"], registry=registry,
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "SQL statement latency, by the route that issued it",
+    ["route"], registry=registry,
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request",
+    ["route"], registry=registry,
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_SECONDS_PER_REQUEST = Histogram(
+    "http_request_db_seconds", "Time spent in SQL per HTTP request",
+    ["route"], registry=registry,
+)
+
+# Label for queries issued outside a request (background flushes, startup)
+BACKGROUND = "background"
+UNMATCHED = "unmatched"
+
+
+@dataclass
+class RequestMetrics:
+    scope: Scope
+    queries: int = 0
+    db_seconds: float = 0.0
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def route(self) -> str:
+        # Set by the router once the request is matched; templates keep label cardinality bounded
+        route = self.scope.get("route")
+        return getattr(route, "path", UNMATCHED)
+
+
+current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request", default=None)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status codes and DB usage per route"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        request = RequestMetrics(scope=scope)
+        token = current_request.set(request)
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = HTTP_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            current_request.reset(token)
+            route = request.route
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - request.started_at)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            DB_QUERIES_PER_REQUEST.labels(route).observe(request.queries)
+            DB_SECONDS_PER_REQUEST.labels(route).observe(request.db_seconds)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+    request = current_request.get()
+    route = BACKGROUND
+    if request is not None:
+        request.queries += 1
+        request.db_seconds += elapsed
+        route = request.route
+    DB_QUERIES.labels(route).inc()
+    DB_QUERY_LATENCY.labels(route).observe(elapsed)
+    if elapsed >= settings.SLOW_QUERY_SECONDS:
+        logger.warning(f"Slow query ({elapsed * 1000:.1f} ms) from {route}: {' '.join(statement.split())[:500]}")
+
+
+class StatsCollector:
+    """Exposes the numeric values of the ``/stats`` dict as gauges.
+
+    Nested keys are joined with underscores (``lms_db_pool_checked_out``);
+    lists become an ``index`` label.
+    """
+
+    def __init__(self, source: Callable[[], dict], prefix: str = "lms"):
+        self.source = source
+        self.prefix = prefix
+
+    def _flatten(self, name: str, value, labels: dict) -> Iterator[tuple[str, dict, float]]:
+        if isinstance(value, dict):
+            for key, item in value.items():
+                yield from self._flatten(f"{name}_{key}", item, labels)
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                yield from self._flatten(name, item, {**labels, "index": str(index)})
+        elif isinstance(value, (bool, int, float)):
+            yield name, labels, float(value)
+
+    def collect(self):
+        families: dict[str, GaugeMetricFamily] = {}
+        for name, labels, value in self._flatten(self.prefix, self.source(), {}):
+            family = families.get(name)
+            if family is None:
+                family = families[name] = GaugeMetricFamily(name, f"/stats value {name}", labels=list(labels))
+            family.add_metric(list(labels.values()), value)
+        return families.values()
@@ -0,0 +1,40 @@
+import logging
+from pathlib import Path
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent.parent / "alembic.ini"
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+def head_revisions() -> set[str]:
+    """Revisions the code expects, read from the migration scripts on disk"""
+    script = ScriptDirectory.from_config(Config(str(ALEMBIC_INI)))
+    return set(script.get_heads())
+
+
+async def check_schema_version(engine: AsyncEngine) -> str:
+    """Fail fast when the database is not at the Alembic head.
+
+    Only reads ``alembic_version``; migrations themselves are applied once per
+    deploy with ``alembic upgrade head``, never by the app workers.
+    """
+    expected = head_revisions()
+    async with engine.connect() as conn:
+        current = await conn.run_sync(lambda sync_conn: set(MigrationContext.configure(sync_conn).get_current_heads()))
+
+    if current != expected:
+        raise SchemaVersionError(
+            f"Database schema is at {sorted(current) or 'no revision'}, expected {sorted(expected)}; "
+            f"run `alembic upgrade head` before starting the app"
+        )
+    logger.info(f"Database schema is at head {', '.join(sorted(current))}")
+    return ", ".join(sorted(current))
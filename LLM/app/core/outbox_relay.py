@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.events import Event, EventBroker, event_broker
+from app.crud.outbox import OUTBOX_PENDING, outbox_crud
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL_SECONDS = 3600
+
+
+class OutboxRelay:
+    """Background task that drains ``outbox_events`` to the event broker.
+
+    Each pass locks up to ``batch_size`` unpublished rows with ``FOR UPDATE
+    SKIP LOCKED`` (so every worker can run a relay), publishes them at most
+    ``publish_concurrency`` at a time and marks them published in the same
+    transaction. Handlers that succeeded are saved on the row even when the
+    event fails, so a retry re-runs only the failed ones. Commits that stage
+    events wake the relay immediately; otherwise it polls every
+    ``poll_interval``. Events that fail ``max_attempts`` times stay in the
+    table unpublished.
+    """
+
+    def __init__(
+        self,
+        broker: EventBroker,
+        batch_size: int,
+        publish_concurrency: int,
+        poll_interval: float,
+        max_attempts: int,
+        retention: timedelta,
+    ):
+        self.broker = broker
+        self.batch_size = batch_size
+        self.publish_concurrency = publish_concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._next_purge = 0.0
+        self.published = 0
+        self.failed_attempts = 0
+        self.abandoned = 0
+        self.failures = 0
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def relay_once(self) -> int:
+        async with SessionLocal() as db:
+            rows = await outbox_crud.claim_batch(db, self.batch_size, self.max_attempts)
+            if not rows:
+                return 0
+
+            slots = asyncio.Semaphore(self.publish_concurrency)
+
+            async def publish(event: Event) -> None:
+                async with slots:
+                    await self.broker.publish(event)
+
+            events = [
+                Event(row.id, row.topic, row.key, row.payload, row.created_at, handled=set(row.handled or ()))
+                for row in rows
+            ]
+            results = await asyncio.gather(*(publish(event) for event in events), return_exceptions=True)
+            now = datetime.now(timezone.utc)
+            for row, event, result in zip(rows, events, results):
+                row.handled = sorted(event.handled)
+                if not isinstance(result, Exception):
+                    row.published_at = now
+                    self.published += 1
+                    continue
+                row.attempts += 1
+                row.last_error = str(result)[:1000]
+                self.failed_attempts += 1
+                if row.attempts >= self.max_attempts:
+                    self.abandoned += 1
+                    logger.error(f"Giving up on {row.topic} event {row.id} after {row.attempts} attempts: {result}")
+                else:
+                    logger.warning(f"Publishing {row.topic} event {row.id} failed, will retry: {result}")
+            await db.commit()
+            return len(rows)
+
+    async def _purge(self) -> None:
+        if time.monotonic() < self._next_purge:
+            return
+        self._next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+        async with SessionLocal() as db:
+            purged = await outbox_crud.purge_published(db, self.retention)
+        if purged:
+            logger.info(f"Purged {purged} published outbox events")
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                handled = await self.relay_once()
+                await self._purge()
+            except Exception as e:
+                self.failures += 1
+                handled = 0
+                logger.error(f"Outbox relay pass failed: {e}")
+            if handled >= self.batch_size:
+                continue  # backlog, keep draining
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        if self._task is None:
+            await self.broker.start()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop relaying; anything unpublished stays in the table for the next start"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            await self.broker.stop()
+
+    def stats(self) -> dict:
+        return {
+            **self.broker.stats(),
+            "published": self.published,
+            "failed_attempts": self.failed_attempts,
+            "abandoned": self.abandoned,
+            "failures": self.failures,
+        }
+
+
+outbox_relay = OutboxRelay(
+    broker=event_broker,
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    publish_concurrency=settings.OUTBOX_PUBLISH_CONCURRENCY,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL_SECONDS,
+    max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+    retention=timedelta(hours=settings.OUTBOX_RETENTION_HOURS),
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_relay(session: Session) -> None:
+    if session.info.pop(OUTBOX_PENDING, False):
+        outbox_relay.notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_staged_events(session: Session) -> None:
+    session.info.pop(OUTBOX_PENDING, None)
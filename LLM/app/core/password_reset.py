@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.user import user_crud
+
+logger = logging.getLogger(__name__)
+
+
+class ResetRequestPurger:
+    """Deletes expired password reset requests every ``interval``.
+
+    Verification already ignores expired rows, so the purge only keeps the
+    table small: one indexed range delete on ``created_at`` instead of a
+    delete per request.
+    """
+
+    def __init__(self, interval: float, expires_after: timedelta):
+        self.interval = interval
+        self.expires_after = expires_after
+        self._task: Optional[asyncio.Task] = None
+        self.purged = 0
+        self.failures = 0
+
+    async def purge(self) -> int:
+        async with SessionLocal() as db:
+            purged = await user_crud.purge_reset_requests(db, self.expires_after)
+        self.purged += purged
+        if purged:
+            logger.info(f"Purged {purged} expired password reset requests")
+        return purged
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.purge()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Purging password reset requests failed: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"purged": self.purged, "failures": self.failures}
+
+
+reset_request_purger = ResetRequestPurger(
+    interval=settings.PASSWORD_RESET_PURGE_INTERVAL_SECONDS,
+    expires_after=timedelta(minutes=settings.OTP_EXPIRE_MINUTES),
+)
@@ -0,0 +1,118 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import inspect
+
+from app.core.cache import CacheBackend, cache
+from app.core.config import settings
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class PrincipalCache:
+    """Bounded TTL/LRU cache of authenticated users keyed by token subject.
+
+    Only column values are stored; every hit builds a fresh, session-less
+    ``User`` so cached state is never shared between requests. Given a shared
+    ``versions`` backend, each entry keeps the subject's tag version and is
+    served only while it is unchanged, so ``invalidate`` on one worker
+    reaches every worker at the cost of one version read per request.
+    """
+
+    def __init__(self, ttl_seconds: int, max_size: int, versions: Optional[CacheBackend] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.versions = versions
+        self._entries: OrderedDict[str, tuple[float, int, dict]] = OrderedDict()
+        self._columns = [attr.key for attr in inspect(User).column_attrs]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale = 0
+
+    @staticmethod
+    def _tag(subject: str) -> str:
+        return f"principal:{subject}"
+
+    async def _version(self, subject: str) -> int:
+        if self.versions is None:
+            return 0
+        [version] = await self.versions.tag_versions([self._tag(subject)])
+        return version
+
+    async def get_or_load(self, subject: str, load: Callable[[], Awaitable[Optional[User]]]) -> Optional[User]:
+        if self.max_size <= 0:
+            return await load()
+
+        # Read the version before loading, so an invalidation during the load
+        # leaves the new entry already stale
+        version = await self._version(subject)
+        entry = self._entries.get(subject)
+        if entry is not None:
+            expires_at, entry_version, values = entry
+            if expires_at >= time.monotonic() and entry_version == version:
+                self._entries.move_to_end(subject)
+                self.hits += 1
+                return User(**values)
+            del self._entries[subject]
+            if entry_version != version:
+                self.stale += 1
+
+        self.misses += 1
+        user = await load()
+        if user is not None:
+            self._set(subject, version, user)
+        return user
+
+    def _set(self, subject: str, version: int, user: User) -> None:
+        values = {key: getattr(user, key) for key in self._columns}
+        self._entries[subject] = (time.monotonic() + self.ttl_seconds, version, values)
+        self._entries.move_to_end(subject)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def invalidate(self, subject: str) -> None:
+        if self._entries.pop(subject, None) is not None:
+            self.invalidations += 1
+        if self.versions is not None:
+            await self.versions.invalidate_tags(self._tag(subject))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "shared_versions": self.versions is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale": self.stale,
+        }
+
+
+def create_principal_cache() -> PrincipalCache:
+    max_size = settings.PRINCIPAL_CACHE_MAX_SIZE
+    versions = None
+    if settings.CACHE_BACKEND == "redis":
+        versions = cache.backend
+    elif settings.WEB_CONCURRENCY > 1:
+        logger.warning(
+            f"CACHE_BACKEND=memory with {settings.WEB_CONCURRENCY} workers: the principal cache is disabled, "
+            f"since a deactivation or password reset would only reach one worker; use CACHE_BACKEND=redis"
+        )
+        max_size = 0
+    return PrincipalCache(ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS, max_size=max_size, versions=versions)
+
+
+principal_cache = create_principal_cache()
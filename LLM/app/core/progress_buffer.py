@@ -0,0 +1,172 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.progress import progress_crud
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingProgress:
+    completion_percentage: int = 0
+    time_spent_seconds: int = 0
+    completed_at: datetime | None = None
+
+
+class ProgressBuffer:
+    """Write-behind buffer that coalesces lesson heartbeats per (student, lesson).
+
+    Heartbeats are merged in memory and written in batched upserts when the
+    flush interval elapses or ``max_items`` keys are pending. At most
+    ``max_pending`` keys are buffered; heartbeats for new keys beyond that,
+    such as while the database is down, are refused with a 503. ``stop``
+    does a final flush so nothing buffered is lost on a clean shutdown.
+    """
+
+    def __init__(self, flush_interval: float, max_items: int, max_pending: int):
+        self.flush_interval = flush_interval
+        self.max_items = max_items
+        self.max_pending = max_pending
+        self._pending: dict[tuple[int, int], PendingProgress] = {}
+        # Seconds below a full minute, carried into the next flush only
+        self._carry_seconds: dict[tuple[int, int], int] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._size_flush: asyncio.Task | None = None
+        self.heartbeats = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.failures = 0
+        self.rejected = 0
+        self.dropped = 0
+
+    def add(self, student_id: int, lesson_id: int, completion_percentage: int, time_spent_seconds: int) -> None:
+        key = (student_id, lesson_id)
+        if key not in self._pending and len(self._pending) >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Progress is not being saved right now, please retry shortly",
+                headers={"Retry-After": str(max(1, round(self.flush_interval)))},
+            )
+        self.heartbeats += 1
+        entry = self._pending.setdefault(key, PendingProgress())
+        entry.completion_percentage = max(entry.completion_percentage, completion_percentage)
+        entry.time_spent_seconds += time_spent_seconds
+        if entry.completion_percentage >= 100 and entry.completed_at is None:
+            entry.completed_at = datetime.now(timezone.utc)
+
+        if len(self._pending) >= self.max_items and (self._size_flush is None or self._size_flush.done()):
+            self._size_flush = asyncio.create_task(self.flush())
+
+    def _merge_back(self, batch: dict[tuple[int, int], PendingProgress]) -> None:
+        """Return a failed batch to the buffer, dropping new keys that no longer fit"""
+        dropped = 0
+        for key, entry in batch.items():
+            current = self._pending.get(key)
+            if current is None:
+                if len(self._pending) >= self.max_pending:
+                    dropped += 1
+                    continue
+                self._pending[key] = entry
+                continue
+            current.completion_percentage = max(current.completion_percentage, entry.completion_percentage)
+            current.time_spent_seconds += entry.time_spent_seconds
+            current.completed_at = entry.completed_at or current.completed_at
+        if dropped:
+            self.dropped += dropped
+            logger.error(f"Progress buffer full, dropped {dropped} unsaved progress rows")
+
+    async def flush(self, final: bool = False) -> None:
+        """Write everything pending.
+
+        Seconds short of a minute carry into the next flush only. A carry
+        that flush doesn't top up, and every carry on the ``final`` flush,
+        is rounded to the nearest minute and written instead.
+        """
+        async with self._flush_lock:
+            if not self._pending and not self._carry_seconds:
+                return
+            batch, self._pending = self._pending, {}
+            carried, self._carry_seconds = self._carry_seconds, {}
+            for key in carried.keys() - batch.keys():
+                if carried[key] >= 30:
+                    batch[key] = PendingProgress()
+
+            rows = []
+            for (student_id, lesson_id), entry in batch.items():
+                seconds = carried.get((student_id, lesson_id), 0) + entry.time_spent_seconds
+                minutes, remainder = divmod(seconds, 60)
+                if remainder and (final or not entry.time_spent_seconds):
+                    minutes += remainder >= 30
+                elif remainder:
+                    self._carry_seconds[(student_id, lesson_id)] = remainder
+                rows.append({
+                    "student_id": student_id,
+                    "lesson_id": lesson_id,
+                    "completion_percentage": entry.completion_percentage,
+                    "time_spent_minutes": minutes,
+                    "completed": entry.completion_percentage >= 100,
+                    "completed_at": entry.completed_at,
+                })
+
+            if not rows:
+                return
+            try:
+                async with SessionLocal() as db:
+                    written = await progress_crud.upsert_many(db, rows)
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Progress flush of {len(rows)} rows failed, will retry: {e}")
+                for row in rows:
+                    key = (row["student_id"], row["lesson_id"])
+                    batch[key].time_spent_seconds = row["time_spent_minutes"] * 60
+                self._merge_back(batch)
+                return
+
+            self.flushes += 1
+            self.rows_written += written
+            logger.debug(f"Flushed {written} progress rows")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush(final=True)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "heartbeats": self.heartbeats,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+        }
+
+
+progress_buffer = ProgressBuffer(
+    flush_interval=settings.PROGRESS_FLUSH_INTERVAL_SECONDS,
+    max_items=settings.PROGRESS_FLUSH_MAX_ITEMS,
+    max_pending=settings.PROGRESS_MAX_PENDING,
+)
@@ -0,0 +1,306 @@
+import json
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Sequence
+from urllib.parse import parse_qs
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Form bodies larger than this are passed through without reading body keys
+MAX_BUFFERED_BODY = 16 * 1024
+
+
+def parse_rate(rate: str) -> tuple[int, float]:
+    """``"5/300"`` -> a burst of 5 requests refilled over 300 seconds"""
+    count, seconds = rate.split("/")
+    return int(count), float(seconds)
+
+
+class RateLimitBackend(ABC):
+    """Token buckets: ``capacity`` tokens, refilled continuously at ``capacity / period`` per second"""
+
+    @abstractmethod
+    async def acquire(self, key: str, capacity: int, period: float) -> float:
+        """Take a token; return 0 if allowed, else the seconds until one is available"""
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process buckets, least recently used evicted beyond ``max_keys``; each worker counts separately."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def acquire(self, key: str, capacity: int, period: float) -> float:
+        now = time.monotonic()
+        rate = capacity / period
+        tokens, updated_at = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+# Refill and take in one round trip; the Redis clock keeps workers consistent
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Buckets shared by every worker, updated atomically by a Lua script"""
+
+    def __init__(self, url: str, prefix: str = "lms:rl:"):
+        from redis import asyncio as redis
+
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(self, key: str, capacity: int, period: float) -> float:
+        wait = await self._script(keys=[f"{self.prefix}{key}"], args=[capacity, capacity / period])
+        return float(wait)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """``capacity`` requests per ``period`` seconds to ``method path``, counted per value of ``key``.
+
+    ``source`` says where the endpoint reads ``key`` from: ``"client"`` (the
+    IP), ``"query"`` or ``"form"``. Reading it from the same place as the
+    endpoint means a request can't be charged to one bucket and act on
+    another. Requests without the field aren't counted by this rule.
+    """
+    name: str
+    method: str
+    path: str
+    source: str
+    key: str
+    capacity: int
+    period: float
+
+    @classmethod
+    def from_setting(cls, name: str, method: str, path: str, source: str, key: str, rate: str) -> "RateLimitRule":
+        capacity, period = parse_rate(rate)
+        return cls(name, method, path, source, key, capacity, period)
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend, rules: list[RateLimitRule], trusted_proxies: int = 0):
+        self.backend = backend
+        self.trusted_proxies = trusted_proxies
+        self._rules: dict[tuple[str, str], list[RateLimitRule]] = {}
+        for rule in rules:
+            self._rules.setdefault((rule.method, rule.path), []).append(rule)
+        self.allowed = dict.fromkeys((rule.name for rule in rules), 0)
+        self.rejected = dict.fromkeys((rule.name for rule in rules), 0)
+        self.backend_errors = 0
+
+    def rules_for(self, method: str, path: str) -> list[RateLimitRule]:
+        return self._rules.get((method, path.rstrip("/") or "/"), [])
+
+    def client_ip(self, scope: Scope) -> str:
+        """The address ``trusted_proxies`` hops from the right of X-Forwarded-For.
+
+        Each trusted proxy appends the address it was connected from, so that
+        entry was written by our own outermost proxy. Entries further left
+        come from the client and can be anything.
+        """
+        if self.trusted_proxies:
+            forwarded = [
+                entry.strip()
+                for name, value in scope["headers"] if name == b"x-forwarded-for"
+                for entry in value.decode("latin-1").split(",") if entry.strip()
+            ]
+            if forwarded:
+                return forwarded[-min(self.trusted_proxies, len(forwarded))]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def check(self, rules: list[RateLimitRule], values: dict[tuple[str, str], str]) -> float:
+        """Take a token from every bucket that applies; return the longest wait, 0 if all allowed.
+
+        A backend outage lets requests through rather than taking login down with it.
+        """
+        wait = 0.0
+        for rule in rules:
+            value = values.get((rule.source, rule.key))
+            if not value:
+                continue
+            try:
+                rule_wait = await self.backend.acquire(f"{rule.name}:{value}", rule.capacity, rule.period)
+            except Exception as e:
+                self.backend_errors += 1
+                logger.error(f"Rate limit backend failed, allowing the request: {e}")
+                return 0.0
+            if rule_wait > 0:
+                self.rejected[rule.name] += 1
+                wait = max(wait, rule_wait)
+            else:
+                self.allowed[rule.name] += 1
+        return wait
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "backend_errors": self.backend_errors,
+        }
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def create_rate_limit_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        logger.info("Using Redis rate limit backend")
+        return RedisRateLimitBackend(settings.REDIS_URL)
+    return MemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+
+rate_limiter = RateLimiter(
+    create_rate_limit_backend(),
+    rules=[
+        RateLimitRule.from_setting(
+            "login_ip", "POST", "/api/v1/auth/login", "client", "ip", settings.RATE_LIMIT_LOGIN_IP
+        ),
+        RateLimitRule.from_setting(
+            "login_username", "POST", "/api/v1/auth/login", "form", "username", settings.RATE_LIMIT_LOGIN_USERNAME
+        ),
+        RateLimitRule.from_setting(
+            "reset_ip", "POST", "/api/v1/auth/reset-password", "client", "ip", settings.RATE_LIMIT_RESET_REQUEST_IP
+        ),
+        RateLimitRule.from_setting(
+            "reset_email", "POST", "/api/v1/auth/reset-password", "query", "email",
+            settings.RATE_LIMIT_RESET_REQUEST_EMAIL,
+        ),
+        RateLimitRule.from_setting(
+            "reset_verify_ip", "POST", "/api/v1/auth/reset-password/verify", "client", "ip",
+            settings.RATE_LIMIT_RESET_VERIFY_IP,
+        ),
+        RateLimitRule.from_setting(
+            "reset_verify_id", "POST", "/api/v1/auth/reset-password/verify", "query", "reset_id",
+            settings.RATE_LIMIT_RESET_VERIFY_ID,
+        ),
+    ],
+    trusted_proxies=settings.RATE_LIMIT_TRUSTED_PROXIES,
+)
+
+
+def _last_values(fields: dict[str, list[str]], source: str) -> dict[tuple[str, str], str]:
+    # Starlette keeps the last of repeated query and form fields, so count that one
+    return {(source, name): values[-1].strip().lower()[:256] for name, values in fields.items()}
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware answering 429 before the route runs.
+
+    Rejected requests never reach dependency resolution, so they cost no DB
+    session and no bcrypt. Keys come from the client IP, the query string
+    and, for routes with form-keyed rules such as the OAuth2 login, the
+    urlencoded body, which is then replayed to the app unchanged. A form
+    that can't be read for its key is refused rather than let through
+    uncounted: 413 when larger than ``MAX_BUFFERED_BODY``, 415 when not
+    urlencoded.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter = rate_limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        rules = self.limiter.rules_for(scope["method"], scope["path"]) if scope["type"] == "http" else []
+        if not rules or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        values = {("client", "ip"): self.limiter.client_ip(scope)}
+        values.update(_last_values(parse_qs(scope.get("query_string", b"").decode("latin-1")), "query"))
+
+        body_messages: list[Message] = []
+        if any(rule.source == "form" for rule in rules):
+            headers = dict(scope["headers"])
+            if not headers.get(b"content-type", b"").startswith(b"application/x-www-form-urlencoded"):
+                await self._refuse(send, 415, "Expected an application/x-www-form-urlencoded body")
+                return
+            if int(headers.get(b"content-length", 0) or 0) > MAX_BUFFERED_BODY:
+                await self._refuse(send, 413, "Request body too large")
+                return
+            body = b""
+            while True:
+                message = await receive()
+                body_messages.append(message)
+                if message["type"] != "http.request":
+                    break
+                body += message.get("body", b"")
+                if not message.get("more_body", False) or len(body) > MAX_BUFFERED_BODY:
+                    break
+            if len(body) > MAX_BUFFERED_BODY:
+                await self._refuse(send, 413, "Request body too large")
+                return
+            values.update(_last_values(parse_qs(body.decode("latin-1")), "form"))
+
+        wait = await self.limiter.check(rules, values)
+        if wait > 0:
+            await self._refuse(
+                send, 429, "Too many requests, try again later", [(b"retry-after", str(math.ceil(wait)).encode())]
+            )
+            return
+
+        async def replay() -> Message:
+            if body_messages:
+                return body_messages.pop(0)
+            return await receive()
+
+        await self.app(scope, replay, send)
+
+    @staticmethod
+    async def _refuse(send: Send, status: int, detail: str, headers: Sequence[tuple[bytes, bytes]] = ()) -> None:
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                *headers,
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,336 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import read_session
+from app.core.search import tokenize
+from app.models.course import Course, Enrollment, Lesson, Progress
+
+logger = logging.getLogger(__name__)
+
+# Rows of the similarity matrix computed at once; they are sparse, so memory follows their nonzeros
+SIMILARITY_BATCH = 256
+
+ENROLLMENT_WEIGHT = 1.0
+PROGRESS_WEIGHT = 1.0  # scaled by the average lesson completion in the course
+
+
+def _normalize_rows(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1 / norms) @ matrix
+
+
+def tfidf_matrix(texts: list[str]) -> sparse.csr_matrix:
+    """L2-normalised TF-IDF rows (smoothed idf) for ``texts``"""
+    vocabulary: dict[str, int] = {}
+    rows, cols = [], []
+    for row, text in enumerate(texts):
+        for token in tokenize(text):
+            rows.append(row)
+            cols.append(vocabulary.setdefault(token, len(vocabulary)))
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(len(texts), len(vocabulary))
+    )  # duplicate (row, col) pairs are summed into term counts
+    df = np.bincount(counts.indices, minlength=len(vocabulary))
+    idf = np.log((1 + len(texts)) / (1 + df)) + 1
+    return _normalize_rows(counts @ sparse.diags(idf.astype(np.float32)))
+
+
+class SimilarityTable:
+    """Top-``k`` most similar courses per course, as dense ``(courses, k)`` arrays.
+
+    ``neighbors`` holds course slots (-1 pads rows with fewer than ``k``
+    positive similarities) and ``scores`` the matching similarities.
+    """
+
+    def __init__(self, course_ids: np.ndarray, neighbors: np.ndarray, scores: np.ndarray, popular: np.ndarray):
+        self.course_ids = course_ids
+        self.slots = {int(course_id): slot for slot, course_id in enumerate(course_ids)}
+        self.neighbors = neighbors
+        self.scores = scores
+        self.popular = popular
+
+    def similar(self, course_id: int, limit: int) -> list[tuple[int, float]]:
+        slot = self.slots.get(course_id)
+        if slot is None:
+            return []
+        return [
+            (int(self.course_ids[neighbor]), float(score))
+            for neighbor, score in zip(self.neighbors[slot, :limit], self.scores[slot, :limit])
+            if neighbor >= 0
+        ]
+
+    def recommend(self, course_ids: list[int], limit: int) -> list[tuple[int, float]]:
+        """Sum the neighbor lists of ``course_ids``, leaving those courses out"""
+        slots = [self.slots[course_id] for course_id in course_ids if course_id in self.slots]
+        if not slots:
+            return []
+        neighbors = self.neighbors[slots].ravel()
+        scores = self.scores[slots].ravel()
+        keep = (neighbors >= 0) & ~np.isin(neighbors, slots)
+        candidates, inverse = np.unique(neighbors[keep], return_inverse=True)
+        totals = np.bincount(inverse, weights=scores[keep])
+        order = np.lexsort((-candidates, -totals))[:limit]
+        return [(int(self.course_ids[candidates[i]]), float(totals[i])) for i in order]
+
+
+class CourseRecommender:
+    """Item-item course recommendations from enrollments, progress and course text.
+
+    Collaborative similarity is the cosine between course columns of the
+    student x course interaction matrix (an enrollment counts 1, plus the
+    average lesson completion). Content similarity is the cosine between
+    TF-IDF vectors of title and description. The blend is reduced to a
+    top-k table per course in sparse row batches, so serving a request is a
+    lookup whose cost does not depend on the catalog size.
+
+    A full rebuild runs at startup and every ``rebuild_interval``. In
+    between, every ``refresh_interval`` new enrollments are added to a
+    small delta matrix kept beside the rebuilt one, and only the rows of
+    the courses they touch are recomputed. The matrix work runs in a thread
+    so the event loop keeps serving.
+    """
+
+    def __init__(self, neighbors: int, content_weight: float, refresh_interval: float, rebuild_interval: float):
+        self.k = neighbors
+        self.content_weight = content_weight
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.table: Optional[SimilarityTable] = None
+        self._task: Optional[asyncio.Task] = None
+        # Student x course weights from the last rebuild (by column and by row), enrollments added since,
+        # and per-course squared norms and total engagement over both
+        self._student_rows: dict[int, int] = {}
+        self._interactions = sparse.csc_matrix((0, 0), dtype=np.float32)
+        self._interaction_rows = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self._delta = sparse.csc_matrix((0, 0), dtype=np.float32)
+        self._square_norms = np.zeros(0)
+        self._engagement = np.zeros(0)
+        self._content: Optional[sparse.csr_matrix] = None
+        self._last_enrollment_id = 0
+        self.rebuilds = 0
+        self.refreshes = 0
+        self.failures = 0
+        self.last_build_seconds: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.table is not None
+
+    async def _load(self) -> tuple[np.ndarray, list[str], tuple[list, list, list], int]:
+        async with read_session() as db:
+            res = await db.execute(
+                select(Course.id, Course.title, Course.description).where(Course.is_published).order_by(Course.id)
+            )
+            courses = res.all()
+            last_enrollment_id = (await db.execute(select(func.max(Enrollment.id)))).scalar() or 0
+            enrollments = (await db.execute(
+                select(Enrollment.student_id, Enrollment.course_id).where(Enrollment.id <= last_enrollment_id)
+            )).all()
+            progress = (await db.execute(
+                select(Progress.student_id, Lesson.course_id, func.avg(Progress.completion_percentage))
+                .join(Lesson, Lesson.id == Progress.lesson_id)
+                .group_by(Progress.student_id, Lesson.course_id)
+            )).all()
+
+        course_ids = np.array([row.id for row in courses], dtype=np.int64)
+        texts = [f"{row.title} {row.description or ''}" for row in courses]
+        slots = {int(course_id): slot for slot, course_id in enumerate(course_ids)}
+        students, course_slots, weights = [], [], []
+        for student_id, course_id in enrollments:
+            if course_id in slots:
+                students.append(student_id)
+                course_slots.append(slots[course_id])
+                weights.append(ENROLLMENT_WEIGHT)
+        for student_id, course_id, completion in progress:
+            if course_id in slots:
+                students.append(student_id)
+                course_slots.append(slots[course_id])
+                weights.append(PROGRESS_WEIGHT * float(completion) / 100)
+        return course_ids, texts, (students, course_slots, weights), last_enrollment_id
+
+    def _rows_for(self, students) -> list[int]:
+        return [self._student_rows.setdefault(int(student_id), len(self._student_rows)) for student_id in students]
+
+    def _columns(self, slots: np.ndarray) -> sparse.csc_matrix:
+        """Current interaction columns of the courses in ``slots``"""
+        columns = self._interactions[:, slots]
+        if self._delta.nnz:
+            columns = columns + self._delta[:, slots]
+        return columns.tocsc()
+
+    def _similarity(self, batch: np.ndarray) -> sparse.csr_matrix:
+        """Blended cosine similarity of the ``batch`` courses to every course, as sparse rows"""
+        columns = self._columns(batch).T.tocsr()
+        overlap = columns @ self._interactions
+        if self._delta.nnz:
+            overlap = overlap + columns @ self._delta
+        norms = np.sqrt(self._square_norms)
+        inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0).astype(np.float32)
+        collaborative = sparse.diags(inverse[batch]) @ overlap @ sparse.diags(inverse)
+        content = self._content[batch] @ self._content.T
+        return ((1 - self.content_weight) * collaborative + self.content_weight * content).tocsr()
+
+    def _top_k(self, slots: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Blended top-k neighbors for the courses in ``slots``, from the nonzeros of each row"""
+        k = self.k
+        neighbors = np.full((len(slots), k), -1, dtype=np.int32)
+        scores = np.zeros((len(slots), k), dtype=np.float32)
+        if k == 0:
+            return neighbors, scores
+
+        for start in range(0, len(slots), SIMILARITY_BATCH):
+            batch = slots[start:start + SIMILARITY_BATCH]
+            similarity = self._similarity(batch)
+            for offset, slot in enumerate(batch):
+                row = slice(similarity.indptr[offset], similarity.indptr[offset + 1])
+                columns, values = similarity.indices[row], similarity.data[row]
+                keep = (values > 0) & (columns != slot)  # a course is not its own neighbor
+                columns, values = columns[keep], values[keep]
+                if len(values) > k:
+                    top = np.argpartition(-values, k - 1)[:k]
+                    columns, values = columns[top], values[top]
+                order = np.lexsort((columns, -values))
+                neighbors[start + offset, :len(order)] = columns[order]
+                scores[start + offset, :len(order)] = values[order]
+        return neighbors, scores
+
+    def _popular(self) -> np.ndarray:
+        return np.argsort(-self._engagement, kind="stable")[:self.k]
+
+    def _build(self, course_ids: np.ndarray, texts: list[str], interactions: tuple[list, list, list]) -> SimilarityTable:
+        students, course_slots, weights = interactions
+        self._student_rows = {}
+        rows = self._rows_for(students)
+        shape = (len(self._student_rows), len(course_ids))
+        # Repeated (student, course) pairs are summed
+        self._interactions = sparse.csc_matrix(
+            (np.array(weights, dtype=np.float32), (rows, course_slots)), shape=shape
+        )
+        self._interaction_rows = self._interactions.tocsr()
+        self._delta = sparse.csc_matrix(shape, dtype=np.float32)
+        self._square_norms = np.asarray(self._interactions.multiply(self._interactions).sum(axis=0)).ravel()
+        self._engagement = np.asarray(self._interactions.sum(axis=0)).ravel()
+        self._content = tfidf_matrix(texts)
+        neighbors, scores = self._top_k(np.arange(len(course_ids)))
+        return SimilarityTable(course_ids, neighbors, scores, self._popular())
+
+    def _apply_enrollments(self, table: SimilarityTable, enrollments: list[tuple[int, int]]) -> SimilarityTable:
+        """Add new enrollments to the delta and recompute the rows of every course their students are in"""
+        rows = np.array(self._rows_for(student_id for student_id, _ in enrollments), dtype=np.int64)
+        slots = np.array([table.slots[course_id] for _, course_id in enrollments], dtype=np.int32)
+        weights = np.full(len(enrollments), ENROLLMENT_WEIGHT, dtype=np.float32)
+        shape = (len(self._student_rows), len(table.course_ids))
+        # New students only add empty rows, which resize in place without copying the data
+        self._interactions.resize(shape)
+        self._interaction_rows.resize(shape)
+        self._delta.resize(shape)
+        self._delta = (self._delta + sparse.csc_matrix((weights, (rows, slots)), shape=shape)).tocsc()
+
+        changed = np.unique(slots)
+        columns = self._columns(changed)
+        self._square_norms[changed] = np.asarray(columns.multiply(columns).sum(axis=0)).ravel()
+        self._engagement += np.bincount(slots, weights=weights, minlength=len(table.course_ids))
+
+        students = np.unique(rows)
+        affected = np.unique(np.concatenate((
+            self._interaction_rows[students].indices, self._delta.tocsr()[students].indices
+        ))).astype(np.int32)
+        neighbors, scores = table.neighbors.copy(), table.scores.copy()
+        neighbors[affected], scores[affected] = self._top_k(affected)
+        return SimilarityTable(table.course_ids, neighbors, scores, self._popular())
+
+    async def rebuild(self) -> None:
+        started = time.perf_counter()
+        course_ids, texts, interactions, last_enrollment_id = await self._load()
+        self.table = await asyncio.to_thread(self._build, course_ids, texts, interactions)
+        self._last_enrollment_id = last_enrollment_id
+        self.last_build_seconds = time.perf_counter() - started
+        self.rebuilds += 1
+        logger.info(
+            f"Recommendations built for {len(course_ids)} courses from {self._interactions.nnz} interactions "
+            f"in {self.last_build_seconds:.2f}s"
+        )
+
+    async def refresh(self) -> None:
+        """Fold enrollments made since the last pass into the table"""
+        table = self.table
+        async with read_session() as db:
+            res = await db.execute(
+                select(Enrollment.id, Enrollment.student_id, Enrollment.course_id)
+                .where(Enrollment.id > self._last_enrollment_id)
+                .order_by(Enrollment.id)
+            )
+            rows = res.all()
+        if not rows:
+            return
+        self._last_enrollment_id = rows[-1].id
+        enrollments = [(row.student_id, row.course_id) for row in rows if row.course_id in table.slots]
+        if enrollments:
+            self.table = await asyncio.to_thread(self._apply_enrollments, table, enrollments)
+        self.refreshes += 1
+
+    def similar(self, course_id: int, limit: int) -> list[tuple[int, float]]:
+        return self.table.similar(course_id, limit)
+
+    def recommend(self, course_ids: list[int], limit: int) -> tuple[str, list[tuple[int, float]]]:
+        """Courses for a student enrolled in ``course_ids``, falling back to the most popular ones"""
+        recommended = self.table.recommend(course_ids, limit)
+        if recommended:
+            return "similar_courses", recommended
+        enrolled = set(course_ids)
+        popular = [int(self.table.course_ids[slot]) for slot in self.table.popular]
+        return "popular", [(course_id, 0.0) for course_id in popular if course_id not in enrolled][:limit]
+
+    async def _run(self) -> None:
+        next_rebuild = 0.0
+        while True:
+            try:
+                if time.monotonic() >= next_rebuild:
+                    await self.rebuild()
+                    next_rebuild = time.monotonic() + self.rebuild_interval
+                else:
+                    await self.refresh()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Updating recommendations failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "courses": len(self.table.course_ids) if self.table else 0,
+            "interactions": self._interactions.nnz + self._delta.nnz,
+            "rebuilds": self.rebuilds,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_build_seconds": self.last_build_seconds,
+        }
+
+
+course_recommender = CourseRecommender(
+    neighbors=settings.RECOMMENDER_NEIGHBORS,
+    content_weight=settings.RECOMMENDER_CONTENT_WEIGHT,
+    refresh_interval=settings.RECOMMENDER_REFRESH_INTERVAL_SECONDS,
+    rebuild_interval=settings.RECOMMENDER_REBUILD_INTERVAL_SECONDS,
+)
@@ -0,0 +1,425 @@
+import asyncio
+import copy
+import logging
+import math
+import re
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import read_session
+from app.models.course import Course, Lesson
+
+logger = logging.getLogger(__name__)
+
+TOKEN = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was were will with".split()
+)
+
+# Field weights: a title hit counts three times a description hit
+TITLE_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+LESSON_TITLE_WEIGHT = 1.5
+LESSON_CONTENT_WEIGHT = 0.5
+
+# The last query token also matches longer terms it prefixes, at a discount. The
+# most common completions are tried first, until either cap is reached.
+PREFIX_MATCH_WEIGHT = 0.7
+MAX_PREFIX_EXPANSIONS = 50
+MAX_PREFIX_POSTINGS = 250_000
+
+COMPACT_MIN_TOMBSTONES = 1000
+
+LOAD_YIELD_PER = 1000
+
+# Overlap for the updated_at watermark, covering commits that land after their now()
+WATERMARK_OVERLAP = timedelta(seconds=60)
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    if not text:
+        return []
+    return [token for token in TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def weigh(text: Optional[str], weight: float, terms: Optional[Counter] = None) -> Counter:
+    """Add ``weight`` per occurrence of each token of ``text`` to ``terms``"""
+    terms = Counter() if terms is None else terms
+    for token in tokenize(text):
+        terms[token] += weight
+    return terms
+
+
+class SearchIndex:
+    """In-memory inverted index with BM25 ranking and prefix matching.
+
+    Documents occupy dense slots, and each posting list is a pair of numpy
+    arrays (slots, term frequencies), so a query is a few vectorised gathers
+    and scatters rather than a Python loop over postings. Updates append new
+    slots and tombstone the old ones; postings are compacted once tombstones
+    pile up. All query tokens must match (AND); the last one also matches
+    longer terms it prefixes, since that is the word still being typed.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._slots: dict[int, int] = {}
+        self._doc_ids = np.zeros(0, dtype=np.int64)
+        self._lengths = np.zeros(0, dtype=np.float32)
+        self._live = np.zeros(0, dtype=bool)
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._size = 0
+        self._postings: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._terms: list[str] = []
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._slots
+
+    def copy(self) -> "SearchIndex":
+        """A copy that can be updated while this one keeps serving queries.
+
+        Updates replace posting arrays rather than writing into them, so those
+        are shared; everything written in place is copied.
+        """
+        clone = copy.copy(self)
+        clone._slots = dict(self._slots)
+        clone._doc_ids = self._doc_ids.copy()
+        clone._lengths = self._lengths.copy()
+        clone._live = self._live.copy()
+        clone._postings = dict(self._postings)
+        clone._terms = list(self._terms)
+        return clone
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._doc_ids)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 1024)
+        for name in ("_doc_ids", "_lengths", "_live"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _tombstone(self, doc_id: int) -> None:
+        slot = self._slots.pop(doc_id, None)
+        if slot is not None:
+            self._live[slot] = False
+            self._total_length -= float(self._lengths[slot])
+
+    def update(self, docs: Iterable[tuple[int, Counter]] = (), removed: Iterable[int] = ()) -> None:
+        """Add or replace ``docs`` and drop ``removed``, rewriting each touched posting list once"""
+        for doc_id in removed:
+            self._tombstone(doc_id)
+
+        added_slots: dict[str, array] = {}
+        added_tfs: dict[str, array] = {}
+        docs = list(docs)
+        self._grow(self._size + len(docs))
+        for doc_id, terms in docs:
+            self._tombstone(doc_id)
+            slot = self._size
+            self._size += 1
+            self._slots[doc_id] = slot
+            self._doc_ids[slot] = doc_id
+            self._lengths[slot] = length = sum(terms.values())
+            self._live[slot] = True
+            self._total_length += length
+            for term, tf in terms.items():
+                if term not in added_slots:
+                    added_slots[term] = array("i")
+                    added_tfs[term] = array("f")
+                added_slots[term].append(slot)
+                added_tfs[term].append(tf)
+
+        new_terms = []
+        for term, slots in added_slots.items():
+            slots = np.frombuffer(slots, dtype=np.int32)
+            tfs = np.frombuffer(added_tfs[term], dtype=np.float32)
+            existing = self._postings.get(term)
+            if existing is None:
+                new_terms.append(term)
+                self._postings[term] = (slots, tfs)
+            else:
+                self._postings[term] = (np.concatenate((existing[0], slots)), np.concatenate((existing[1], tfs)))
+        if len(new_terms) > 100:
+            self._terms = sorted(self._postings)
+        else:
+            for term in new_terms:
+                insort(self._terms, term)
+
+        if self._size - len(self._slots) > max(COMPACT_MIN_TOMBSTONES, len(self._slots) // 4):
+            self._compact()
+        self._update_norms()
+
+    def _compact(self) -> None:
+        """Drop tombstoned slots and renumber the live ones densely"""
+        live = self._live[:self._size]
+        renumber = np.cumsum(live, dtype=np.int32) - 1
+        for term, (slots, tfs) in list(self._postings.items()):
+            keep = live[slots]
+            if keep.all():
+                self._postings[term] = (renumber[slots], tfs)
+            elif keep.any():
+                self._postings[term] = (renumber[slots[keep]], tfs[keep])
+            else:
+                del self._postings[term]
+        self._terms = sorted(self._postings)
+        self._doc_ids = self._doc_ids[:self._size][live]
+        self._lengths = self._lengths[:self._size][live]
+        self._size = len(self._doc_ids)
+        self._live = np.ones(self._size, dtype=bool)
+        self._slots = {int(doc_id): slot for slot, doc_id in enumerate(self._doc_ids)}
+
+    def _update_norms(self) -> None:
+        # The BM25 length normalisation per slot, refreshed as the average length moves
+        avg_length = self._total_length / len(self._slots) if self._slots else 1.0
+        lengths = self._lengths[:self._size]
+        self._norms = (self.k1 * (1 - self.b + self.b * lengths / avg_length)).astype(np.float32)
+
+    def _expand(self, token: str, prefix: bool) -> list[tuple[str, float]]:
+        expansions = [(token, 1.0)] if token in self._postings else []
+        if not prefix:
+            return expansions
+        start = bisect_left(self._terms, token)
+        completions = []
+        for term in self._terms[start:start + MAX_PREFIX_EXPANSIONS + 1]:
+            if not term.startswith(token):
+                break
+            if term != token:
+                completions.append(term)
+        budget = MAX_PREFIX_POSTINGS
+        for term in sorted(completions, key=lambda term: len(self._postings[term][0]), reverse=True):
+            postings = len(self._postings[term][0])
+            if expansions and postings > budget:
+                break
+            budget -= postings
+            expansions.append((term, PREFIX_MATCH_WEIGHT))
+        return expansions
+
+    def _token_scores(self, token: str, prefix: bool) -> Optional[np.ndarray]:
+        """BM25 score of ``token`` per slot, taking each slot's best expansion; None if nothing matches"""
+        expansions = self._expand(token, prefix)
+        if not expansions:
+            return None
+        count = len(self._slots)
+        scores = np.zeros(self._size, dtype=np.float32)
+        for term, weight in expansions:
+            slots, tfs = self._postings[term]
+            # Document frequency counts live documents only; postings keep tombstoned slots until compaction
+            df = int(np.count_nonzero(self._live[slots]))
+            idf = weight * math.log(1 + (count - df + 0.5) / (df + 0.5))
+            term_scores = tfs / (tfs + self._norms[slots])
+            term_scores *= idf * (self.k1 + 1)
+            if len(expansions) == 1:
+                scores[slots] = term_scores
+            else:
+                scores[slots] = np.maximum(scores[slots], term_scores)
+        return scores
+
+    def search(self, query: str, limit: int, offset: int = 0) -> tuple[int, list[tuple[int, float]]]:
+        """Return the number of matches and one page of ``(doc_id, score)``, best first"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or not self._slots:
+            return 0, []
+
+        scores = None
+        for position, token in enumerate(tokens):
+            token_scores = self._token_scores(token, prefix=position == len(tokens) - 1)
+            if token_scores is None:
+                return 0, []
+            if scores is None:
+                scores = token_scores
+            else:
+                # Scores are positive wherever a token matches, so zero marks a miss
+                scores = np.where((scores > 0) & (token_scores > 0), scores + token_scores, 0)
+        scores[~self._live[:self._size]] = 0
+
+        matched = np.flatnonzero(scores)
+        wanted = offset + limit
+        if len(matched) > wanted:
+            matched = matched[np.argpartition(-scores[matched], wanted - 1)[:wanted]]
+        doc_ids = self._doc_ids[matched]
+        # Ties go to the newest course
+        order = np.lexsort((-doc_ids, -scores[matched]))[offset:wanted]
+        return int(np.count_nonzero(scores)), [
+            (int(doc_ids[i]), float(scores[matched[i]])) for i in order
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "documents": len(self._slots),
+            "terms": len(self._postings),
+            "tombstones": self._size - len(self._slots),
+        }
+
+
+def course_terms(title: str, description: Optional[str]) -> Counter:
+    terms = weigh(title, TITLE_WEIGHT)
+    return weigh(description, DESCRIPTION_WEIGHT, terms)
+
+
+def add_lesson_terms(terms: Counter, title: str, content: Optional[str]) -> None:
+    weigh(title, LESSON_TITLE_WEIGHT, terms)
+    weigh(content, LESSON_CONTENT_WEIGHT, terms)
+
+
+class CourseSearch:
+    """Keeps a ``SearchIndex`` of published courses (and their lessons) in sync with the database.
+
+    The index is built in a worker thread at startup, so search answers 503
+    until it is ready and the event loop keeps serving meanwhile. Publishing
+    through this worker updates it immediately, also off the loop. Every ``refresh_interval`` it also re-indexes courses and
+    lessons created or updated since the last pass, which picks up writes
+    made by other workers.
+    """
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self.index = SearchIndex()
+        self.ready = False
+        self.watermark: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()  # one index update at a time, so none is lost in a swap
+        self.queries = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    async def _load_rows(self, db, course_ids: Optional[list[int]] = None) -> tuple[list[tuple], list[tuple]]:
+        """Course and lesson text to index; all courses for ``course_ids``, else only published ones"""
+        stmt = select(Course.id, Course.title, Course.description, Course.is_published)
+        if course_ids is not None:
+            stmt = stmt.where(Course.id.in_(course_ids))
+        else:
+            stmt = stmt.where(Course.is_published)
+        result = await db.stream(stmt.execution_options(yield_per=LOAD_YIELD_PER))
+        courses = [tuple(row) async for row in result]
+
+        lessons = select(Lesson.course_id, Lesson.title, Lesson.content)
+        if course_ids is not None:
+            lessons = lessons.where(Lesson.course_id.in_(course_ids))
+        else:
+            lessons = lessons.join(Course, Course.id == Lesson.course_id).where(Course.is_published)
+        result = await db.stream(lessons.execution_options(yield_per=LOAD_YIELD_PER))
+        return courses, [tuple(row) async for row in result]
+
+    @staticmethod
+    def _documents(courses: list[tuple], lessons: list[tuple]) -> tuple[dict[int, Counter], set[int]]:
+        """Terms of each published course; also returns the ids of the unpublished ones"""
+        docs = {id: course_terms(title, description) for id, title, description, published in courses if published}
+        for course_id, title, content in lessons:
+            terms = docs.get(course_id)
+            if terms is not None:
+                add_lesson_terms(terms, title, content)
+        return docs, {id for id, *_, published in courses if not published}
+
+    @classmethod
+    def _build(cls, courses: list[tuple], lessons: list[tuple]) -> SearchIndex:
+        docs, _ = cls._documents(courses, lessons)
+        index = SearchIndex()
+        index.update(docs.items())
+        return index
+
+    @classmethod
+    def _apply(cls, index: SearchIndex, batches: list[tuple[list[int], list[tuple], list[tuple]]]) -> SearchIndex:
+        index = index.copy()
+        for course_ids, courses, lessons in batches:
+            docs, unpublished = cls._documents(courses, lessons)
+            missing = set(course_ids) - docs.keys() - unpublished
+            index.update(docs.items(), removed=unpublished | missing)
+        return index
+
+    async def rebuild(self) -> None:
+        """Build a fresh index in a worker thread and swap it in; tokenizing a large catalog takes seconds"""
+        started_at = datetime.now(timezone.utc)
+        async with read_session() as db:
+            courses, lessons = await self._load_rows(db)
+        index = await asyncio.to_thread(self._build, courses, lessons)
+        self.index, self.watermark, self.ready = index, started_at, True
+        logger.info(f"Search index built with {len(index)} courses in {datetime.now(timezone.utc) - started_at}")
+
+    async def refresh_courses(self, db, course_ids: list[int]) -> None:
+        """Re-index ``course_ids`` on a copy of the index, updated in a worker thread, then swap it in.
+
+        Until the first build finishes there is nothing to update; the
+        watermark refresh after it picks these courses up.
+        """
+        if not self.ready:
+            return
+        async with self._lock:
+            batches = []
+            for start in range(0, len(course_ids), 1000):
+                chunk = course_ids[start:start + 1000]
+                batches.append((chunk, *await self._load_rows(db, chunk)))
+            self.index = await asyncio.to_thread(self._apply, self.index, batches)
+
+    async def refresh_changed(self) -> None:
+        """Re-index courses changed since the watermark; lesson writes bump their course's updated_at"""
+        if self.watermark is None:
+            return
+        started_at = datetime.now(timezone.utc)
+        since = self.watermark - WATERMARK_OVERLAP
+        async with read_session() as db:
+            res = await db.execute(select(Course.id).where(Course.updated_at > since))
+            changed = list(res.scalars().all())
+            if changed:
+                await self.refresh_courses(db, changed)
+        self.watermark = started_at
+        self.refreshes += 1
+
+    def search(self, query: str, limit: int, offset: int) -> tuple[int, list[tuple[int, float]]]:
+        self.queries += 1
+        return self.index.search(query, limit, offset)
+
+    async def _run(self) -> None:
+        while not self.ready:
+            try:
+                await self.rebuild()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Building the search index failed, retrying: {e}")
+                await asyncio.sleep(self.refresh_interval)
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh_changed()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Search index refresh failed: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            **self.index.stats(),
+            "ready": self.ready,
+            "queries": self.queries,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+
+course_search = CourseSearch(refresh_interval=settings.SEARCH_REFRESH_INTERVAL_SECONDS)
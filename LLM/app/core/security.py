@@ -1,21 +1,95 @@
-from datetime import datetime, timedelta
-from typing import Any, Union
-from jose import jwt  # ✅ correct
+import asyncio
+import json
+import logging
+import os
+import secrets
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional, Union
+from jose import jwk, jws, jwt  # ✅ correct
+from jose.exceptions import ExpiredSignatureError, JWSError, JWTError
 
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from passlib.hash import bcrypt
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+BCRYPT_ROUNDS = 12
+
+# Hashes below the normal cost (cheap imported ones) are flagged by needs_update and upgraded at login
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__default_rounds=BCRYPT_ROUNDS, bcrypt__min_rounds=BCRYPT_ROUNDS
+)
+
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
+
+
+class TokenCodec:
+    """Signs and verifies JWTs with a key object constructed once.
+
+    ``decode`` checks the signature and ``exp`` only, the two claims every
+    token here carries, instead of ``jwt.decode``'s full claim validation
+    and per-call key parsing.
+    """
+
+    def __init__(self, secret_key: str, algorithm: str):
+        self.algorithm = algorithm
+        self._algorithms = [algorithm]
+        self._key = jwk.construct(secret_key, algorithm)
+
+    def encode(self, claims: dict) -> str:
+        return jwt.encode(claims, self._key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        """Return the claims of a validly signed, unexpired token; raise ``JWTError`` otherwise"""
+        try:
+            claims = json.loads(jws.verify(token, self._key, self._algorithms))
+        except JWSError as e:
+            raise JWTError(e)
+        except ValueError:
+            raise JWTError("Invalid payload")
+        if not isinstance(claims, dict):
+            raise JWTError("Invalid payload")
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)):
+            raise JWTError("Missing expiration")
+        if exp < time.time():
+            raise ExpiredSignatureError("Signature has expired")
+        return claims
+
+
+token_codec = TokenCodec(settings.SECRET_KEY, settings.ALGORITHM)
+
 
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    to_encode = {"exp": expire, "sub": str(subject), "type": ACCESS_TOKEN}
+    return token_codec.encode(to_encode)
+
+def create_refresh_token(subject: Union[str, Any], credential_version: int, family: Optional[str] = None) -> str:
+    """Refresh token with a unique ``jti``; ``fam`` ties every rotation back to the original login.
+
+    ``cv`` is the user's credential version; changing the password bumps it,
+    which retires every refresh token issued before.
+    """
+    jti = secrets.token_urlsafe(16)
+    to_encode = {
+        "exp": datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        "sub": str(subject),
+        "type": REFRESH_TOKEN,
+        "jti": jti,
+        "fam": family or jti,
+        "cv": credential_version,
+    }
+    return token_codec.encode(to_encode)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -23,3 +97,132 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def hash_password_chunk(passwords: list[str], rounds: int) -> list[str]:
+    handler = bcrypt.using(rounds=rounds)
+    return [handler.hash(password) for password in passwords]
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    return pwd_context.needs_update(hashed_password)
+
+
+class PasswordHasher:
+    """Runs bcrypt in a bounded worker pool so it never blocks the event loop.
+
+    When more than ``max_pending`` operations are queued the call fails fast
+    with a 503 instead of piling up behind the pool. Bulk imports hash in a
+    separate process pool of ``bulk_workers``, so they use every core they
+    are given without queueing logins behind them.
+    """
+
+    def __init__(self, executor_kind: str, workers: int, max_pending: int, bulk_workers: int, bulk_rounds: int):
+        self.executor_kind = executor_kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.bulk_workers = bulk_workers
+        self.bulk_rounds = bulk_rounds
+        self._executor: Executor | None = None
+        self._bulk_executor: Executor | None = None
+        self._bulk_hashed = 0
+        self._pending = 0
+        self._peak_pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hasher"
+                )
+            logger.info(f"Password hasher started with {self.workers} {self.executor_kind} workers")
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            logger.warning(f"Password hasher saturated ({self._pending} pending), rejecting request")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        self._pending += 1
+        self._peak_pending = max(self._peak_pending, self._pending)
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._pending -= 1
+            self._completed += 1
+            self._busy_seconds += time.perf_counter() - started
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return password_needs_rehash(hashed_password)
+
+    def _get_bulk_executor(self) -> Executor:
+        if self._bulk_executor is None:
+            self._bulk_executor = ProcessPoolExecutor(max_workers=self.bulk_workers)
+            logger.info(f"Bulk password hasher started with {self.bulk_workers} processes")
+        return self._bulk_executor
+
+    async def hash_many(self, passwords: list[str], chunk_size: int = 16) -> list[str]:
+        """Hash a batch for bulk imports at ``bulk_rounds``.
+
+        Runs in the bulk process pool and bypasses the ``max_pending``
+        admission check. The cheaper hashes are replaced at full cost the
+        first time each user logs in.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_bulk_executor()
+
+        async def run_chunk(chunk: list[str]) -> list[str]:
+            hashed = await loop.run_in_executor(executor, hash_password_chunk, chunk, self.bulk_rounds)
+            self._bulk_hashed += len(chunk)
+            return hashed
+
+        chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+        results = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+        return [hashed for chunk in results for hashed in chunk]
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "bulk_workers": self.bulk_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "peak_pending": self._peak_pending,
+            "saturation": self._pending / self.max_pending if self.max_pending else 0.0,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "busy_seconds": round(self._busy_seconds, 3),
+            "bulk_hashed": self._bulk_hashed,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._bulk_executor is not None:
+            self._bulk_executor.shutdown(wait=True)
+            self._bulk_executor = None
+
+
+password_hasher = PasswordHasher(
+    executor_kind=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    bulk_workers=settings.IMPORT_HASH_WORKERS or max((os.cpu_count() or 2) - 1, 1),
+    bulk_rounds=settings.IMPORT_HASH_ROUNDS,
+)
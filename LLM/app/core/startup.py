@@ -0,0 +1,63 @@
+import os
+import time
+from typing import Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class StartupTimer:
+    """Measures worker boot: import of the app, end of lifespan startup and
+    the first HTTP request served.
+
+    Times are relative to ``started_at``, taken when this module is imported
+    (the first thing ``app.main`` does).
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.pid = os.getpid()
+        self.ready_seconds: Optional[float] = None
+        self.first_request_seconds: Optional[float] = None
+        self.schema_check_seconds: Optional[float] = None
+        self.schema_revision: Optional[str] = None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def mark_ready(self) -> None:
+        self.ready_seconds = self.elapsed()
+
+    def mark_first_request(self) -> None:
+        if self.first_request_seconds is None:
+            self.first_request_seconds = self.elapsed()
+
+    def stats(self) -> dict:
+        return {
+            "pid": self.pid,
+            "schema_revision": self.schema_revision,
+            "schema_check_seconds": self.schema_check_seconds,
+            "ready_seconds": self.ready_seconds,
+            "first_request_seconds": self.first_request_seconds,
+        }
+
+
+startup_timer = StartupTimer()
+
+
+class FirstRequestTimerMiddleware:
+    """Records when the first HTTP response of this worker finished; a no-op afterwards"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or startup_timer.first_request_seconds is not None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message) -> None:
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                startup_timer.mark_first_request()
+
+        await self.app(scope, receive, send_wrapper)
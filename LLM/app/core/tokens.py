@@ -0,0 +1,152 @@
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationBackend(ABC):
+    """Set of revoked token ids, each kept only until the token would have expired anyway"""
+
+    @abstractmethod
+    async def add(self, token_id: str, expires_at: float) -> bool:
+        """Revoke ``token_id`` until ``expires_at`` (epoch seconds); False if it was already revoked"""
+
+    @abstractmethod
+    async def contains(self, *token_ids: str) -> bool:
+        """True if any of ``token_ids`` is revoked"""
+
+    def size(self) -> int | None:
+        return None
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryRevocationBackend(RevocationBackend):
+    """Per-process set; with several workers use Redis so a revocation is seen everywhere.
+
+    Entries can't be evicted early without un-revoking a token, so expired
+    ones are swept whenever the set has doubled since the last sweep.
+    """
+
+    def __init__(self):
+        self._expires: dict[str, float] = {}
+        self._sweep_at = 1024
+
+    def _sweep(self) -> None:
+        now = time.time()
+        self._expires = {token_id: at for token_id, at in self._expires.items() if at > now}
+        self._sweep_at = max(1024, 2 * len(self._expires))
+
+    async def add(self, token_id: str, expires_at: float) -> bool:
+        if self._expires.get(token_id, 0) > time.time():
+            return False
+        self._expires[token_id] = expires_at
+        if len(self._expires) >= self._sweep_at:
+            self._sweep()
+        return True
+
+    async def contains(self, *token_ids: str) -> bool:
+        now = time.time()
+        return any(self._expires.get(token_id, 0) > now for token_id in token_ids)
+
+    def size(self) -> int | None:
+        return len(self._expires)
+
+
+class RedisRevocationBackend(RevocationBackend):
+    """Shared by every worker; Redis expires each entry with its token"""
+
+    def __init__(self, url: str, prefix: str = "lms:revoked:"):
+        from redis import asyncio as redis
+
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+
+    async def add(self, token_id: str, expires_at: float) -> bool:
+        ttl = max(1, math.ceil(expires_at - time.time()))
+        return bool(await self._redis.set(f"{self.prefix}{token_id}", 1, ex=ttl, nx=True))
+
+    async def contains(self, *token_ids: str) -> bool:
+        return await self._redis.exists(*(f"{self.prefix}{token_id}" for token_id in token_ids)) > 0
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+class TokenRevocationList:
+    """Refresh-token rotation state: used token ids and revoked login families.
+
+    A refresh token is single use: rotating it revokes its ``jti``. Presenting
+    a used one again means it leaked, so its whole family, every token
+    descended from the same login, is revoked too.
+    """
+
+    def __init__(self, backend: RevocationBackend, family_lifetime: float, enabled: bool = True):
+        self.backend = backend
+        self.family_lifetime = family_lifetime
+        self.enabled = enabled
+        self.rotations = 0
+        self.reuse_detected = 0
+        self.families_revoked = 0
+
+    async def rotate(self, claims: dict) -> bool:
+        """Mark a refresh token used; False if its family is revoked or it was used before"""
+        if await self.backend.contains(f"fam:{claims['fam']}"):
+            return False
+        if await self.backend.add(claims["jti"], claims["exp"]):
+            self.rotations += 1
+            return True
+        self.reuse_detected += 1
+        logger.warning(f"Refresh token reuse detected for {claims['sub']}, revoking its sessions")
+        await self.revoke_family(claims["fam"])
+        return False
+
+    async def revoke_family(self, family: str) -> None:
+        # A family outlives any single token, but no token in it outlives the newest one
+        await self.backend.add(f"fam:{family}", time.time() + self.family_lifetime)
+        self.families_revoked += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "revoked": self.backend.size(),
+            "rotations": self.rotations,
+            "reuse_detected": self.reuse_detected,
+            "families_revoked": self.families_revoked,
+        }
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def create_revocation_backend() -> RevocationBackend:
+    if settings.TOKEN_REVOCATION_BACKEND == "redis":
+        logger.info("Using Redis token revocation backend")
+        return RedisRevocationBackend(settings.REDIS_URL)
+    return MemoryRevocationBackend()
+
+
+def refresh_tokens_enabled() -> bool:
+    """Rotation and logout need one shared revocation set; per-worker memory only works with one worker"""
+    if settings.TOKEN_REVOCATION_BACKEND == "redis":
+        return True
+    if settings.WEB_CONCURRENCY > 1:
+        logger.warning(
+            f"Refresh tokens disabled: {settings.WEB_CONCURRENCY} workers need TOKEN_REVOCATION_BACKEND=redis"
+        )
+        return False
+    logger.warning("Token revocations are kept in memory and lost on restart; use Redis in production")
+    return True
+
+
+revoked_tokens = TokenRevocationList(
+    create_revocation_backend(),
+    family_lifetime=settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400,
+    enabled=refresh_tokens_enabled(),
+)
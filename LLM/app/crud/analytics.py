@@ -0,0 +1,284 @@
+from collections import Counter, defaultdict
+from operator import itemgetter
+from typing import Optional, Sequence
+
+from sqlalchemy import case, delete, func, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.analytics import (
+    CourseProgressRollup,
+    LessonCompletionHistogram,
+    LessonProgressRollup,
+    StudentCourseProgress,
+)
+from app.models.course import Course, Lesson, Progress
+
+HISTOGRAM_BUCKET_WIDTH = 10
+HISTOGRAM_BUCKETS = 100 // HISTOGRAM_BUCKET_WIDTH + 1  # the last bucket is exactly 100%
+
+# Key for pg_try_advisory_xact_lock, so only one worker rebuilds at a time
+REBUILD_LOCK_ID = 0x4C4D53_0021
+
+LESSON_COUNTERS = ("learners", "completed", "completion_sum", "time_spent_minutes")
+STUDENT_COURSE_COUNTERS = ("lessons_started", "lessons_completed", "time_spent_minutes")
+COURSE_COUNTERS = ("learners", "completed_learners", "time_spent_minutes")
+
+
+def completion_bucket(percentage: int) -> int:
+    return min(percentage, 100) // HISTOGRAM_BUCKET_WIDTH
+
+
+def _ratio(part: int, whole: int) -> Optional[float]:
+    return round(part / whole, 4) if whole else None
+
+
+class AnalyticsCRUD:
+
+    async def lock_progress(self, db: AsyncSession, keys: list[tuple[int, int]]) -> dict[tuple[int, int], tuple[int, bool]]:
+        """Lock existing progress rows and return their ``(completion_percentage, completed)`` before an upsert.
+
+        Rows that don't exist yet can't be locked; ``upsert_many`` retries
+        a chunk whose upsert finds one of them inserted in the meantime.
+        """
+        res = await db.execute(
+            select(Progress.student_id, Progress.lesson_id, Progress.completion_percentage, Progress.completed)
+            .where(tuple_(Progress.student_id, Progress.lesson_id).in_(keys))
+            .order_by(Progress.student_id, Progress.lesson_id)
+            .with_for_update()
+        )
+        return {(row.student_id, row.lesson_id): (row.completion_percentage, row.completed) for row in res}
+
+    async def _add(
+        self, db: AsyncSession, model, keys: tuple[str, ...], counters: tuple[str, ...], rows: list[dict], returning=()
+    ):
+        """Add each row's counters onto the stored ones, inserting missing rows.
+
+        Rows go in key order so concurrent flushes lock rollup rows in the
+        same order and can't deadlock.
+        """
+        stmt = insert(model).values(sorted(rows, key=itemgetter(*keys)))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: getattr(model, name) + stmt.excluded[name] for name in counters},
+        )
+        if returning:
+            stmt = stmt.returning(*returning)
+        return await db.execute(stmt)
+
+    async def apply_progress(
+        self,
+        db: AsyncSession,
+        before: dict[tuple[int, int], tuple[int, bool]],
+        after: Sequence,
+        minutes: dict[tuple[int, int], int],
+        lesson_courses: dict[int, int],
+    ) -> None:
+        """Fold one chunk of progress upserts into the rollups, in the upsert's transaction.
+
+        ``before`` is what ``lock_progress`` saw, ``after`` the rows the
+        upsert returned and ``minutes`` the time each row added.
+        """
+        lessons: dict[int, Counter] = defaultdict(Counter)
+        buckets: Counter = Counter()
+        student_courses: dict[tuple[int, int], Counter] = defaultdict(Counter)
+
+        for row in after:
+            key = (row.student_id, row.lesson_id)
+            course_id = lesson_courses[row.lesson_id]
+            old_percentage, old_completed = before.get(key, (None, False))
+            lesson = lessons[row.lesson_id]
+            student_course = student_courses[(row.student_id, course_id)]
+            newly_completed = int(row.completed) - int(old_completed)
+
+            if old_percentage is None:
+                lesson["learners"] += 1
+                student_course["lessons_started"] += 1
+                buckets[(row.lesson_id, completion_bucket(row.completion_percentage))] += 1
+            elif completion_bucket(old_percentage) != completion_bucket(row.completion_percentage):
+                buckets[(row.lesson_id, completion_bucket(old_percentage))] -= 1
+                buckets[(row.lesson_id, completion_bucket(row.completion_percentage))] += 1
+            lesson["completed"] += newly_completed
+            lesson["completion_sum"] += row.completion_percentage - (old_percentage or 0)
+            lesson["time_spent_minutes"] += minutes[key]
+            student_course["lessons_completed"] += newly_completed
+            student_course["time_spent_minutes"] += minutes[key]
+
+        lesson_rows = [
+            {"lesson_id": lesson_id, "course_id": lesson_courses[lesson_id], **{name: delta[name] for name in LESSON_COUNTERS}}
+            for lesson_id, delta in lessons.items() if any(delta.values())
+        ]
+        if lesson_rows:
+            await self._add(db, LessonProgressRollup, ("lesson_id",), LESSON_COUNTERS, lesson_rows)
+        bucket_rows = [
+            {"lesson_id": lesson_id, "bucket": bucket, "learners": delta}
+            for (lesson_id, bucket), delta in buckets.items() if delta
+        ]
+        if bucket_rows:
+            await self._add(db, LessonCompletionHistogram, ("lesson_id", "bucket"), ("learners",), bucket_rows)
+
+        student_course_rows = [
+            {"student_id": student_id, "course_id": course_id, **{name: delta[name] for name in STUDENT_COURSE_COUNTERS}}
+            for (student_id, course_id), delta in student_courses.items() if any(delta.values())
+        ]
+        if not student_course_rows:
+            return
+        res = await self._add(
+            db, StudentCourseProgress, ("student_id", "course_id"), STUDENT_COURSE_COUNTERS, student_course_rows,
+            returning=(StudentCourseProgress.student_id, StudentCourseProgress.course_id,
+                       StudentCourseProgress.lessons_started, StudentCourseProgress.lessons_completed),
+        )
+        totals = res.all()
+
+        res = await db.execute(
+            select(Lesson.course_id, func.count())
+            .where(Lesson.course_id.in_({row.course_id for row in totals}))
+            .group_by(Lesson.course_id)
+        )
+        lesson_counts = dict(res.all())
+
+        courses: dict[int, Counter] = defaultdict(Counter)
+        for row in totals:
+            delta = student_courses[(row.student_id, row.course_id)]
+            course = courses[row.course_id]
+            # The totals include this chunk, so subtracting it gives the state before
+            if delta["lessons_started"] and row.lessons_started == delta["lessons_started"]:
+                course["learners"] += 1
+            required = lesson_counts.get(row.course_id, 0)
+            if required and row.lessons_completed >= required > row.lessons_completed - delta["lessons_completed"]:
+                course["completed_learners"] += 1
+            course["time_spent_minutes"] += delta["time_spent_minutes"]
+
+        course_rows = [
+            {"course_id": course_id, **{name: delta[name] for name in COURSE_COUNTERS}}
+            for course_id, delta in courses.items() if any(delta.values())
+        ]
+        if course_rows:
+            await self._add(db, CourseProgressRollup, ("course_id",), COURSE_COUNTERS, course_rows)
+
+    async def rebuild(self, db: AsyncSession) -> bool:
+        """Recompute every rollup from the progress table; False if another worker holds the rebuild lock.
+
+        Progress writes wait on the SHARE lock until the commit, so the
+        incremental updates that follow land on top of a consistent rebuild.
+        """
+        locked = (await db.execute(select(func.pg_try_advisory_xact_lock(REBUILD_LOCK_ID)))).scalar()
+        if not locked:
+            await db.rollback()
+            return False
+        await db.execute(text("LOCK TABLE progress IN SHARE MODE"))
+
+        for model in (LessonProgressRollup, LessonCompletionHistogram, StudentCourseProgress, CourseProgressRollup):
+            await db.execute(delete(model))
+
+        completed = case((Progress.completed, 1), else_=0)
+        await db.execute(insert(LessonProgressRollup).from_select(
+            ["lesson_id", "course_id", *LESSON_COUNTERS],
+            select(
+                Lesson.id, Lesson.course_id, func.count(), func.sum(completed),
+                func.sum(Progress.completion_percentage), func.sum(Progress.time_spent_minutes),
+            ).join(Progress, Progress.lesson_id == Lesson.id).group_by(Lesson.id, Lesson.course_id),
+        ))
+        bucket = Progress.completion_percentage // HISTOGRAM_BUCKET_WIDTH
+        await db.execute(insert(LessonCompletionHistogram).from_select(
+            ["lesson_id", "bucket", "learners"],
+            select(Progress.lesson_id, bucket, func.count()).group_by(Progress.lesson_id, bucket),
+        ))
+        await db.execute(insert(StudentCourseProgress).from_select(
+            ["student_id", "course_id", *STUDENT_COURSE_COUNTERS],
+            select(
+                Progress.student_id, Lesson.course_id, func.count(), func.sum(completed),
+                func.sum(Progress.time_spent_minutes),
+            ).join(Lesson, Lesson.id == Progress.lesson_id).group_by(Progress.student_id, Lesson.course_id),
+        ))
+        lesson_counts = (
+            select(Lesson.course_id, func.count().label("lessons")).group_by(Lesson.course_id).subquery()
+        )
+        await db.execute(insert(CourseProgressRollup).from_select(
+            ["course_id", *COURSE_COUNTERS],
+            select(
+                StudentCourseProgress.course_id,
+                func.count(),
+                func.sum(case((StudentCourseProgress.lessons_completed >= lesson_counts.c.lessons, 1), else_=0)),
+                func.sum(StudentCourseProgress.time_spent_minutes),
+            )
+            .join(lesson_counts, lesson_counts.c.course_id == StudentCourseProgress.course_id)
+            .group_by(StudentCourseProgress.course_id),
+        ))
+        await db.commit()
+        return True
+
+    async def list_courses(self, db: AsyncSession, limit: int, offset: int) -> list[dict]:
+        """Course rollups with the most learners first"""
+        res = await db.execute(
+            select(CourseProgressRollup, Course.title)
+            .join(Course, Course.id == CourseProgressRollup.course_id)
+            .order_by(CourseProgressRollup.learners.desc(), CourseProgressRollup.course_id)
+            .limit(limit)
+            .offset(offset)
+        )
+        return [self._course_summary(rollup, title) for rollup, title in res.all()]
+
+    def _course_summary(self, rollup: Optional[CourseProgressRollup], title: str) -> dict:
+        learners = rollup.learners if rollup else 0
+        completed = rollup.completed_learners if rollup else 0
+        minutes = rollup.time_spent_minutes if rollup else 0
+        return {
+            "course_id": rollup.course_id if rollup else None,
+            "title": title,
+            "learners": learners,
+            "completed_learners": completed,
+            "completion_rate": _ratio(completed, learners),
+            "avg_time_spent_minutes": _ratio(minutes, learners),
+        }
+
+    async def course_report(self, db: AsyncSession, course_id: int) -> Optional[dict]:
+        """Course totals plus per-lesson completion, time, drop-off and histogram, in lesson order"""
+        res = await db.execute(
+            select(Course.title, CourseProgressRollup)
+            .outerjoin(CourseProgressRollup, CourseProgressRollup.course_id == Course.id)
+            .where(Course.id == course_id)
+        )
+        row = res.one_or_none()
+        if row is None:
+            return None
+        report = {**self._course_summary(row[1], row[0]), "course_id": course_id}
+
+        res = await db.execute(
+            select(Lesson.id, Lesson.title, Lesson.order_index, LessonProgressRollup)
+            .outerjoin(LessonProgressRollup, LessonProgressRollup.lesson_id == Lesson.id)
+            .where(Lesson.course_id == course_id)
+            .order_by(Lesson.order_index, Lesson.id)
+        )
+        lessons = res.all()
+        res = await db.execute(
+            select(LessonCompletionHistogram)
+            .where(LessonCompletionHistogram.lesson_id.in_([lesson.id for lesson in lessons]))
+        )
+        histograms: dict[int, list[int]] = defaultdict(lambda: [0] * HISTOGRAM_BUCKETS)
+        for bucket in res.scalars():
+            histograms[bucket.lesson_id][bucket.bucket] = bucket.learners
+
+        report["lessons"] = []
+        first = previous = None
+        for lesson_id, title, order_index, rollup in lessons:
+            learners = rollup.learners if rollup else 0
+            first = learners if first is None else first
+            report["lessons"].append({
+                "lesson_id": lesson_id,
+                "title": title,
+                "order_index": order_index,
+                "learners": learners,
+                "completed": rollup.completed if rollup else 0,
+                "completion_rate": _ratio(rollup.completed if rollup else 0, learners),
+                "avg_completion_percentage": _ratio(rollup.completion_sum if rollup else 0, learners),
+                "avg_time_spent_minutes": _ratio(rollup.time_spent_minutes if rollup else 0, learners),
+                "retention": _ratio(learners, first),  # share of the first lesson's learners
+                "drop_off": None if previous is None else _ratio(previous - learners, previous),
+                "completion_histogram": histograms[lesson_id],
+            })
+            previous = learners
+        return report
+
+
+analytics_crud = AnalyticsCRUD()
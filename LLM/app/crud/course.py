@@ -1,9 +1,64 @@
+import base64
+import hashlib
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import NamedTuple, Optional, Sequence
 
-from sqlalchemy import select, update
+from fastapi import HTTPException, status
+from pydantic import TypeAdapter
+from sqlalchemy import DateTime, literal, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import cache, cached
+from app.core.events import COURSE_PUBLISHED, ENROLLMENT_CREATED
+from app.core.search import course_search
+from app.crud.outbox import outbox_crud
 from app.models.course import Course, Enrollment, Content
-from app.schemas.course import CourseCreate, CoursePublish, ContentSchema
+from app.schemas.course import CourseCreate, CoursePublish, ContentSchema, CourseRead, DEFAULT_PAGE_SIZE
+
+CATALOG_CACHE_KEY = "catalog:published:{cursor}"
+CATALOG_CACHE_TAG = "catalog"
+
+COURSE_FIELDS = tuple(CourseRead.model_fields)
+
+ENROLLMENT_ACCESS_PERIOD = timedelta(days=30)
+
+course_list_adapter = TypeAdapter(list[CourseRead])
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    raw = f"{created_at.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def parse_fields(fields: Optional[str]) -> tuple[str, ...]:
+    """Turn a ``fields=title,price`` projection into column names, always including id"""
+    if not fields:
+        return COURSE_FIELDS
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = set(requested) - set(COURSE_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+    return tuple(dict.fromkeys(("id", *requested)))
+
+
+class CatalogSnapshot(NamedTuple):
+    body: str
+    etag: str
+    count: int
 
 
 class CourseCRUD:
@@ -12,14 +67,105 @@ class CourseCRUD:
         res= await db.execute(select(Course).where(Course.is_published==True))
         return res
     
+    async def get_published_catalog(self, db: AsyncSession, cursor: Optional[str] = None) -> CatalogSnapshot:
+        """Return one pre-serialized page of the published catalog, building it on a cache miss.
+
+        Every default-size page is cached under its cursor and dropped together
+        with the others when the catalog changes.
+        """
+        if cursor:
+            # One key per position, however the client padded the cursor
+            cursor = encode_cursor(*decode_cursor(cursor))
+        snapshot = await cache.get_or_compute(
+            CATALOG_CACHE_KEY.format(cursor=cursor or "first"),
+            lambda: self._build_catalog_snapshot(db, cursor),
+            tags=(CATALOG_CACHE_TAG,),
+        )
+        return CatalogSnapshot(**snapshot)
+
+    async def _build_catalog_snapshot(self, db: AsyncSession, cursor: Optional[str]) -> dict:
+        rows, next_cursor = await self.list_courses(db, cursor=cursor, published=True)
+        courses = course_list_adapter.validate_python(rows)
+        body = (
+            b'{"courses:":' + course_list_adapter.dump_json(courses)
+            + b',"next_cursor":' + TypeAdapter(Optional[str]).dump_json(next_cursor) + b'}'
+        )
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        return CatalogSnapshot(body=body.decode(), etag=etag, count=len(courses))._asdict()
+
+    async def refresh_catalog(self, db: AsyncSession) -> None:
+        await cache.invalidate_tags(CATALOG_CACHE_TAG)
+        await self.get_published_catalog(db)
+
     async def get_courses_from_db(self,db:AsyncSession):
         res= await db.execute(select(Course))
         return res
 
     async def get_course_from_db_by_id(self,id:int,db:AsyncSession):
-        res= await db.execute(select(Course).where(Course.is_published==True and Course.id==id))
+        res= await db.execute(select(Course).where(Course.is_published==True, Course.id==id))
         return res
+
+    async def list_courses(
+        self,
+        db: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        published: Optional[bool] = None,
+        teacher_id: Optional[int] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        fields: Sequence[str] = COURSE_FIELDS,
+    ) -> tuple[list[dict], Optional[str]]:
+        """Keyset-paginated course listing ordered by (created_at, id) descending"""
+        columns = dict.fromkeys(("id", "created_at", *fields))
+        query = select(*(getattr(Course, name) for name in columns))
+
+        if published is not None:
+            query = query.where(Course.is_published == published)
+        if teacher_id is not None:
+            query = query.where(Course.teacher_id == teacher_id)
+        if min_price is not None:
+            query = query.where(Course.price >= min_price)
+        if max_price is not None:
+            query = query.where(Course.price <= max_price)
+        if cursor:
+            created_at, id = decode_cursor(cursor)
+            query = query.where(tuple_(Course.created_at, Course.id) < (created_at, id))
+
+        query = query.order_by(Course.created_at.desc(), Course.id.desc()).limit(limit + 1)
+        rows = (await db.execute(query)).mappings().all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+        return [{name: row[name] for name in fields} for row in rows], next_cursor
+
+    async def get_course(
+        self, db: AsyncSession, id: int, published: Optional[bool] = None, fields: Sequence[str] = COURSE_FIELDS
+    ) -> Optional[dict]:
+        query = select(*(getattr(Course, name) for name in fields)).where(Course.id == id)
+        if published is not None:
+            query = query.where(Course.is_published == published)
+        row = (await db.execute(query)).mappings().one_or_none()
+        return dict(row) if row else None
+
+    async def get_courses_by_ids(
+        self, db: AsyncSession, ids: Sequence[int], fields: Sequence[str] = COURSE_FIELDS
+    ) -> list[dict]:
+        """Published courses in the order of ``ids``; ids that are gone or unpublished are skipped"""
+        if not ids:
+            return []
+        query = select(*(getattr(Course, name) for name in fields)).where(
+            Course.id.in_(ids), Course.is_published
+        )
+        rows = {row["id"]: dict(row) for row in (await db.execute(query)).mappings()}
+        return [rows[id] for id in ids if id in rows]
     
+    async def enrolled_course_ids(self, db: AsyncSession, student_id: int) -> list[int]:
+        res = await db.execute(select(Enrollment.course_id).where(Enrollment.student_id == student_id))
+        return list(res.scalars().all())
+
     async def create_course_for_db(self, db:AsyncSession, course:CourseCreate):
         db_course=Course(
             title = course.title,
@@ -30,28 +176,118 @@ class CourseCRUD:
         db.add(db_course)
         await db.commit()
         await db.refresh(db_course)
+        await self.refresh_catalog(db)
         
         return {'message':"Course is created"}
         
     async def publish_course(self,db:AsyncSession,publish: CoursePublish):
         try:
-            await db.execute(update(Course).where(Course.id == publish.id).values(is_published=publish.publish))
+            stmt = update(Course).where(Course.id == publish.id).values(is_published=publish.publish)
+            if publish.publish:
+                # Match only an unpublished course, so republishing doesn't announce it again
+                stmt = stmt.where(Course.is_published.is_(False))
+            res = await db.execute(stmt)
+            if publish.publish and res.rowcount:
+                outbox_crud.add(db, COURSE_PUBLISHED, {"course_id": publish.id}, key=str(publish.id))
             await db.commit()
+            await self.refresh_catalog(db)
+            await course_search.refresh_courses(db, [publish.id])
             return {'message':'Course is published'}
         except Exception as e:
             raise e
-    async def purchase_course(self,db:AsyncSession,student_id:int,course_id:int):
-        try:
-            db_purchase_course=Enrollment(
-                student_id=student_id,
-                course_id=course_id
+    async def purchase_course(self, db: AsyncSession, student_id: int, course_id: int) -> dict:
+        """Enroll a student in a published course in one statement and one commit.
+
+        ``INSERT ... SELECT ... ON CONFLICT DO NOTHING`` checks the course and
+        the unique (student_id, course_id) constraint at once, so retries and
+        concurrent duplicates can't create a second enrollment.
+        """
+        enrolled_at = datetime.now(timezone.utc)
+        stmt = (
+            insert(Enrollment)
+            .from_select(
+                ["student_id", "course_id", "enrolled_at", "completed_at"],
+                select(
+                    literal(student_id),
+                    Course.id,
+                    literal(enrolled_at, DateTime(timezone=True)),
+                    literal(enrolled_at + ENROLLMENT_ACCESS_PERIOD, DateTime(timezone=True)),
+                ).where(Course.id == course_id, Course.is_published),
             )
-            db.add(db_purchase_course)
-            await db.commit()
-            await db.refresh(db_purchase_course)
-        except Exception as e:
-            raise e
-        
+            .on_conflict_do_nothing(index_elements=[Enrollment.student_id, Enrollment.course_id])
+            .returning(Enrollment.id)
+        )
+        enrollment_id = (await db.execute(stmt)).scalar_one_or_none()
+
+        if enrollment_id is None:
+            res = await db.execute(
+                select(Enrollment.id).where(Enrollment.student_id == student_id, Enrollment.course_id == course_id)
+            )
+            existing = res.scalar_one_or_none()
+            if existing is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
+            return {"message": "Already enrolled in this course", "enrollment_id": existing}
+
+        outbox_crud.add(
+            db,
+            ENROLLMENT_CREATED,
+            {
+                "enrollment_id": enrollment_id,
+                "student_id": student_id,
+                "course_id": course_id,
+                "enrolled_at": enrolled_at,
+            },
+            key=str(student_id),
+        )
+        await db.commit()
+        return {"message": "Course was purchased", "enrollment_id": enrollment_id}
+
+    async def existing_ids(self, db: AsyncSession, ids: set[int]) -> set[int]:
+        if not ids:
+            return set()
+        res = await db.execute(select(Course.id).where(Course.id.in_(ids)))
+        return set(res.scalars().all())
+
+    async def bulk_enroll(self, db: AsyncSession, pairs: list[tuple[int, int]]) -> set[tuple[int, int]]:
+        """Enroll many (student_id, course_id) pairs with one multi-row insert.
+
+        Pairs that are already enrolled are skipped; returns the pairs created.
+        """
+        if not pairs:
+            return set()
+        enrolled_at = datetime.now(timezone.utc)
+        res = await db.execute(
+            insert(Enrollment)
+            .values([
+                {
+                    "student_id": student_id,
+                    "course_id": course_id,
+                    "enrolled_at": enrolled_at,
+                    "completed_at": enrolled_at + ENROLLMENT_ACCESS_PERIOD,
+                }
+                for student_id, course_id in pairs
+            ])
+            .on_conflict_do_nothing(index_elements=[Enrollment.student_id, Enrollment.course_id])
+            .returning(Enrollment.id, Enrollment.student_id, Enrollment.course_id)
+        )
+        created = res.all()
+        await outbox_crud.add_many(db, ENROLLMENT_CREATED, [
+            (
+                str(row.student_id),
+                {
+                    "enrollment_id": row.id,
+                    "student_id": row.student_id,
+                    "course_id": row.course_id,
+                    "enrolled_at": enrolled_at,
+                    "source": "admin_import",
+                },
+            )
+            for row in created
+        ])
+        await db.commit()
+        return {(row.student_id, row.course_id) for row in created}
+
+    @cached("course:{id}:content", tags=("course:{id}",))
     async def get_content(self,db:AsyncSession, id:int):
         try:
             res = await db.execute(select(Content).where(Content.course_id==id))
@@ -73,6 +309,7 @@ class CourseCRUD:
             db.add(content)
             await db.commit()   
             await db.refresh(content)   
+            await cache.invalidate_tags(f"course:{id}")
         except Exception as e:
             raise e
         
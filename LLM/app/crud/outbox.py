@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional, Sequence
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.outbox import OutboxEvent
+
+# Set on the session when an event is staged, so the relay is woken after commit
+OUTBOX_PENDING = "outbox_pending"
+
+
+class OutboxCRUD:
+
+    def add(self, db: AsyncSession, topic: str, payload: dict[str, Any], key: Optional[str] = None) -> OutboxEvent:
+        """Stage an event in the caller's transaction; it is published only if that commit succeeds"""
+        event = OutboxEvent(topic=topic, key=key, payload=jsonable_encoder(payload), attempts=0)
+        db.add(event)
+        db.sync_session.info[OUTBOX_PENDING] = True
+        return event
+
+    async def add_many(self, db: AsyncSession, topic: str, events: Sequence[tuple[Optional[str], dict[str, Any]]]) -> None:
+        """Stage many events of one topic with a single multi-row INSERT"""
+        if not events:
+            return
+        await db.execute(
+            insert(OutboxEvent).values([
+                {"topic": topic, "key": key, "payload": jsonable_encoder(payload), "attempts": 0}
+                for key, payload in events
+            ])
+        )
+        db.sync_session.info[OUTBOX_PENDING] = True
+
+    async def claim_batch(self, db: AsyncSession, limit: int, max_attempts: int) -> Sequence[OutboxEvent]:
+        """Lock the oldest unpublished events; concurrent relays skip each other's rows"""
+        res = await db.execute(
+            select(OutboxEvent)
+            .where(OutboxEvent.published_at.is_(None), OutboxEvent.attempts < max_attempts)
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return res.scalars().all()
+
+    async def purge_published(self, db: AsyncSession, older_than: timedelta) -> int:
+        res = await db.execute(
+            delete(OutboxEvent).where(OutboxEvent.published_at < datetime.now(timezone.utc) - older_than)
+        )
+        await db.commit()
+        return res.rowcount
+
+
+outbox_crud = OutboxCRUD()
@@ -0,0 +1,76 @@
+from sqlalchemy import func, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.analytics import analytics_crud
+from app.models.course import Enrollment, Lesson, Progress
+
+UPSERT_CHUNK_SIZE = 1000
+
+# xmax is zero only on a row version this statement inserted, not on one it updated
+INSERTED = literal_column("xmax = 0").label("inserted")
+
+
+class ProgressCRUD:
+
+    async def upsert_many(self, db: AsyncSession, rows: list[dict]) -> int:
+        """Merge coalesced progress rows with INSERT ... ON CONFLICT, in chunks.
+
+        Completion only moves forward, time spent is additive and
+        ``completed_at`` keeps the first completion. Rows for unknown lessons
+        or for students not enrolled in the lesson's course are dropped, so
+        one bad heartbeat can't poison the batch. The analytics rollups are
+        updated in the same transaction. A chunk that conflicts with a row
+        another flush inserted after ``lock_progress`` is retried from a
+        savepoint, so the rollups never count that row twice.
+        """
+        rows = sorted(rows, key=lambda row: (row["student_id"], row["lesson_id"]))
+        written = 0
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+            keys = [(row["student_id"], row["lesson_id"]) for row in chunk]
+            res = await db.execute(
+                select(Enrollment.student_id, Lesson.id, Lesson.course_id)
+                .join(Enrollment, Enrollment.course_id == Lesson.course_id)
+                .where(tuple_(Enrollment.student_id, Lesson.id).in_(keys))
+            )
+            lesson_courses = {}
+            enrolled = set()
+            for student_id, lesson_id, course_id in res:
+                lesson_courses[lesson_id] = course_id
+                enrolled.add((student_id, lesson_id))
+            chunk = [row for row, key in zip(chunk, keys) if key in enrolled]
+            keys = [key for key in keys if key in enrolled]
+            if not chunk:
+                continue
+            while True:
+                savepoint = await db.begin_nested()
+                before = await analytics_crud.lock_progress(db, keys)
+                stmt = insert(Progress).values(chunk)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[Progress.student_id, Progress.lesson_id],
+                    set_={
+                        "completion_percentage": func.greatest(
+                            Progress.completion_percentage, stmt.excluded.completion_percentage
+                        ),
+                        "time_spent_minutes": Progress.time_spent_minutes + stmt.excluded.time_spent_minutes,
+                        "completed": Progress.completed | stmt.excluded.completed,
+                        "completed_at": func.coalesce(Progress.completed_at, stmt.excluded.completed_at),
+                    },
+                ).returning(
+                    Progress.student_id, Progress.lesson_id, Progress.completion_percentage, Progress.completed, INSERTED
+                )
+                after = (await db.execute(stmt)).all()
+                if all(row.inserted or (row.student_id, row.lesson_id) in before for row in after):
+                    break
+                # The other insert has committed by now, so the retry locks it and sees its values
+                await savepoint.rollback()
+            minutes = {key: row["time_spent_minutes"] for key, row in zip(keys, chunk)}
+            await analytics_crud.apply_progress(db, before, after, minutes, lesson_courses)
+            await savepoint.commit()
+            written += len(chunk)
+        await db.commit()
+        return written
+
+
+progress_crud = ProgressCRUD()
@@ -1,13 +1,18 @@
-import random
-from datetime import datetime , timedelta
+import secrets
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import select, update
+from sqlalchemy import DateTime, and_, delete, func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
 from fastapi import HTTPException
 from app.models.user import User, ResetPassword
-from app.models.course import Enrollment, Course
+from app.models.course import Enrollment, Course, Lesson, Progress
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.config import settings
+from app.core.security import password_hasher
+from app.core.principal_cache import principal_cache
+from app.core.events import USER_REGISTERED
+from app.crud.outbox import outbox_crud
 from typing import Optional
 
 class UserCRUD:
@@ -26,7 +31,7 @@ class UserCRUD:
         return res.scalar_one_or_none()
 
     async def create(self, db: AsyncSession, user_in: UserCreate) -> User:
-        hashed_password = get_password_hash(user_in.password)
+        hashed_password = await password_hasher.hash(user_in.password)
         db_user = User(
             email=user_in.email,
             username=user_in.username,
@@ -37,6 +42,13 @@ class UserCRUD:
         )
         try:
             db.add(db_user)
+            await db.flush()
+            outbox_crud.add(
+                db,
+                USER_REGISTERED,
+                {"user_id": db_user.id, "email": db_user.email, "username": db_user.username, "role": db_user.role},
+                key=str(db_user.id),
+            )
             await db.commit()
             await db.refresh(db_user)
             return db_user
@@ -44,10 +56,52 @@ class UserCRUD:
             await db.rollback()
             raise ValueError("User with this email or username already exists")
 
+    async def bulk_create(self, db: AsyncSession, users: list[dict]) -> dict[str, int]:
+        """Insert users with one multi-row INSERT ... ON CONFLICT DO NOTHING.
+
+        Returns ``{email: id}`` for the rows actually created; rows clashing
+        with an existing email or username are skipped.
+        """
+        if not users:
+            return {}
+        res = await db.execute(
+            insert(User).values(users).on_conflict_do_nothing().returning(User.id, User.email, User.username, User.role)
+        )
+        created = res.all()
+        await outbox_crud.add_many(db, USER_REGISTERED, [
+            (str(row.id), {"user_id": row.id, "email": row.email, "username": row.username, "role": row.role})
+            for row in created
+        ])
+        await db.commit()
+        return {row.email: row.id for row in created}
+
+    async def resolve_ids(
+        self, db: AsyncSession, ids: set[int], usernames: set[str], emails: set[str]
+    ) -> dict[tuple[str, object], int]:
+        """Look up user ids by id, username or email in one query, keyed by ``(kind, value)``"""
+        if not (ids or usernames or emails):
+            return {}
+        res = await db.execute(
+            select(User.id, User.username, User.email).where(
+                or_(User.id.in_(ids), User.username.in_(usernames), User.email.in_(emails))
+            )
+        )
+        resolved = {}
+        for row in res:
+            resolved[("id", row.id)] = row.id
+            resolved[("username", row.username)] = row.id
+            resolved[("email", row.email)] = row.id
+        return resolved
+
     async def authenticate(self, db: AsyncSession, username: str, password: str) -> Optional[User]:
         user = await self.get_by_username(db, username)
-        if not user or not verify_password(password, user.hashed_password):
+        if not user or not await password_hasher.verify(password, user.hashed_password):
             return None
+        if password_hasher.needs_rehash(user.hashed_password):
+            # Imported passwords are hashed cheaply; store the full-cost hash now that we have the password
+            user.hashed_password = await password_hasher.hash(password)
+            await db.commit()
+            await db.refresh(user)
         return user
     
     async def update(self, db: AsyncSession, user_id: int, user_in: UserUpdate) -> Optional[User]:
@@ -61,125 +115,124 @@ class UserCRUD:
         
         await db.commit()
         await db.refresh(user)
+        await principal_cache.invalidate(user.username)
         return user
     
     async def get_my_course(self,db:AsyncSession,id:int):
+        """Enrolled courses with lesson count, total duration and completion, in one query"""
         try:
-            result = await db.execute(
-            select(Course)
-            .join(Enrollment)
-            .where(Enrollment.student_id == id)
-        )
-            courses = result.scalars().all()
-            if not courses:
-                return {"message": "You do not have any courses yet"}
-            return (f"Your courses:", courses)
-        except Exception as e:
-            raise e
-        
-    async def verify_reset_code(self, db: AsyncSession, reset_id: int, code: str) -> bool:
-        """Verify OTP code for password reset"""
-        try:
-            res = await db.execute(
-                select(ResetPassword).where(
-                    ResetPassword.id == reset_id,
-                    ResetPassword.code == int(code)
+            enrolled = select(Enrollment.course_id).where(Enrollment.student_id == id)
+            lesson_stats = (
+                select(
+                    Lesson.course_id,
+                    func.count(Lesson.id).label("lesson_count"),
+                    func.sum(Lesson.duration_minutes).label("total_duration_minutes"),
+                    func.sum(Progress.completion_percentage).label("completion_sum"),
                 )
+                .outerjoin(Progress, and_(Progress.lesson_id == Lesson.id, Progress.student_id == id))
+                .where(Lesson.course_id.in_(enrolled))
+                .group_by(Lesson.course_id)
+                .subquery()
             )
-            reset_record = res.scalar_one_or_none()
-            
-            if not reset_record:
-                raise HTTPException(status_code=400, detail='Invalid OTP code')
-            
-            # Check if code is expired (5 minutes)
-            if datetime.now() > reset_record.created_at + timedelta(minutes=5):
-                # Delete expired record
-                await db.delete(reset_record)
-                await db.commit()
-                raise HTTPException(status_code=403, detail='OTP code has expired')
-                
-            return True
-            
-        except ValueError:
-            raise HTTPException(status_code=400, detail='Invalid OTP code format')
-        
-    async def update_password_by_email(self, db: AsyncSession, email: str, new_password: str) -> bool:
-        """Update user password by email"""
-        hashed_password = get_password_hash(new_password)
-        try:
             result = await db.execute(
-                update(User)
-                .where(User.email == email)
-                .values(hashed_password=hashed_password)
+                select(
+                    Course.id,
+                    Course.title,
+                    Course.description,
+                    Course.teacher_id,
+                    Course.price,
+                    lesson_stats.c.lesson_count,
+                    lesson_stats.c.total_duration_minutes,
+                    lesson_stats.c.completion_sum,
+                )
+                .outerjoin(lesson_stats, lesson_stats.c.course_id == Course.id)
+                .where(Course.id.in_(enrolled))
+                .order_by(Course.id)
             )
-            await db.commit()
-            
-            if result.rowcount == 0:
-                raise HTTPException(status_code=404, detail="User not found")
-                
-            return True
-            
+            rows = result.mappings().all()
+            if not rows:
+                return {"message": "You do not have any courses yet"}
+
+            courses = []
+            for row in rows:
+                lesson_count = row["lesson_count"] or 0
+                completion_sum = row["completion_sum"] or 0
+                courses.append({
+                    "id": row["id"],
+                    "title": row["title"],
+                    "description": row["description"],
+                    "teacher_id": row["teacher_id"],
+                    "price": row["price"],
+                    "lesson_count": lesson_count,
+                    "total_duration_minutes": row["total_duration_minutes"] or 0,
+                    "completion_percentage": round(completion_sum / lesson_count, 1) if lesson_count else 0.0,
+                })
+            return (f"Your courses:", courses)
         except Exception as e:
-            await db.rollback()
-            raise HTTPException(status_code=500, detail=f"Failed to update password: {str(e)}")
+            raise e
         
     async def create_reset_password_request(self, db: AsyncSession, email: str) -> tuple[int, str]:
-        """Create password reset request and return reset_id and OTP code"""
-        # Check if user exists
-        user = await self.get_by_email(db, email)
-        if not user:
-            raise HTTPException(status_code=404, detail="User with this email not found")
-        
-        # Generate 4-digit OTP
-        otp_code = random.randint(1000, 9999)
-        
-        # Delete any existing reset requests for this email
-        existing_result = await db.execute(
-            select(ResetPassword).where(ResetPassword.email == email)
+        """Create or replace the email's reset request in one statement; return reset_id and OTP code"""
+        otp_code = 1000 + secrets.randbelow(9000)
+        stmt = insert(ResetPassword).from_select(
+            ["email", "code", "created_at"],
+            select(User.email, literal(otp_code), literal(datetime.now(timezone.utc), DateTime(timezone=True)))
+            .where(User.email == email),
         )
-        existing_records = existing_result.scalars().all()
-        for record in existing_records:
-            await db.delete(record)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ResetPassword.email],
+            set_={"code": stmt.excluded.code, "created_at": stmt.excluded.created_at},
+        ).returning(ResetPassword.id)
+        reset_id = (await db.execute(stmt)).scalar_one_or_none()
         await db.commit()
-        
-        # Create new reset request
-        reset_request = ResetPassword(
-            email=email,
-            code=otp_code,
-            created_at=datetime.now()
+        if reset_id is None:
+            raise HTTPException(status_code=404, detail="User with this email not found")
+        return reset_id, str(otp_code)
+
+    async def reset_password(self, db: AsyncSession, reset_id: int, code: str, new_password: str) -> None:
+        """Consume a valid, unexpired reset request and set the new password in one transaction.
+
+        The request is deleted by the same statement that checks it, so a code
+        works once. Hashing happens only after a match, so wrong guesses cost no
+        bcrypt; if anything fails afterwards the rollback restores the request.
+        """
+        if not code.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid or expired OTP code")
+        expires_after = timedelta(minutes=settings.OTP_EXPIRE_MINUTES)
+        res = await db.execute(
+            delete(ResetPassword)
+            .where(
+                ResetPassword.id == reset_id,
+                ResetPassword.code == int(code),
+                ResetPassword.created_at > datetime.now(timezone.utc) - expires_after,
+            )
+            .returning(ResetPassword.email)
         )
-        
-        db.add(reset_request)
-        await db.commit()
-        await db.refresh(reset_request)
-        
-        return reset_request.id, str(otp_code)
-    
-    async def complete_password_reset(self, db: AsyncSession, reset_id: int, email: str) -> bool:
-        """Complete password reset by deleting the reset record"""
+        email = res.scalar_one_or_none()
+        if email is None:
+            await db.rollback()
+            raise HTTPException(status_code=400, detail="Invalid or expired OTP code")
+
         try:
-            result = await db.execute(
-                select(ResetPassword).where(
-                    ResetPassword.id == reset_id,
-                    ResetPassword.email == email
-                )
+            hashed_password = await password_hasher.hash(new_password)
+            res = await db.execute(
+                update(User)
+                .where(User.email == email)
+                .values(hashed_password=hashed_password, credential_version=User.credential_version + 1)
+                .returning(User.username)
             )
-            reset_record = result.scalar_one_or_none()
-            
-            if reset_record:
-                await db.delete(reset_record)
-                await db.commit()
-                
-            return True
-            
-        except Exception as e:
+            usernames = res.scalars().all()
+            await db.commit()
+        except Exception:
             await db.rollback()
-            raise HTTPException(status_code=500, detail=f"Failed to complete reset: {str(e)}")
-
+            raise
+        for username in usernames:
+            await principal_cache.invalidate(username)
 
+    async def purge_reset_requests(self, db: AsyncSession, older_than: timedelta) -> int:
+        res = await db.execute(delete(ResetPassword).where(ResetPassword.created_at < datetime.now(timezone.utc) - older_than))
+        await db.commit()
+        return res.rowcount
 
-        
-     
-        
 
 user_crud = UserCRUD()
\ No newline at end of file
@@ -1,24 +1,71 @@
 import logging
+import time
 
-from fastapi import FastAPI
+from app.core.startup import startup_timer, FirstRequestTimerMiddleware
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
-from app.core.database import engine, Base
-from app.api.routes import auth, users, course
+from app.core.config import settings
+from app.core.database import ReadYourWritesMiddleware, engine, pool_stats, replica_router
+from app.core.migrations import check_schema_version
+from app.core.metrics import registry, MetricsMiddleware, StatsCollector
+from app.core.cache import cache
+from app.core.security import password_hasher
+from app.core.principal_cache import principal_cache
+from app.core.progress_buffer import progress_buffer
+from app.core.mail_queue import mail_queue
+from app.core.email_templates import email_templates
+from app.core.events import event_broker
+from app.core.event_handlers import register_event_handlers
+from app.core.outbox_relay import outbox_relay
+from app.core.search import course_search
+from app.core.recommender import course_recommender
+from app.core.analytics import analytics_rebuilder
+from app.core.password_reset import reset_request_purger
+from app.core.rate_limit import RateLimitMiddleware, rate_limiter
+from app.core.tokens import revoked_tokens
+from app.api.deps import get_current_superuser, verify_metrics_token
+from app.api.routes import auth, users, course, lesson, admin
 
 
   
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
+register_event_handlers(event_broker)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        logger.info("Creating all tables in the database")
-        await conn.run_sync(Base.metadata.create_all)
-        logger.info("All tables created successfully")
+    if settings.DB_SCHEMA_CHECK:
+        started = time.perf_counter()
+        startup_timer.schema_revision = await check_schema_version(engine)
+        startup_timer.schema_check_seconds = time.perf_counter() - started
+    email_templates.load()
+    progress_buffer.start()
+    mail_queue.start()
+    await outbox_relay.start()
+    course_search.start()
+    course_recommender.start()
+    analytics_rebuilder.start()
+    reset_request_purger.start()
+    startup_timer.mark_ready()
+    logger.info(f"Worker {startup_timer.pid} ready in {startup_timer.ready_seconds:.3f}s")
     yield
+    await course_search.stop()
+    await course_recommender.stop()
+    await analytics_rebuilder.stop()
+    await reset_request_purger.stop()
+    await outbox_relay.stop()
+    await progress_buffer.stop()
+    await mail_queue.stop()
+    password_hasher.shutdown()
+    await cache.close()
+    await rate_limiter.close()
+    await revoked_tokens.close()
+    await replica_router.dispose()
 
 # ✅ Define FastAPI after lifespan is defined
 app = FastAPI(
@@ -26,6 +73,7 @@ app = FastAPI(
     description="A comprehensive Learning Management System with intelligent features",
     version="1.0.0",
     lifespan=lifespan ,
+    default_response_class=ORJSONResponse,
     openapi_url=f"/openapi.json",
     docs_url="/docs",
     redoc_url="/redoc" # ✅ Now it works
@@ -34,6 +82,9 @@ app = FastAPI(
 
 
 
+# Innermost, so 429s still get CORS headers and show up in metrics
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -42,11 +93,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(FirstRequestTimerMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["authentication"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
 app.include_router(course.router ,prefix="/api/v1/course", tags=["courses"])
+app.include_router(lesson.router, prefix="/api/v1/lesson", tags=["lessons"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
 
 @app.get("/")
 def read_root():
@@ -55,3 +110,30 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+@app.get("/stats", dependencies=[Depends(get_current_superuser)])
+def stats():
+    return {
+        "db_pool": pool_stats(engine),
+        "db_replicas": replica_router.stats(),
+        "password_hasher": password_hasher.stats(),
+        "principal_cache": principal_cache.stats(),
+        "cache": cache.stats(),
+        "progress_buffer": progress_buffer.stats(),
+        "mail_queue": mail_queue.stats(),
+        "outbox": outbox_relay.stats(),
+        "search": course_search.stats(),
+        "recommender": course_recommender.stats(),
+        "analytics": analytics_rebuilder.stats(),
+        "password_reset": reset_request_purger.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "tokens": revoked_tokens.stats(),
+        "startup": startup_timer.stats(),
+    }
+
+
+registry.register(StatsCollector(stats))
+
+@app.get("/metrics", dependencies=[Depends(verify_metrics_token)])
+def metrics():
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
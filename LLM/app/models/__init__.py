@@ -1,5 +1,15 @@
 # app/models/__init__.py
 from .user import User
 from .course import Course, Lesson, Enrollment, Progress
+from .outbox import OutboxEvent
+from .analytics import (
+    CourseProgressRollup,
+    LessonCompletionHistogram,
+    LessonProgressRollup,
+    StudentCourseProgress,
+)
 
-__all__ = ["User", "Course", "Lesson", "Enrollment", "Progress"]
+__all__ = [
+    "User", "Course", "Lesson", "Enrollment", "Progress", "OutboxEvent",
+    "LessonProgressRollup", "LessonCompletionHistogram", "StudentCourseProgress", "CourseProgressRollup",
+]
@@ -0,0 +1,46 @@
+from sqlalchemy import BigInteger, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class LessonProgressRollup(Base):
+    """Progress totals per lesson, kept in step with every progress upsert"""
+    __tablename__ = "lesson_progress_rollups"
+
+    lesson_id: Mapped[int] = mapped_column(ForeignKey("lessons.id"), primary_key=True)
+    course_id: Mapped[int] = mapped_column(ForeignKey("courses.id"), index=True)
+    learners: Mapped[int] = mapped_column(Integer, default=0)
+    completed: Mapped[int] = mapped_column(Integer, default=0)
+    completion_sum: Mapped[int] = mapped_column(BigInteger, default=0)
+    time_spent_minutes: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+class LessonCompletionHistogram(Base):
+    """Learners per completion_percentage bucket of a lesson (0-9, 10-19, ..., 90-99, 100)"""
+    __tablename__ = "lesson_completion_histograms"
+
+    lesson_id: Mapped[int] = mapped_column(ForeignKey("lessons.id"), primary_key=True)
+    bucket: Mapped[int] = mapped_column(Integer, primary_key=True)
+    learners: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class StudentCourseProgress(Base):
+    """Per-student progress through a course; tells the course rollup when a learner starts or finishes"""
+    __tablename__ = "student_course_progress"
+
+    student_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    course_id: Mapped[int] = mapped_column(ForeignKey("courses.id"), primary_key=True)
+    lessons_started: Mapped[int] = mapped_column(Integer, default=0)
+    lessons_completed: Mapped[int] = mapped_column(Integer, default=0)
+    time_spent_minutes: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+class CourseProgressRollup(Base):
+    """Progress totals per course; a completed learner has completed every lesson"""
+    __tablename__ = "course_progress_rollups"
+
+    course_id: Mapped[int] = mapped_column(ForeignKey("courses.id"), primary_key=True)
+    learners: Mapped[int] = mapped_column(Integer, default=0)
+    completed_learners: Mapped[int] = mapped_column(Integer, default=0)
+    time_spent_minutes: Mapped[int] = mapped_column(BigInteger, default=0)
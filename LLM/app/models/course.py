@@ -2,7 +2,9 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import List, Optional
 
-from sqlalchemy import String, Text, Boolean, DateTime, ForeignKey, Numeric, Integer
+from sqlalchemy import (
+    String, Text, Boolean, DateTime, ForeignKey, Index, Numeric, Integer, UniqueConstraint, event, inspect, update
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
@@ -20,13 +22,23 @@ class Course(Base):
     price: Mapped[Decimal] = mapped_column(Numeric(10, 2), default=0.00)
     is_published: Mapped[bool] = mapped_column(Boolean, default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
+    # Set on insert too, so the search refresh can scan one indexed column
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True
+    )
     
     # Relationships
     teacher: Mapped[List["User"]] = relationship("User", back_populates="created_courses")
     enrollments: Mapped[List["Enrollment"]] = relationship("Enrollment", back_populates="course")
     lessons: Mapped[List["Lesson"]] = relationship("Lesson", back_populates="course")
 
+    __table_args__ = (
+        # Keyset pagination indexes for the catalog and admin listings
+        Index("ix_courses_created_at_id", "created_at", "id"),
+        Index("ix_courses_published_created_at_id", "is_published", "created_at", "id"),
+        Index("ix_courses_teacher_created_at_id", "teacher_id", "created_at", "id"),
+    )
+
 class Lesson(Base):
     __tablename__ = "lessons"
     
@@ -42,6 +54,15 @@ class Lesson(Base):
     course: Mapped["Course"] = relationship("Course", back_populates="lessons")
     progress: Mapped[List["Progress"]] = relationship("Progress", back_populates="lesson")
 
+
+@event.listens_for(Lesson, "after_insert")
+@event.listens_for(Lesson, "after_update")
+@event.listens_for(Lesson, "after_delete")
+def _touch_course(mapper, connection, lesson: Lesson) -> None:
+    """Bump the parent course's updated_at, so the search refresh re-reads its lessons"""
+    course_ids = {lesson.course_id, *inspect(lesson).attrs.course_id.history.deleted}
+    connection.execute(update(Course).where(Course.id.in_(course_ids)).values(updated_at=func.now()))
+
 class Enrollment(Base):
     __tablename__ = "enrollments"
     
@@ -55,6 +76,10 @@ class Enrollment(Base):
     student: Mapped["User"] = relationship("User", back_populates="enrolled_courses")
     course: Mapped["Course"] = relationship("Course", back_populates="enrollments")
 
+    __table_args__ = (
+        UniqueConstraint("student_id", "course_id", name="uq_enrollments_student_course"),
+    )
+
 class Progress(Base):
     __tablename__ = "progress"
     
@@ -69,6 +94,10 @@ class Progress(Base):
     # Relationships
     lesson: Mapped["Lesson"] = relationship("Lesson", back_populates="progress")
 
+    __table_args__ = (
+        UniqueConstraint("student_id", "lesson_id", name="uq_progress_student_lesson"),
+    )
+
 class Content(Base):
     __tablename__ = "contents"
 
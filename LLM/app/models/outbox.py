@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import JSON, DateTime, Index, Integer, String, Text, text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class OutboxEvent(Base):
+    """Domain event written in the same transaction as the change it describes"""
+    __tablename__ = "outbox_events"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    topic: Mapped[str] = mapped_column(String(100))
+    key: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    payload: Mapped[dict] = mapped_column(JSON)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    published_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Subscribers that already handled the event, so a retry does not run them twice
+    handled: Mapped[list[str]] = mapped_column(JSON, default=list, server_default=text("'[]'"))
+
+    __table_args__ = (
+        # The relay only ever scans unpublished rows
+        Index("ix_outbox_events_unpublished", "id", postgresql_where=published_at.is_(None)),
+        Index("ix_outbox_events_published_at", "published_at"),
+    )
@@ -0,0 +1,21 @@
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+from pydantic import BaseModel, field_validator
+
+
+class ExportParams(BaseModel):
+    format: Literal["csv", "ndjson"] = "csv"
+    gzip: bool = False
+    date_from: Optional[datetime] = None  # inclusive
+    date_to: Optional[datetime] = None  # exclusive
+
+    @field_validator("date_from", "date_to")
+    @classmethod
+    def as_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        """Read naive values as UTC so the bounds compare with each other and with timestamptz columns"""
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
@@ -1,6 +1,11 @@
 import enum
+from datetime import datetime
+from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, EmailStr, Field, model_validator
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
 
 class CourseCreate(BaseModel):
@@ -10,6 +15,107 @@ class CourseCreate(BaseModel):
     price : float
 
     
+class CourseRead(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    teacher_id: int
+    price: float
+    is_published: bool
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class CourseOut(BaseModel):
+    """A course with only the selected ``fields``; routes returning it drop unset fields from the response"""
+    id: int
+    title: Optional[str] = None
+    description: Optional[str] = None
+    teacher_id: Optional[int] = None
+    price: Optional[float] = None
+    is_published: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ScoredCourse(CourseOut):
+    score: float
+
+
+class CoursePage(BaseModel):
+    courses: list[CourseOut]
+    next_cursor: Optional[str] = None
+
+
+class CatalogPage(BaseModel):
+    # The public catalog has always been keyed "courses:"; the cached pages use the same key
+    courses: list[CourseOut] = Field(alias="courses:")
+    next_cursor: Optional[str] = None
+
+
+class CourseSearchResponse(BaseModel):
+    query: str
+    total: int
+    results: list[ScoredCourse]
+
+
+class RecommendationResponse(BaseModel):
+    strategy: str
+    courses: list[ScoredCourse]
+
+
+class SimilarCoursesResponse(BaseModel):
+    course_id: int
+    courses: list[ScoredCourse]
+
+
+class EnrolledCourse(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    teacher_id: int
+    price: float
+    lesson_count: int
+    total_duration_minutes: int
+    completion_percentage: float
+
+
+class PurchaseResponse(BaseModel):
+    message: str
+    enrollment_id: int
+
+
+class ContentRead(BaseModel):
+    link: Optional[str] = None
+    url: Optional[str] = None
+
+
+class MessageResponse(BaseModel):
+    message: str
+
+
+class CourseListParams(BaseModel):
+    limit: int = Field(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+    cursor: Optional[str] = None
+    teacher_id: Optional[int] = None
+    min_price: Optional[float] = Field(None, ge=0)
+    max_price: Optional[float] = Field(None, ge=0)
+    fields: Optional[str] = None
+
+
+class CourseSearchParams(BaseModel):
+    q: str = Field(min_length=1, max_length=200)
+    limit: int = Field(20, ge=1, le=100)
+    offset: int = Field(0, ge=0, le=1000)
+    fields: Optional[str] = None
+
+
 class CoursePublish(BaseModel):
     id: int
     publish: bool
@@ -23,4 +129,24 @@ class ContentSchema(BaseModel):
 
     course_id:int
     link:str|None
-    url:str|None
\ No newline at end of file
+    url:str|None
+
+
+class ProgressHeartbeat(BaseModel):
+    lesson_id: int
+    completion_percentage: int = Field(ge=0, le=100)
+    time_spent_seconds: int = Field(0, ge=0, le=3600)
+
+
+class EnrollmentImportRow(BaseModel):
+    """One row of an admin enrollment import; the student is identified by id, username or email"""
+    course_id: int
+    student_id: Optional[int] = None
+    username: Optional[str] = None
+    email: Optional[EmailStr] = None
+
+    @model_validator(mode="after")
+    def identifies_student(self):
+        if self.student_id is None and self.username is None and self.email is None:
+            raise ValueError("provide student_id, username or email")
+        return self
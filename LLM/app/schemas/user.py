@@ -1,7 +1,7 @@
 from typing import Optional
 from datetime import datetime
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, model_validator
 
 from app.models.user import UserRole
 
@@ -15,6 +15,18 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str
 
+class UserImportRow(UserBase):
+    """One row of an admin user import; either a password or an existing bcrypt hash"""
+    username: str = Field(min_length=1, max_length=50)
+    password: Optional[str] = None
+    password_hash: Optional[str] = Field(None, pattern=r"^\$2[aby]\$\d\d\$.{53}$")
+
+    @model_validator(mode="after")
+    def one_password(self):
+        if (self.password is None) == (self.password_hash is None):
+            raise ValueError("provide exactly one of password or password_hash")
+        return self
+
 class UserUpdate(BaseModel):
     first_name: Optional[str] = None
     last_name: Optional[str] = None
@@ -32,6 +44,10 @@ class UserInDB(UserBase):
 class Token(BaseModel):
     access_token: str
     token_type: str 
+    refresh_token: Optional[str] = None
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     username: Optional[str] = None
@@ -0,0 +1,63 @@
+"""Compare two ``benchmarks.load_test`` reports and flag regressions.
+
+Exits with status 1 when any scenario's p95 latency grows, or its throughput
+drops, by more than ``--threshold`` (a fraction, 0.1 = 10%).
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.1
+"""
+import argparse
+import json
+import sys
+
+
+def change(before: float | None, after: float | None) -> float | None:
+    if not before or after is None:
+        return None
+    return (after - before) / before
+
+
+def fmt(value: float | None) -> str:
+    return "n/a" if value is None else f"{value:+.1%}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    differing = [
+        key for key in ("concurrency", "duration", "warmup", "seed", "dataset_seed")
+        if baseline["config"].get(key) != candidate["config"].get(key)
+    ]
+    if differing:
+        print(f"warning: runs differ in {', '.join(differing)}; results may not be comparable", file=sys.stderr)
+
+    regressions = []
+    print(f"{'scenario':<12} {'p50':>9} {'p95':>9} {'p99':>9} {'rps':>9}")
+    for name, before in baseline["scenarios"].items():
+        after = candidate["scenarios"].get(name)
+        if after is None:
+            continue
+        deltas = {pct: change(before["latency_ms"][pct], after["latency_ms"][pct]) for pct in ("p50", "p95", "p99")}
+        throughput = change(before["throughput_rps"], after["throughput_rps"])
+        print(f"{name:<12} {fmt(deltas['p50']):>9} {fmt(deltas['p95']):>9} {fmt(deltas['p99']):>9} {fmt(throughput):>9}")
+
+        if deltas["p95"] is not None and deltas["p95"] > args.threshold:
+            regressions.append(f"{name}: p95 {fmt(deltas['p95'])}")
+        if throughput is not None and throughput < -args.threshold:
+            regressions.append(f"{name}: throughput {fmt(throughput)}")
+
+    if regressions:
+        print("\nRegressions over threshold:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
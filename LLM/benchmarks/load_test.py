@@ -0,0 +1,207 @@
+"""Drive the login, catalog, my_courses and purchase endpoints with concurrent clients.
+
+Each scenario runs for ``--duration`` seconds after a short warm-up, using
+``--concurrency`` async clients against a running server seeded by
+``benchmarks.seed``. Latency percentiles and throughput are written as
+JSON so runs can be diffed with ``benchmarks.compare``. Every client logs
+in from one address, so start the server with ``RATE_LIMIT_ENABLED=false``.
+
+    python -m benchmarks.load_test --base-url http://localhost:8000 --output run.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+API = "/api/v1"
+SCENARIOS = ("login", "catalog", "my_courses", "purchase")
+
+
+class ScenarioResult:
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: list[float] = []
+        self.status_codes: dict[str, int] = {}
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def record(self, started: float, response: httpx.Response | None) -> None:
+        self.latencies.append(time.perf_counter() - started)
+        if response is None:
+            self.errors += 1
+            return
+        code = str(response.status_code)
+        self.status_codes[code] = self.status_codes.get(code, 0) + 1
+        if response.status_code >= 400:
+            self.errors += 1
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "status_codes": self.status_codes,
+            "throughput_rps": round(len(latencies) / self.elapsed, 2) if self.elapsed else 0.0,
+            "latency_ms": {
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+                "max": round(latencies[-1] * 1000, 3) if latencies else None,
+            },
+        }
+
+
+def percentile(sorted_values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile, in milliseconds"""
+    if not sorted_values:
+        return None
+    rank = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return round(sorted_values[min(rank, len(sorted_values) - 1)] * 1000, 3)
+
+
+class LoadTest:
+
+    def __init__(self, client: httpx.AsyncClient, manifest: dict, args):
+        self.client = client
+        self.password = manifest["password"]
+        self.students = manifest["students"]
+        self.course_ids = manifest["published_course_ids"]
+        self.args = args
+        self.tokens: list[str] = []
+
+    async def login(self, username: str) -> httpx.Response:
+        return await self.client.post(
+            f"{API}/auth/login", data={"username": username, "password": self.password}
+        )
+
+    async def prepare_tokens(self) -> None:
+        """Log in one student per client up front; not part of any measurement"""
+        usernames = self.students[:self.args.concurrency]
+        responses = await asyncio.gather(*(self.login(username) for username in usernames))
+        for response in responses:
+            if response.status_code == 429:
+                raise SystemExit("Login is rate limited; start the server with RATE_LIMIT_ENABLED=false")
+            response.raise_for_status()
+        self.tokens = [response.json()["access_token"] for response in responses]
+
+    def request_for(self, scenario: str, worker: int, rng: random.Random):
+        headers = {"Authorization": f"Bearer {self.tokens[worker % len(self.tokens)]}"}
+        if scenario == "login":
+            return self.login(rng.choice(self.students))
+        if scenario == "catalog":
+            return self.client.get(f"{API}/course/courses")
+        if scenario == "my_courses":
+            return self.client.get(f"{API}/users/my_courses", headers=headers)
+        if scenario == "purchase":
+            course_id = rng.choice(self.course_ids)
+            return self.client.post(f"{API}/course/purchase_course/{course_id}", headers=headers)
+        raise ValueError(f"Unknown scenario {scenario}")
+
+    async def worker(self, scenario: str, worker: int, deadline: float, result: ScenarioResult | None) -> None:
+        rng = random.Random(f"{self.args.seed}:{scenario}:{worker}")
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await self.request_for(scenario, worker, rng)
+            except httpx.HTTPError:
+                response = None
+            if result is not None:
+                result.record(started, response)
+
+    async def run_phase(self, scenario: str, seconds: float, result: ScenarioResult | None) -> None:
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(
+            self.worker(scenario, worker, deadline, result) for worker in range(self.args.concurrency)
+        ))
+
+    async def run(self, scenario: str) -> dict:
+        await self.run_phase(scenario, self.args.warmup, None)
+        result = ScenarioResult(scenario)
+        started = time.perf_counter()
+        await self.run_phase(scenario, self.args.duration, result)
+        result.elapsed = time.perf_counter() - started
+        return result.summary()
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        load_test = LoadTest(client, manifest, args)
+        await load_test.prepare_tokens()
+        results = {}
+        for scenario in args.scenarios:
+            results[scenario] = await load_test.run(scenario)
+            print(f"{scenario}: {json.dumps(results[scenario]['latency_ms'])}")
+
+        server_stats = None
+        if args.admin_token:
+            try:
+                response = await client.get("/stats", headers={"Authorization": f"Bearer {args.admin_token}"})
+                if response.status_code == 200:
+                    server_stats = response.json()
+            except (httpx.HTTPError, ValueError):
+                pass
+
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "config": {
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "dataset_seed": manifest["seed"],
+        },
+        "scenarios": results,
+        "server_stats": server_stats,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--manifest", default="benchmarks/seed_manifest.json")
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds measured per scenario")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds per scenario")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--admin-token", help="admin access token; the report includes /stats when given")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
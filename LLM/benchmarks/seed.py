@@ -0,0 +1,205 @@
+"""Seed the database with synthetic users, courses, lessons, enrollments and progress.
+
+Data is generated from a fixed RNG seed and a fixed base date, so two runs
+with the same arguments produce identical rows. A manifest with the bench
+credentials and course ids is written for ``benchmarks.load_test``.
+
+    python -m benchmarks.seed --reset --students 5000 --courses 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from sqlalchemy import delete, func, insert, select  # noqa: E402
+
+from app.core.database import SessionLocal, engine  # noqa: E402
+from app.crud.analytics import analytics_crud  # noqa: E402
+from app.models.analytics import (  # noqa: E402
+    CourseProgressRollup, LessonCompletionHistogram, LessonProgressRollup, StudentCourseProgress
+)
+from app.core.security import get_password_hash  # noqa: E402
+from app.models.course import Content, Course, Enrollment, Lesson, Progress  # noqa: E402
+from app.models.outbox import OutboxEvent  # noqa: E402
+from app.models.user import ResetPassword, User, UserRole  # noqa: E402
+
+BENCH_PASSWORD = "bench-password"
+BASE_DATE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+CHUNK_SIZE = 1000
+WORDS = (
+    "python", "data", "web", "design", "async", "databases", "machine", "learning", "cloud",
+    "security", "testing", "algorithms", "networks", "statistics", "product", "writing",
+)
+
+# Child tables first, so --reset never trips a foreign key
+TABLES = (
+    CourseProgressRollup, StudentCourseProgress, LessonCompletionHistogram, LessonProgressRollup,
+    Progress, Content, Enrollment, Lesson, Course, ResetPassword, User, OutboxEvent,
+)
+
+
+def chunks(rows: list, size: int = CHUNK_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+async def insert_returning_ids(conn, model, rows: list[dict]) -> list[int]:
+    ids = []
+    for chunk in chunks(rows):
+        result = await conn.execute(insert(model).returning(model.id, sort_by_parameter_order=True), chunk)
+        ids.extend(result.scalars().all())
+    return ids
+
+
+async def insert_rows(conn, model, rows: list[dict]) -> None:
+    for chunk in chunks(rows):
+        await conn.execute(insert(model), chunk)
+
+
+def user_rows(prefix: str, count: int, role: UserRole, hashed_password: str, rng: random.Random) -> list[dict]:
+    return [
+        {
+            "email": f"{prefix}{i}@bench.example.com",
+            "username": f"{prefix}{i}",
+            "hashed_password": hashed_password,
+            "first_name": rng.choice(WORDS).title(),
+            "last_name": rng.choice(WORDS).title(),
+            "role": role,
+            "is_active": True,
+            "is_verified": True,
+            "created_at": BASE_DATE + timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+async def seed(args) -> dict:
+    rng = random.Random(args.seed)
+    # bcrypt is slow on purpose; every bench user shares one hash
+    hashed_password = get_password_hash(BENCH_PASSWORD)
+
+    async with engine.begin() as conn:
+        existing = await conn.scalar(select(func.count()).select_from(User))
+        if existing and not args.reset:
+            raise SystemExit(f"Database already has {existing} users; pass --reset to wipe it first")
+        if args.reset:
+            for model in TABLES:
+                await conn.execute(delete(model))
+
+        teacher_ids = await insert_returning_ids(
+            conn, User, user_rows("bench_teacher_", args.teachers, UserRole.TEACHER, hashed_password, rng)
+        )
+        student_ids = await insert_returning_ids(
+            conn, User, user_rows("bench_student_", args.students, UserRole.STUDENT, hashed_password, rng)
+        )
+
+        courses = [
+            {
+                "title": " ".join(rng.sample(WORDS, 3)).title(),
+                "description": " ".join(rng.choices(WORDS, k=30)),
+                "teacher_id": rng.choice(teacher_ids),
+                "price": Decimal(rng.randrange(0, 20000)) / 100,
+                "is_published": rng.random() < args.published_ratio,
+                "created_at": BASE_DATE + timedelta(minutes=i),
+            }
+            for i in range(args.courses)
+        ]
+        course_ids = await insert_returning_ids(conn, Course, courses)
+        published_ids = [course_id for course_id, row in zip(course_ids, courses) if row["is_published"]]
+
+        lessons = [
+            {
+                "title": f"Lesson {index + 1}",
+                "content": " ".join(rng.choices(WORDS, k=50)),
+                "course_id": course_id,
+                "order_index": index,
+                "duration_minutes": rng.randrange(5, 60),
+                "created_at": BASE_DATE,
+            }
+            for course_id in course_ids
+            for index in range(args.lessons_per_course)
+        ]
+        lesson_ids = await insert_returning_ids(conn, Lesson, lessons)
+        lessons_by_course: dict[int, list[int]] = {}
+        for lesson_id, row in zip(lesson_ids, lessons):
+            lessons_by_course.setdefault(row["course_id"], []).append(lesson_id)
+
+        enrollments = []
+        progress = []
+        for student_id in student_ids:
+            count = min(args.enrollments_per_student, len(published_ids))
+            for course_id in rng.sample(published_ids, count):
+                enrolled_at = BASE_DATE + timedelta(days=rng.randrange(365))
+                enrollments.append({
+                    "student_id": student_id,
+                    "course_id": course_id,
+                    "enrolled_at": enrolled_at,
+                    "completed_at": None,
+                })
+                for lesson_id in lessons_by_course.get(course_id, ()):
+                    if rng.random() >= args.progress_ratio:
+                        continue
+                    completion = rng.choice((25, 50, 75, 100))
+                    progress.append({
+                        "student_id": student_id,
+                        "lesson_id": lesson_id,
+                        "completed": completion == 100,
+                        "completion_percentage": completion,
+                        "time_spent_minutes": rng.randrange(1, 60),
+                        "completed_at": enrolled_at + timedelta(days=1) if completion == 100 else None,
+                    })
+        await insert_rows(conn, Enrollment, enrollments)
+        await insert_rows(conn, Progress, progress)
+
+    # Progress was inserted directly, so build the analytics rollups from it
+    async with SessionLocal() as db:
+        if not await analytics_crud.rebuild(db):
+            raise SystemExit("Another process is rebuilding the progress rollups; rerun the seed")
+
+    await engine.dispose()
+    return {
+        "seed": args.seed,
+        "password": BENCH_PASSWORD,
+        "students": [f"bench_student_{i}" for i in range(args.students)],
+        "published_course_ids": published_ids,
+        "counts": {
+            "teachers": len(teacher_ids),
+            "students": len(student_ids),
+            "courses": len(course_ids),
+            "published_courses": len(published_ids),
+            "lessons": len(lesson_ids),
+            "enrollments": len(enrollments),
+            "progress": len(progress),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--teachers", type=int, default=50)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--courses", type=int, default=500)
+    parser.add_argument("--published-ratio", type=float, default=0.9)
+    parser.add_argument("--lessons-per-course", type=int, default=10)
+    parser.add_argument("--enrollments-per-student", type=int, default=5)
+    parser.add_argument("--progress-ratio", type=float, default=0.5)
+    parser.add_argument("--reset", action="store_true", help="delete all existing rows first")
+    parser.add_argument("--manifest", default="benchmarks/seed_manifest.json")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    manifest = asyncio.run(seed(args))
+    with open(args.manifest, "w") as f:
+        json.dump(manifest, f)
+    print(json.dumps({**manifest["counts"], "seconds": round(time.perf_counter() - started, 2)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""course listing indexes and unique progress per lesson
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 23:40:02.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_courses_created_at_id', 'courses', ['created_at', 'id'], unique=False)
+    op.create_index('ix_courses_published_created_at_id', 'courses', ['is_published', 'created_at', 'id'], unique=False)
+    op.create_index('ix_courses_teacher_created_at_id', 'courses', ['teacher_id', 'created_at', 'id'], unique=False)
+
+    # Keep the newest row per (student, lesson) before enforcing uniqueness
+    op.execute(
+        "DELETE FROM progress WHERE id NOT IN "
+        "(SELECT max(id) FROM progress GROUP BY student_id, lesson_id)"
+    )
+    op.create_unique_constraint('uq_progress_student_lesson', 'progress', ['student_id', 'lesson_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_progress_student_lesson', 'progress', type_='unique')
+    op.drop_index('ix_courses_teacher_created_at_id', table_name='courses')
+    op.drop_index('ix_courses_published_created_at_id', table_name='courses')
+    op.drop_index('ix_courses_created_at_id', table_name='courses')
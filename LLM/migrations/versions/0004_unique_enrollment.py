@@ -0,0 +1,33 @@
+"""one enrollment per student and course
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:12:09.551820
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Purchases used to insert a row per retry; keep the first enrollment of each pair
+    op.execute(
+        "DELETE FROM enrollments WHERE id NOT IN "
+        "(SELECT min(id) FROM enrollments GROUP BY student_id, course_id)"
+    )
+    op.create_unique_constraint('uq_enrollments_student_course', 'enrollments', ['student_id', 'course_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_enrollments_student_course', 'enrollments', type_='unique')
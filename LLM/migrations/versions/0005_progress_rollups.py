@@ -0,0 +1,97 @@
+"""progress analytics rollups
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:41:17.208364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('lesson_progress_rollups',
+    sa.Column('lesson_id', sa.Integer(), nullable=False),
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('learners', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.Column('completion_sum', sa.BigInteger(), nullable=False),
+    sa.Column('time_spent_minutes', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.ForeignKeyConstraint(['lesson_id'], ['lessons.id'], ),
+    sa.PrimaryKeyConstraint('lesson_id')
+    )
+    op.create_index(op.f('ix_lesson_progress_rollups_course_id'), 'lesson_progress_rollups', ['course_id'], unique=False)
+    op.create_table('lesson_completion_histograms',
+    sa.Column('lesson_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.Integer(), nullable=False),
+    sa.Column('learners', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['lesson_id'], ['lessons.id'], ),
+    sa.PrimaryKeyConstraint('lesson_id', 'bucket')
+    )
+    op.create_table('student_course_progress',
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('lessons_started', sa.Integer(), nullable=False),
+    sa.Column('lessons_completed', sa.Integer(), nullable=False),
+    sa.Column('time_spent_minutes', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('student_id', 'course_id')
+    )
+    op.create_table('course_progress_rollups',
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('learners', sa.Integer(), nullable=False),
+    sa.Column('completed_learners', sa.Integer(), nullable=False),
+    sa.Column('time_spent_minutes', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.PrimaryKeyConstraint('course_id')
+    )
+
+    # Backfill from existing progress; afterwards progress flushes keep them current
+    op.execute(
+        "INSERT INTO lesson_progress_rollups "
+        "(lesson_id, course_id, learners, completed, completion_sum, time_spent_minutes) "
+        "SELECT l.id, l.course_id, count(*), sum(CASE WHEN p.completed THEN 1 ELSE 0 END), "
+        "sum(p.completion_percentage), sum(p.time_spent_minutes) "
+        "FROM lessons l JOIN progress p ON p.lesson_id = l.id GROUP BY l.id, l.course_id"
+    )
+    op.execute(
+        "INSERT INTO lesson_completion_histograms (lesson_id, bucket, learners) "
+        "SELECT lesson_id, completion_percentage / 10, count(*) FROM progress "
+        "GROUP BY lesson_id, completion_percentage / 10"
+    )
+    op.execute(
+        "INSERT INTO student_course_progress "
+        "(student_id, course_id, lessons_started, lessons_completed, time_spent_minutes) "
+        "SELECT p.student_id, l.course_id, count(*), sum(CASE WHEN p.completed THEN 1 ELSE 0 END), "
+        "sum(p.time_spent_minutes) "
+        "FROM progress p JOIN lessons l ON l.id = p.lesson_id GROUP BY p.student_id, l.course_id"
+    )
+    op.execute(
+        "INSERT INTO course_progress_rollups (course_id, learners, completed_learners, time_spent_minutes) "
+        "SELECT s.course_id, count(*), sum(CASE WHEN s.lessons_completed >= c.lessons THEN 1 ELSE 0 END), "
+        "sum(s.time_spent_minutes) "
+        "FROM student_course_progress s "
+        "JOIN (SELECT course_id, count(*) AS lessons FROM lessons GROUP BY course_id) c ON c.course_id = s.course_id "
+        "GROUP BY s.course_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('course_progress_rollups')
+    op.drop_table('student_course_progress')
+    op.drop_table('lesson_completion_histograms')
+    op.drop_index(op.f('ix_lesson_progress_rollups_course_id'), table_name='lesson_progress_rollups')
+    op.drop_table('lesson_progress_rollups')
@@ -0,0 +1,37 @@
+"""one reset request per email, purge index
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 02:05:43.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Only the latest request of each email could still be verified
+    op.execute(
+        "DELETE FROM resetpasswords WHERE id NOT IN "
+        "(SELECT max(id) FROM resetpasswords GROUP BY email)"
+    )
+    op.drop_index(op.f('ix_resetpasswords_email'), table_name='resetpasswords')
+    op.create_index(op.f('ix_resetpasswords_email'), 'resetpasswords', ['email'], unique=True)
+    op.create_index(op.f('ix_resetpasswords_created_at'), 'resetpasswords', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_resetpasswords_created_at'), table_name='resetpasswords')
+    op.drop_index(op.f('ix_resetpasswords_email'), table_name='resetpasswords')
+    op.create_index(op.f('ix_resetpasswords_email'), 'resetpasswords', ['email'], unique=False)
@@ -0,0 +1,31 @@
+"""index courses.updated_at and set it on insert
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 15:21:09.604417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, Sequence[str], None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("UPDATE courses SET updated_at = created_at WHERE updated_at IS NULL")
+    op.alter_column('courses', 'updated_at', existing_type=sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False)
+    op.create_index(op.f('ix_courses_updated_at'), 'courses', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_courses_updated_at'), table_name='courses')
+    op.alter_column('courses', 'updated_at', existing_type=sa.DateTime(timezone=True), server_default=None, nullable=True)
@@ -0,0 +1,34 @@
+import os
+
+os.environ.setdefault("DATABASE_URL1", "sqlite+aiosqlite://")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("DB_SCHEMA_CHECK", "false")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import pytest  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+import app.models  # noqa: E402,F401  registers every table on Base.metadata
+from app.core.database import Base  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def engine():
+    """A fresh in-memory SQLite database with every table created"""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def db(engine):
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        yield session
@@ -0,0 +1,116 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import literal_column, select, text
+
+from app.crud import analytics, progress
+from app.crud.analytics import analytics_crud
+from app.crud.progress import progress_crud
+from app.models import Course, Enrollment, Lesson, User
+from app.models.analytics import (
+    CourseProgressRollup,
+    LessonCompletionHistogram,
+    LessonProgressRollup,
+    StudentCourseProgress,
+)
+from app.models.user import UserRole
+
+pytestmark = pytest.mark.anyio
+
+ROLLUPS = (LessonProgressRollup, LessonCompletionHistogram, StudentCourseProgress, CourseProgressRollup)
+
+
+@pytest.fixture
+async def sqlite_shims(engine, monkeypatch):
+    """Stand-ins for the Postgres-only pieces of the progress upsert and rebuild"""
+    def functions(conn):
+        connection = conn.connection.dbapi_connection  # the single StaticPool connection
+        connection.create_function("greatest", 2, max)
+        connection.create_function("pg_try_advisory_xact_lock", 1, lambda key: 1)
+
+    async with engine.connect() as conn:
+        await conn.run_sync(functions)
+
+    # SQLite has no xmax; the lock_progress snapshot still tells inserts from updates
+    monkeypatch.setattr(progress, "INSERTED", literal_column("1").label("inserted"))
+    monkeypatch.setattr(analytics, "text", lambda sql: text("SELECT 1"))  # no LOCK TABLE either
+
+
+@pytest.fixture
+async def course(db, sqlite_shims):
+    db.add_all([
+        User(id=id, email=f"user{id}@example.com", username=f"user{id}", hashed_password="x",
+             first_name="Test", last_name="User", role=UserRole.STUDENT)
+        for id in (1, 2, 3, 4)
+    ])
+    db.add(Course(id=1, title="Python", teacher_id=1, price=Decimal("10.00"), is_published=True))
+    db.add_all([Lesson(id=id, title=f"Lesson {id}", course_id=1, order_index=id) for id in (1, 2)])
+    db.add_all([Enrollment(student_id=id, course_id=1) for id in (2, 3)])
+    await db.commit()
+    return db
+
+
+def heartbeat(student_id: int, lesson_id: int, percentage: int, minutes: int) -> dict:
+    return {
+        "student_id": student_id,
+        "lesson_id": lesson_id,
+        "completion_percentage": percentage,
+        "time_spent_minutes": minutes,
+        "completed": percentage >= 100,
+        "completed_at": datetime.now(timezone.utc) if percentage >= 100 else None,
+    }
+
+
+async def snapshot(db) -> dict:
+    tables = {}
+    for model in ROLLUPS:
+        rows = (await db.execute(select(model))).scalars().all()
+        columns = [column.key for column in model.__table__.columns]
+        tables[model.__tablename__] = sorted(
+            tuple(getattr(row, name) for name in columns) for row in rows
+            if not (model is LessonCompletionHistogram and row.learners == 0)
+        )
+    return tables
+
+
+async def test_upserts_fold_into_the_rollups(course):
+    written = await progress_crud.upsert_many(course, [
+        heartbeat(2, 1, 40, 10),
+        heartbeat(3, 1, 100, 5),
+        heartbeat(4, 1, 100, 5),  # not enrolled, dropped
+    ])
+    assert written == 2
+    await progress_crud.upsert_many(course, [
+        heartbeat(2, 1, 100, 7),
+        heartbeat(2, 2, 100, 3),
+        heartbeat(3, 1, 20, 1),  # completion never moves backwards
+    ])
+
+    lesson = await course.get(LessonProgressRollup, 1)
+    assert (lesson.learners, lesson.completed, lesson.completion_sum, lesson.time_spent_minutes) == (2, 2, 200, 23)
+    buckets = (await course.execute(
+        select(LessonCompletionHistogram.bucket, LessonCompletionHistogram.learners)
+        .where(LessonCompletionHistogram.lesson_id == 1, LessonCompletionHistogram.learners != 0)
+    )).all()
+    assert buckets == [(10, 2)]
+
+    student = await course.get(StudentCourseProgress, (2, 1))
+    assert (student.lessons_started, student.lessons_completed, student.time_spent_minutes) == (2, 2, 20)
+    totals = await course.get(CourseProgressRollup, 1)
+    assert (totals.learners, totals.completed_learners, totals.time_spent_minutes) == (2, 1, 26)
+
+
+async def test_incremental_rollups_match_a_rebuild(course):
+    for batch in (
+        [heartbeat(2, 1, 30, 4), heartbeat(3, 2, 60, 2)],
+        [heartbeat(2, 1, 70, 4), heartbeat(2, 2, 100, 9), heartbeat(3, 1, 100, 1)],
+        [heartbeat(3, 2, 100, 3), heartbeat(2, 1, 100, 2)],
+    ):
+        await progress_crud.upsert_many(course, batch)
+    incremental = await snapshot(course)
+
+    assert await analytics_crud.rebuild(course)
+    course.expire_all()
+    assert await snapshot(course) == incremental
+    assert (await course.get(CourseProgressRollup, 1)).completed_learners == 2
@@ -0,0 +1,123 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.routes import auth
+from app.core.database import get_db
+from app.core.security import create_access_token, password_hasher
+from app.core.tokens import MemoryRevocationBackend, TokenRevocationList
+from app.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def revoked(monkeypatch):
+    revoked = TokenRevocationList(MemoryRevocationBackend(), family_lifetime=3600)
+    monkeypatch.setattr(auth, "revoked_tokens", revoked)
+    return revoked
+
+
+@pytest.fixture
+async def user(db):
+    user = User(
+        email="login@example.com", username="login", hashed_password=await password_hasher.hash("secret-password"),
+        first_name="Log", last_name="In",
+    )
+    db.add(user)
+    await db.commit()
+    return user
+
+
+@pytest.fixture
+async def client(db, revoked):
+    app = FastAPI()
+    app.include_router(auth.router)
+
+    async def override_db():
+        yield db
+
+    app.dependency_overrides[get_db] = override_db
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def test_register_returns_the_public_user(client):
+    response = await client.post("/register", params={
+        "email": "new@example.com", "username": "new", "password": "secret-password",
+        "first_name": "New", "last_name": "User",
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["username"] == "new"
+    assert body["is_active"] is True
+    assert "hashed_password" not in body
+    assert "credential_version" not in body
+
+
+async def test_reset_password_hides_unknown_emails(client):
+    response = await client.post("/reset-password", params={"email": "nobody@example.com"})
+    assert response.status_code == 200
+    assert response.json() == {"message": "If the email exists, an OTP code has been sent", "reset_id": 0}
+
+
+async def test_reset_password_verify_rejects_bad_codes(client):
+    response = await client.post("/reset-password/verify", params={
+        "reset_id": 1, "otp_code": "1234", "new_password": "another-password",
+    })
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid or expired OTP code"}
+
+
+async def login(client) -> str:
+    response = await client.post("/login", data={"username": "login", "password": "secret-password"})
+    assert response.status_code == 200
+    return response.json()["refresh_token"]
+
+
+async def refresh(client, token: str) -> httpx.Response:
+    return await client.post("/refresh", json={"refresh_token": token})
+
+
+async def test_refresh_tokens_rotate_and_work_once(client, user, revoked):
+    first = await login(client)
+    response = await refresh(client, first)
+    assert response.status_code == 200
+    second = response.json()["refresh_token"]
+    assert second != first
+    assert response.json()["access_token"]
+
+    # Replaying a used token revokes the whole login, including the token it was rotated into
+    assert (await refresh(client, first)).status_code == 401
+    assert (await refresh(client, second)).status_code == 401
+    assert revoked.stats()["reuse_detected"] == 1
+
+
+async def test_logout_revokes_the_login(client, user):
+    first = await login(client)
+    second = (await refresh(client, first)).json()["refresh_token"]
+    other = await login(client)
+
+    assert (await client.post("/logout", json={"refresh_token": second})).status_code == 204
+    assert (await refresh(client, second)).status_code == 401
+    assert (await refresh(client, other)).status_code == 200
+
+
+async def test_a_credential_change_retires_refresh_tokens(client, db, user):
+    token = await login(client)
+    user.credential_version += 1
+    await db.commit()
+
+    assert (await refresh(client, token)).status_code == 401
+
+
+async def test_access_tokens_are_not_refresh_tokens(client, user):
+    response = await refresh(client, create_access_token(subject="login"))
+    assert response.status_code == 401
+
+
+async def test_refresh_is_unavailable_when_disabled(client, user, revoked):
+    revoked.enabled = False
+    response = await client.post("/login", data={"username": "login", "password": "secret-password"})
+    assert response.json()["refresh_token"] is None
+    assert (await refresh(client, "anything")).status_code == 503
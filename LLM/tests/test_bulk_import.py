@@ -0,0 +1,96 @@
+import pytest
+from passlib.hash import bcrypt
+from sqlalchemy import event, select
+
+from app.core import bulk_import
+from app.core.bulk_import import import_users, iter_records
+from app.core.events import USER_REGISTERED
+from app.core.security import PasswordHasher
+from app.crud import user as user_module
+from app.crud.user import user_crud
+from app.models import User
+from app.models.outbox import OutboxEvent
+from app.models.user import UserRole
+
+pytestmark = pytest.mark.anyio
+
+EXISTING_HASH = bcrypt.using(rounds=4).hash("kept-password")
+
+
+@pytest.fixture
+def hasher(monkeypatch):
+    hasher = PasswordHasher("thread", workers=1, max_pending=10, bulk_workers=1, bulk_rounds=4)
+    monkeypatch.setattr(bulk_import, "password_hasher", hasher)
+    monkeypatch.setattr(user_module, "password_hasher", hasher)
+    monkeypatch.setattr(bulk_import.settings, "IMPORT_CHUNK_SIZE", 3)
+    yield hasher
+    hasher.shutdown()
+
+
+async def upload(*lines: str):
+    async def chunks():
+        for line in lines:
+            yield (line + "\n").encode()
+    return iter_records(chunks(), "csv")
+
+
+@pytest.fixture
+async def existing_user(db):
+    db.add(User(
+        id=1, email="taken@example.com", username="taken", hashed_password="x",
+        first_name="Old", last_name="User", role=UserRole.STUDENT,
+    ))
+    await db.commit()
+
+
+async def test_import_users_reports_each_bad_row(engine, db, hasher, existing_user):
+    inserts = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO users"):
+            inserts.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        report = await import_users(db, await upload(
+            "email,username,first_name,last_name,password,password_hash",
+            "a@example.com,alice,Alice,A,alice-password,",
+            f"b@example.com,bob,Bob,B,,{EXISTING_HASH}",
+            "a@example.com,alice2,Alice,Again,other-password,",
+            "c@example.com,carol,Carol,C,,",
+            "taken@example.com,newname,Taken,T,pw,",
+            "d@example.com,dave,Dave,D,dave-password,",
+            "e@example.com,erin,Erin",
+        ))
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+    assert report["processed"] == 7
+    assert report["created"] == 3
+    assert report["failed"] == 4
+    assert [error["row"] for error in report["errors"]] == [3, 4, 5, 7]
+    assert report["errors"][0]["error"] == "duplicate email or username earlier in this upload"
+    assert "exactly one of password or password_hash" in report["errors"][1]["error"]
+    assert report["errors"][2]["error"] == "a user with this email or username already exists"
+    assert report["errors"][3]["error"] == "expected 6 columns, got 3"
+    assert len(inserts) == 2  # one multi-row INSERT per chunk of three
+    assert hasher.stats()["bulk_hashed"] == 3
+
+    usernames = set((await db.execute(select(User.username))).scalars())
+    assert usernames == {"taken", "alice", "bob", "dave"}
+    events = (await db.execute(select(OutboxEvent.topic))).scalars().all()
+    assert events == [USER_REGISTERED] * 3
+
+
+async def test_imported_hashes_are_upgraded_at_login(db, hasher):
+    await import_users(db, await upload(
+        "email,username,first_name,last_name,password",
+        "a@example.com,alice,Alice,A,alice-password",
+    ))
+    imported = (await db.execute(select(User.hashed_password))).scalar_one()
+    assert bcrypt.from_string(imported).rounds == 4
+
+    user = await user_crud.authenticate(db, "alice", "alice-password")
+    assert user is not None
+    assert bcrypt.from_string(user.hashed_password).rounds == 12
+    assert await user_crud.authenticate(db, "alice", "alice-password") is not None
@@ -0,0 +1,121 @@
+import fakeredis
+import pytest
+
+from app.core.cache import Cache, MemoryCacheBackend, RedisCacheBackend
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(params=["memory", "redis"])
+async def backend(request):
+    if request.param == "memory":
+        backend = MemoryCacheBackend(max_entries=100)
+    else:
+        backend = RedisCacheBackend("redis://localhost:6379")
+        backend._redis = fakeredis.FakeAsyncRedis()
+    yield backend
+    await backend.close()
+
+
+async def test_set_get_delete(backend):
+    await backend.set("a", b"1")
+    assert await backend.get("a") == b"1"
+    await backend.delete("a")
+    assert await backend.get("a") is None
+
+
+async def test_invalidate_tags_drops_only_tagged_keys(backend):
+    await backend.set("course:1", b"1", tags=["course:1", "catalog"])
+    await backend.set("course:2", b"2", tags=["course:2", "catalog"])
+    await backend.set("other", b"3")
+
+    await backend.invalidate_tags("course:1")
+    assert await backend.get("course:1") is None
+    assert await backend.get("course:2") == b"2"
+
+    await backend.invalidate_tags("catalog")
+    assert await backend.get("course:2") is None
+    assert await backend.get("other") == b"3"
+
+
+async def test_invalidating_an_unknown_tag_is_a_no_op(backend):
+    await backend.set("a", b"1", tags=["x"])
+    await backend.invalidate_tags("missing")
+    assert await backend.get("a") == b"1"
+
+
+async def test_get_or_compute_caches_until_invalidated(backend):
+    cache = Cache(backend, default_ttl=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"calls": len(calls)}
+
+    assert await cache.get_or_compute("k", compute, tags=["t"]) == {"calls": 1}
+    assert await cache.get_or_compute("k", compute, tags=["t"]) == {"calls": 1}
+    await cache.invalidate_tags("t")
+    assert await cache.get_or_compute("k", compute, tags=["t"]) == {"calls": 2}
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+async def test_write_is_skipped_after_its_tag_is_invalidated(backend):
+    versions = await backend.tag_versions(["t"])
+    await backend.invalidate_tags("t")
+    assert not await backend.set("k", b"stale", tags=["t"], versions=versions)
+    assert await backend.get("k") is None
+    assert await backend.set("k", b"fresh", tags=["t"], versions=await backend.tag_versions(["t"]))
+    assert await backend.get("k") == b"fresh"
+
+
+async def test_compute_racing_an_invalidation_is_not_cached(backend):
+    cache = Cache(backend, default_ttl=60)
+
+    async def compute():
+        await cache.invalidate_tags("t")  # e.g. a write commits while the query runs
+        return "stale"
+
+    assert await cache.get_or_compute("k", compute, tags=["t"]) == "stale"
+    assert await cache.get("k") is None
+    assert cache.stale_writes == 1
+
+
+async def test_values_round_trip_as_json(backend):
+    cache = Cache(backend, default_ttl=60)
+
+    async def compute():
+        return ("Your courses:", [{"id": 1}])
+
+    # A miss returns what a later hit will, not the original tuple
+    assert await cache.get_or_compute("k", compute) == ["Your courses:", [{"id": 1}]]
+    assert await cache.get_or_compute("k", compute) == ["Your courses:", [{"id": 1}]]
+    assert await backend.get("k") == b'["Your courses:",[{"id":1}]]'
+
+
+async def test_memory_eviction_prunes_tags():
+    backend = MemoryCacheBackend(max_entries=2)
+    await backend.set("a", b"1", tags=["course:1"])
+    await backend.set("b", b"2", tags=["course:2"])
+    await backend.set("c", b"3", tags=["course:3"])  # evicts "a"
+    assert set(backend._tags) == {"course:2", "course:3"}
+
+    await backend.set("d", b"4", ttl=60, tags=["course:4"])
+    backend._entries["d"] = (0.0, *backend._entries["d"][1:])  # expire it
+    assert await backend.get("d") is None
+    assert set(backend._tags) == {"course:3"}
+
+    await backend.set("c", b"3", tags=["catalog"])  # re-tagging drops the old tag
+    assert set(backend._tags) == {"catalog"}
+
+
+async def test_redis_tag_sets_expire_with_their_longest_member():
+    backend = RedisCacheBackend("redis://localhost:6379")
+    backend._redis = fakeredis.FakeAsyncRedis()
+    await backend.set("a", b"1", ttl=100, tags=["t"])
+    await backend.set("b", b"2", ttl=500, tags=["t"])
+    await backend.set("c", b"3", ttl=50, tags=["t"])
+    assert 400 < await backend._redis.ttl("lms:tag:t") <= 500
+
+    await backend.invalidate_tags("t")
+    assert not await backend._redis.exists("lms:tag:t", "lms:a", "lms:b", "lms:c")
+    await backend.close()
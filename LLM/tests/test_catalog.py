@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.routes import course
+from app.core.cache import Cache, MemoryCacheBackend
+from app.core.database import get_read_db
+from app.crud import course as course_module
+from app.crud.course import course_crud
+from app.models import Course, User
+from app.models.user import UserRole
+from app.schemas.course import DEFAULT_PAGE_SIZE
+
+pytestmark = pytest.mark.anyio
+
+COURSES = 120
+
+
+@pytest.fixture
+async def catalog(db, monkeypatch):
+    monkeypatch.setattr(course_module, "cache", Cache(MemoryCacheBackend(max_entries=100), default_ttl=300))
+    db.add(User(
+        id=1, email="teacher@example.com", username="teacher", hashed_password="x",
+        first_name="Test", last_name="Teacher", role=UserRole.TEACHER,
+    ))
+    started = datetime(2026, 1, 1)
+    db.add_all([
+        Course(
+            id=id, title=f"Course {id}", teacher_id=1, price=Decimal(id),
+            is_published=id % 10 != 0, created_at=started + timedelta(minutes=id),
+        )
+        for id in range(1, COURSES + 1)
+    ])
+    await db.commit()
+    return db
+
+
+@pytest.fixture
+async def client(catalog):
+    app = FastAPI()
+    app.include_router(course.router)
+
+    async def override_db():
+        yield catalog
+
+    app.dependency_overrides[get_read_db] = override_db
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def walk(client, **params) -> list[httpx.Response]:
+    pages = [await client.get("/courses", params=params)]
+    while pages[-1].json()["next_cursor"]:
+        pages.append(await client.get("/courses", params={**params, "cursor": pages[-1].json()["next_cursor"]}))
+    return pages
+
+
+async def test_every_catalog_page_has_an_etag(client):
+    pages = await walk(client)
+    ids = [c["id"] for page in pages for c in page.json()["courses:"]]
+    assert ids == [id for id in range(COURSES, 0, -1) if id % 10 != 0]
+    assert len(pages[0].json()["courses:"]) == DEFAULT_PAGE_SIZE
+    assert all(page.headers.get("etag") for page in pages)
+    assert len({page.headers["etag"] for page in pages}) == len(pages)
+
+    cursor = pages[0].json()["next_cursor"]
+    second = await client.get(
+        "/courses", params={"cursor": cursor}, headers={"If-None-Match": pages[1].headers["etag"]}
+    )
+    assert second.status_code == 304
+
+
+async def test_catalog_pages_are_served_from_the_cache(client, catalog):
+    first = await walk(client)
+    await catalog.execute(Course.__table__.update().values(title="Renamed"))
+    await catalog.commit()
+    assert [page.json() for page in await walk(client)] == [page.json() for page in first]
+
+    await course_crud.refresh_catalog(catalog)
+    titles = {c["title"] for page in await walk(client) for c in page.json()["courses:"]}
+    assert titles == {"Renamed"}
+
+
+async def test_equivalent_cursors_share_a_snapshot(client):
+    cursor = (await client.get("/courses")).json()["next_cursor"]
+    padded = cursor + "=" * (-len(cursor) % 4)
+    a = await client.get("/courses", params={"cursor": cursor})
+    b = await client.get("/courses", params={"cursor": padded})
+    assert a.headers["etag"] == b.headers["etag"]
+    assert course_module.cache.misses == 2
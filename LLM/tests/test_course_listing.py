@@ -0,0 +1,90 @@
+from datetime import datetime
+from decimal import Decimal
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.routes import course
+from app.core.database import get_read_db
+from app.crud.course import course_crud, encode_cursor
+from app.models import Course, User
+from app.models.user import UserRole
+from app.schemas.course import MAX_PAGE_SIZE
+
+pytestmark = pytest.mark.anyio
+
+SAME_TIME = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+async def courses(db):
+    db.add_all([
+        User(
+            id=id, email=f"teacher{id}@example.com", username=f"teacher{id}", hashed_password="x",
+            first_name="Test", last_name="Teacher", role=UserRole.TEACHER,
+        )
+        for id in (1, 2)
+    ])
+    # Every course shares one created_at, so only the id breaks ties between pages
+    db.add_all([
+        Course(
+            id=id, title=f"Course {id}", teacher_id=1 + id % 2, price=Decimal(id),
+            is_published=True, created_at=SAME_TIME,
+        )
+        for id in range(1, 31)
+    ])
+    await db.commit()
+    return db
+
+
+@pytest.fixture
+async def client(courses):
+    app = FastAPI()
+    app.include_router(course.router)
+
+    async def override_db():
+        yield courses
+
+    app.dependency_overrides[get_read_db] = override_db
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.parametrize("limit", [0, MAX_PAGE_SIZE + 1])
+async def test_page_size_is_bounded(client, limit):
+    response = await client.get("/courses", params={"limit": limit})
+    assert response.status_code == 422
+
+
+async def test_keyset_pages_cover_every_course_once(client):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 7, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get("/courses", params=params)).json()
+        assert len(page["courses:"]) <= 7
+        seen += [c["id"] for c in page["courses:"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == list(range(30, 0, -1))
+
+
+async def test_filters_and_projection_apply_on_every_page(client):
+    params = {"limit": 4, "teacher_id": 1, "min_price": 5, "max_price": 20, "fields": "title,price"}
+    first = (await client.get("/courses", params=params)).json()
+    second = (await client.get("/courses", params={**params, "cursor": first["next_cursor"]})).json()
+    courses = first["courses:"] + second["courses:"]
+    assert [c["id"] for c in courses] == [20, 18, 16, 14, 12, 10, 8, 6]
+    assert all(set(c) == {"id", "title", "price"} for c in courses)
+
+
+async def test_invalid_cursors_are_rejected(client):
+    response = await client.get("/courses", params={"cursor": "not-a-cursor", "limit": 5})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+async def test_cursor_resumes_after_the_last_row(courses):
+    rows, _ = await course_crud.list_courses(courses, limit=3, cursor=encode_cursor(SAME_TIME, 10))
+    assert [row["id"] for row in rows] == [9, 8, 7]
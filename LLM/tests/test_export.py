@@ -0,0 +1,91 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.deps import get_current_superuser
+from app.api.routes import admin
+from app.core import export
+from app.models import Course, Enrollment, User
+from app.models.user import UserRole
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def client(engine, db, monkeypatch):
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(export, "read_session", lambda last_write=None: sessions())
+    monkeypatch.setattr(export.settings, "EXPORT_YIELD_PER", 2)
+
+    db.add_all([
+        User(id=id, email=f"user{id}@example.com", username=f"user{id}", hashed_password="x",
+             first_name="Test", last_name="User", role=UserRole.STUDENT)
+        for id in (1, 2, 3)
+    ])
+    db.add_all([
+        Course(id=id, title=f"Course {id}", teacher_id=1, price=Decimal("9.50"), is_published=True,
+               created_at=datetime(2025, 1, id))
+        for id in (1, 2, 3)
+    ])
+    db.add_all([
+        Enrollment(id=1, student_id=2, course_id=1, enrolled_at=datetime(2025, 3, 1, 12)),
+        Enrollment(id=2, student_id=3, course_id=1, enrolled_at=datetime(2025, 3, 2, 12)),
+        Enrollment(id=3, student_id=2, course_id=2, enrolled_at=datetime(2025, 3, 3, 12)),
+    ])
+    await db.commit()
+
+    app = FastAPI()
+    app.include_router(admin.router)
+    app.dependency_overrides[get_current_superuser] = lambda: User(id=1, username="admin", role=UserRole.ADMIN)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def test_exports_csv_with_a_header(client):
+    response = await client.get("/export/courses")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"].endswith('.csv"')
+
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["id", "title", "description", "teacher_id", "price", "is_published", "created_at", "updated_at"]
+    assert [row[:2] for row in rows[1:]] == [["1", "Course 1"], ["2", "Course 2"], ["3", "Course 3"]]
+    assert rows[1][4] == "9.50"
+
+
+async def test_exports_gzipped_ndjson(client):
+    response = await client.get("/export/courses", params={"format": "ndjson", "gzip": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"].endswith('.ndjson.gz"')
+
+    lines = gzip.decompress(response.content).decode().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [record["id"] for record in records] == [1, 2, 3]
+    assert records[0]["price"] == 9.5
+    assert records[0]["created_at"].startswith("2025-01-01T00:00:00")
+
+
+async def test_date_range_is_inclusive_exclusive(client):
+    response = await client.get("/export/enrollments", params={
+        "format": "ndjson", "date_from": "2025-03-02T12:00:00", "date_to": "2025-03-03T12:00:00Z",
+    })
+    assert response.status_code == 200
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [2]
+
+
+async def test_rejects_bad_requests(client):
+    response = await client.get("/export/enrollments", params={
+        "date_from": "2025-03-03T00:00:00", "date_to": "2025-03-02T00:00:00",
+    })
+    assert response.status_code == 422
+    assert (await client.get("/export/users")).status_code == 422
+    assert (await client.get("/export/courses", params={"format": "xml"})).status_code == 422
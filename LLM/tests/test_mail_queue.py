@@ -0,0 +1,114 @@
+from email.message import EmailMessage
+
+import aiosmtplib
+import pytest
+
+from app.core.mail_queue import MailQueue, SMTPConnectionPool
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeSMTP:
+    """Stands in for ``aiosmtplib.SMTP``; ``failures`` maps a recipient to the errors to raise, in order"""
+
+    def __init__(self, outbox: list, failures: dict):
+        self.outbox = outbox
+        self.failures = failures
+        self.is_connected = True
+
+    async def send_message(self, message):
+        errors = self.failures.get(message["To"])
+        if errors:
+            raise errors.pop(0)
+        self.outbox.append(message["To"])
+
+    async def quit(self):
+        self.is_connected = False
+
+    def close(self):
+        self.is_connected = False
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    outbox, failures, clients = [], {}, []
+
+    async def connect(pool):
+        pool.connects += 1
+        client = FakeSMTP(outbox, failures)
+        clients.append(client)
+        return client
+
+    monkeypatch.setattr(SMTPConnectionPool, "_connect", connect)
+    return outbox, failures, clients
+
+
+def make_queue(size: int = 1, max_retries: int = 3, max_size: int = 100) -> MailQueue:
+    pool = SMTPConnectionPool(hostname="smtp.test", port=25, username=None, password=None, start_tls=False, size=size)
+    return MailQueue(pool, batch_size=10, max_retries=max_retries, retry_backoff=0.001, max_size=max_size,
+                     dead_letter_size=10)
+
+
+def message(to: str) -> EmailMessage:
+    msg = EmailMessage()
+    msg["To"] = to
+    msg.set_content("hello")
+    return msg
+
+
+async def test_batch_shares_one_connection(smtp):
+    outbox, _, clients = smtp
+    queue = make_queue()
+    for i in range(5):
+        queue.enqueue(message(f"user{i}@example.com"))
+    queue.start()
+    await queue.stop()
+
+    assert outbox == [f"user{i}@example.com" for i in range(5)]
+    assert len(clients) == 1
+    assert queue.stats()["sent"] == 5
+
+
+async def test_transient_failure_is_retried(smtp):
+    outbox, failures, _ = smtp
+    failures["a@example.com"] = [aiosmtplib.SMTPResponseException(451, "try later")]
+    queue = make_queue()
+    queue.enqueue(message("a@example.com"))
+    queue.start()
+    await queue.stop()
+
+    assert outbox == ["a@example.com"]
+    assert (queue.failed_attempts, len(queue.dead_letters)) == (1, 0)
+
+
+async def test_gives_up_after_max_retries(smtp):
+    outbox, failures, _ = smtp
+    failures["a@example.com"] = [aiosmtplib.SMTPResponseException(451, "try later")] * 3
+    queue = make_queue(max_retries=3)
+    queue.enqueue(message("a@example.com"))
+    queue.start()
+    await queue.stop()
+
+    assert outbox == []
+    assert [mail.attempts for mail in queue.dead_letters] == [3]
+
+
+async def test_refused_recipient_is_not_retried(smtp):
+    outbox, failures, clients = smtp
+    failures["bad@example.com"] = [aiosmtplib.SMTPRecipientsRefused([])]
+    queue = make_queue()
+    queue.enqueue(message("bad@example.com"))
+    queue.enqueue(message("good@example.com"))
+    queue.start()
+    await queue.stop()
+
+    assert outbox == ["good@example.com"]
+    assert queue.failed_attempts == 1 and len(queue.dead_letters) == 1
+    assert len(clients) == 1
+
+
+def test_full_queue_drops_messages():
+    queue = make_queue(max_size=1)
+    assert queue.enqueue(message("a@example.com"))
+    assert not queue.enqueue(message("b@example.com"))
+    assert queue.dropped == 1
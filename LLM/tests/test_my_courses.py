@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.crud.user import user_crud
+from app.models import Course, Enrollment, Lesson, Progress, User
+from app.models.user import UserRole
+
+pytestmark = pytest.mark.anyio
+
+
+def make_user(id: int, role: UserRole) -> User:
+    return User(
+        id=id, email=f"user{id}@example.com", username=f"user{id}", hashed_password="x",
+        first_name="Test", last_name="User", role=role,
+    )
+
+
+@pytest.fixture
+async def enrolled_student(db):
+    db.add_all([make_user(1, UserRole.TEACHER), make_user(2, UserRole.STUDENT)])
+    db.add_all([
+        Course(id=1, title="Python", teacher_id=1, price=Decimal("10.00"), is_published=True),
+        Course(id=2, title="SQL", teacher_id=1, price=Decimal("0.00"), is_published=True),
+        Course(id=3, title="Not enrolled", teacher_id=1, price=Decimal("5.00"), is_published=True),
+    ])
+    db.add_all([
+        Lesson(id=1, title="Intro", course_id=1, order_index=0, duration_minutes=10),
+        Lesson(id=2, title="Loops", course_id=1, order_index=1, duration_minutes=20),
+        Lesson(id=3, title="Other", course_id=3, order_index=0, duration_minutes=30),
+    ])
+    db.add_all([Enrollment(student_id=2, course_id=1), Enrollment(student_id=2, course_id=2)])
+    db.add_all([
+        Progress(student_id=2, lesson_id=1, completion_percentage=100, completed=True),
+        Progress(student_id=2, lesson_id=2, completion_percentage=50),
+    ])
+    await db.commit()
+    return 2
+
+
+async def test_my_courses_is_one_query(engine, db, enrolled_student):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        message, courses = await user_crud.get_my_course(db, id=enrolled_student)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+    assert len(statements) == 1, statements
+    assert message == "Your courses:"
+    assert [(c["id"], c["lesson_count"], c["total_duration_minutes"], c["completion_percentage"]) for c in courses] == [
+        (1, 2, 30, 75.0),
+        (2, 0, 0, 0.0),
+    ]
+
+
+async def test_my_courses_without_enrollments(db):
+    db.add(make_user(5, UserRole.STUDENT))
+    await db.commit()
+    assert await user_crud.get_my_course(db, id=5) == {"message": "You do not have any courses yet"}
@@ -0,0 +1,43 @@
+import httpx
+import pytest
+
+from app.api.deps import get_current_superuser
+from app.core.config import settings
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def client():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+async def test_stats_requires_a_login(client):
+    response = await client.get("/stats")
+    assert response.status_code == 401
+
+
+async def test_stats_are_served_to_admins(client):
+    app.dependency_overrides[get_current_superuser] = lambda: None
+    response = await client.get("/stats")
+    assert response.status_code == 200
+    assert "password_hasher" in response.json()
+
+
+async def test_metrics_are_off_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    response = await client.get("/metrics")
+    assert response.status_code == 404
+
+
+async def test_metrics_require_the_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    assert (await client.get("/metrics")).status_code == 401
+    assert (await client.get("/metrics", headers={"Authorization": "Bearer wrong"})).status_code == 401
+
+    response = await client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
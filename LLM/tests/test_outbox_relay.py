@@ -0,0 +1,88 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core import outbox_relay as relay_module
+from app.core.events import InMemoryBroker
+from app.core.outbox_relay import OutboxRelay
+from app.crud.outbox import outbox_crud
+from app.models.outbox import OutboxEvent
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def sessions(engine, monkeypatch):
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(relay_module, "SessionLocal", sessions)
+    return sessions
+
+
+def make_relay(broker: InMemoryBroker, publish_concurrency: int = 4) -> OutboxRelay:
+    return OutboxRelay(
+        broker, batch_size=100, publish_concurrency=publish_concurrency,
+        poll_interval=1.0, max_attempts=3, retention=timedelta(hours=1),
+    )
+
+
+async def stage(sessions, count: int) -> None:
+    async with sessions() as db:
+        for i in range(count):
+            outbox_crud.add(db, "topic", {"n": i}, key=str(i))
+        await db.commit()
+
+
+async def test_a_retry_only_reruns_the_failed_handler(sessions):
+    calls = {"receipt": 0, "analytics": 0}
+
+    async def receipt(event):
+        calls["receipt"] += 1
+
+    async def analytics(event):
+        calls["analytics"] += 1
+        if calls["analytics"] == 1:
+            raise RuntimeError("analytics down")
+
+    broker = InMemoryBroker()
+    broker.subscribe("topic", receipt)
+    broker.subscribe("topic", analytics)
+    relay = make_relay(broker)
+    await stage(sessions, 1)
+
+    assert await relay.relay_once() == 1
+    async with sessions() as db:
+        row = (await db.execute(select(OutboxEvent))).scalar_one()
+    assert row.published_at is None
+    assert row.attempts == 1
+    assert row.handled == [f"{__name__}.test_a_retry_only_reruns_the_failed_handler.<locals>.receipt"]
+
+    assert await relay.relay_once() == 1
+    assert calls == {"receipt": 1, "analytics": 2}
+    async with sessions() as db:
+        row = (await db.execute(select(OutboxEvent))).scalar_one()
+    assert row.published_at is not None
+    assert len(row.handled) == 2
+
+
+async def test_publishes_are_bounded(sessions):
+    running = 0
+    peak = 0
+
+    async def handler(event):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    broker = InMemoryBroker()
+    broker.subscribe("topic", handler)
+    relay = make_relay(broker, publish_concurrency=2)
+    await stage(sessions, 6)
+
+    assert await relay.relay_once() == 6
+    assert peak == 2
+    assert relay.published == 6
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core import password_reset
+from app.core.password_reset import ResetRequestPurger
+from app.core.security import password_hasher
+from app.crud.user import user_crud
+from app.models.user import ResetPassword, User
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def user(db):
+    user = User(
+        email="reset@example.com", username="reset", hashed_password=await password_hasher.hash("old-password"),
+        first_name="Reset", last_name="User",
+    )
+    db.add(user)
+    await db.commit()
+    return user
+
+
+async def age(db, reset_id: int, minutes: int) -> None:
+    created_at = datetime.now(timezone.utc) - timedelta(minutes=minutes)
+    await db.execute(update(ResetPassword).where(ResetPassword.id == reset_id).values(created_at=created_at))
+    await db.commit()
+
+
+async def test_a_code_resets_the_password_once(db, user):
+    reset_id, code = await user_crud.create_reset_password_request(db, user.email)
+
+    await user_crud.reset_password(db, reset_id, code, "new-password")
+    await db.refresh(user)
+    assert user.credential_version == 1
+    assert await user_crud.authenticate(db, "reset", "new-password") is not None
+    assert (await db.execute(select(ResetPassword))).scalar_one_or_none() is None
+
+    with pytest.raises(HTTPException) as exc:
+        await user_crud.reset_password(db, reset_id, code, "third-password")
+    assert exc.value.status_code == 400
+
+
+async def test_a_wrong_code_leaves_the_request(db, user):
+    reset_id, code = await user_crud.create_reset_password_request(db, user.email)
+    wrong = str(1000 + (int(code) - 999) % 9000)
+
+    for bad in (wrong, "not-a-code"):
+        with pytest.raises(HTTPException) as exc:
+            await user_crud.reset_password(db, reset_id, bad, "new-password")
+        assert exc.value.status_code == 400
+
+    await user_crud.reset_password(db, reset_id, code, "new-password")
+    await db.refresh(user)
+    assert user.credential_version == 1
+
+
+async def test_an_expired_code_is_rejected(db, user):
+    reset_id, code = await user_crud.create_reset_password_request(db, user.email)
+    await age(db, reset_id, minutes=10)
+
+    with pytest.raises(HTTPException) as exc:
+        await user_crud.reset_password(db, reset_id, code, "new-password")
+    assert exc.value.status_code == 400
+    await db.refresh(user)
+    assert user.credential_version == 0
+
+
+async def test_a_new_request_replaces_the_old_code(db, user):
+    first_id, _ = await user_crud.create_reset_password_request(db, user.email)
+    await age(db, first_id, minutes=10)
+    second_id, code = await user_crud.create_reset_password_request(db, user.email)
+
+    assert second_id == first_id
+    await user_crud.reset_password(db, second_id, code, "new-password")
+
+
+async def test_unknown_emails_get_404(db, user):
+    with pytest.raises(HTTPException) as exc:
+        await user_crud.create_reset_password_request(db, "nobody@example.com")
+    assert exc.value.status_code == 404
+
+
+async def test_the_purger_deletes_only_expired_requests(engine, db, user, monkeypatch):
+    monkeypatch.setattr(password_reset, "SessionLocal", async_sessionmaker(engine, class_=AsyncSession))
+    db.add(User(email="fresh@example.com", username="fresh", hashed_password="x", first_name="F", last_name="U"))
+    await db.commit()
+    expired_id, _ = await user_crud.create_reset_password_request(db, user.email)
+    fresh_id, _ = await user_crud.create_reset_password_request(db, "fresh@example.com")
+    await age(db, expired_id, minutes=10)
+
+    purger = ResetRequestPurger(interval=60, expires_after=timedelta(minutes=5))
+    assert await purger.purge() == 1
+    assert (await db.execute(select(ResetPassword.id))).scalars().all() == [fresh_id]
+    assert purger.stats() == {"purged": 1, "failures": 0}
@@ -0,0 +1,60 @@
+import pytest
+
+from app.core.cache import MemoryCacheBackend
+from app.core.principal_cache import PrincipalCache
+from app.models.user import User, UserRole
+
+pytestmark = pytest.mark.anyio
+
+
+def make_user(first_name: str) -> User:
+    return User(
+        id=1, email="user1@example.com", username="user1", hashed_password="x",
+        first_name=first_name, last_name="User", role=UserRole.STUDENT, is_active=True,
+    )
+
+
+def loader(first_name: str):
+    calls = []
+
+    async def load():
+        calls.append(first_name)
+        return make_user(first_name)
+
+    return load, calls
+
+
+async def test_hits_build_fresh_users():
+    principals = PrincipalCache(ttl_seconds=60, max_size=10)
+    load, calls = loader("Ann")
+    first = await principals.get_or_load("user1", load)
+    second = await principals.get_or_load("user1", load)
+    assert calls == ["Ann"]
+    assert second is not first
+    assert second.first_name == "Ann"
+
+
+async def test_invalidation_reaches_every_worker():
+    shared = MemoryCacheBackend(max_entries=100)
+    worker_a = PrincipalCache(ttl_seconds=60, max_size=10, versions=shared)
+    worker_b = PrincipalCache(ttl_seconds=60, max_size=10, versions=shared)
+    load_old, _ = loader("Old")
+    await worker_a.get_or_load("user1", load_old)
+    await worker_b.get_or_load("user1", load_old)
+
+    await worker_a.invalidate("user1")
+
+    load_new, calls = loader("New")
+    assert (await worker_b.get_or_load("user1", load_new)).first_name == "New"
+    assert (await worker_b.get_or_load("user1", load_new)).first_name == "New"
+    assert calls == ["New"]
+    assert worker_b.stats()["stale"] == 1
+
+
+async def test_disabled_cache_always_loads():
+    principals = PrincipalCache(ttl_seconds=60, max_size=0)
+    load, calls = loader("Ann")
+    await principals.get_or_load("user1", load)
+    await principals.get_or_load("user1", load)
+    assert calls == ["Ann", "Ann"]
+    assert principals.stats()["size"] == 0
@@ -0,0 +1,115 @@
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import progress_buffer as module
+from app.core.progress_buffer import ProgressBuffer
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """Rows each flush would upsert, as ``{(student_id, lesson_id): minutes}`` per flush"""
+    flushes = []
+
+    @asynccontextmanager
+    async def session():
+        yield None
+
+    async def upsert_many(db, rows):
+        flushes.append({(row["student_id"], row["lesson_id"]): row["time_spent_minutes"] for row in rows})
+        return len(rows)
+
+    monkeypatch.setattr(module, "SessionLocal", session)
+    monkeypatch.setattr(module.progress_crud, "upsert_many", upsert_many)
+    return flushes
+
+
+def make_buffer(max_pending: int = 100) -> ProgressBuffer:
+    return ProgressBuffer(flush_interval=60, max_items=1000, max_pending=max_pending)
+
+
+async def test_carry_is_written_or_rounded_on_the_next_flush(written):
+    buffer = make_buffer()
+    buffer.add(1, 1, 10, 90)
+    buffer.add(1, 2, 10, 80)
+    await buffer.flush()
+    assert written[-1] == {(1, 1): 1, (1, 2): 1}
+
+    buffer.add(1, 1, 20, 45)  # 30s carried + 45s
+    await buffer.flush()
+    # (1, 1) used its carry; (1, 2) had no new heartbeat, so its 20s rounded to nothing
+    assert written[-1] == {(1, 1): 1}
+    assert buffer._carry_seconds == {(1, 1): 15}
+
+    await buffer.flush()
+    assert len(written) == 2
+    assert buffer._carry_seconds == {}
+
+
+async def test_untouched_carry_of_half_a_minute_rounds_up(written):
+    buffer = make_buffer()
+    buffer.add(1, 1, 10, 100)
+    await buffer.flush()
+    await buffer.flush()
+    assert written == [{(1, 1): 1}, {(1, 1): 1}]
+    assert buffer._carry_seconds == {}
+
+
+async def test_stop_writes_sub_minute_time(written):
+    buffer = make_buffer()
+    buffer.add(1, 1, 10, 40)
+    buffer.add(1, 2, 10, 20)
+    await buffer.stop()
+    assert written == [{(1, 1): 1, (1, 2): 0}]
+    assert buffer._carry_seconds == {}
+
+
+async def test_new_keys_are_refused_when_full():
+    buffer = make_buffer(max_pending=2)
+    buffer.add(1, 1, 10, 5)
+    buffer.add(1, 2, 10, 5)
+    buffer.add(1, 1, 20, 5)  # existing keys still merge
+
+    with pytest.raises(HTTPException) as exc:
+        buffer.add(1, 3, 10, 5)
+    assert exc.value.status_code == 503
+    assert buffer.stats()["rejected"] == 1
+
+
+async def test_failed_flush_is_retried(monkeypatch):
+    @asynccontextmanager
+    async def session():
+        raise ConnectionError("database is down")
+        yield
+
+    monkeypatch.setattr(module, "SessionLocal", session)
+    buffer = make_buffer()
+    buffer.add(1, 1, 10, 150)
+    await buffer.flush()
+    # Whole minutes go back to the buffer and the 30s stay carried
+    assert buffer._pending[(1, 1)].time_spent_seconds == 120
+    assert buffer._carry_seconds == {(1, 1): 30}
+    assert buffer.stats()["failures"] == 1
+
+
+async def test_failed_flush_returns_only_what_fits(monkeypatch):
+    buffer = make_buffer(max_pending=2)
+
+    @asynccontextmanager
+    async def session():
+        # New heartbeats arrive while the failing batch is out
+        buffer.add(2, 1, 10, 60)
+        buffer.add(2, 2, 10, 60)
+        raise ConnectionError("database is down")
+        yield
+
+    monkeypatch.setattr(module, "SessionLocal", session)
+    buffer.add(1, 1, 10, 60)
+    buffer.add(2, 1, 10, 60)
+    await buffer.flush()
+    assert set(buffer._pending) == {(2, 1), (2, 2)}
+    assert buffer._pending[(2, 1)].time_spent_seconds == 120
+    assert buffer.stats()["dropped"] == 1
@@ -0,0 +1,110 @@
+from decimal import Decimal
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.api.deps import get_current_user
+from app.api.routes import course
+from app.core.cache import Cache, MemoryCacheBackend
+from app.core.database import get_db
+from app.core.events import COURSE_PUBLISHED, ENROLLMENT_CREATED
+from app.crud import course as course_module
+from app.crud.course import course_crud
+from app.crud.outbox import outbox_crud
+from app.models import Course, Enrollment, User
+from app.models.outbox import OutboxEvent
+from app.models.user import UserRole
+from app.schemas.course import CoursePublish
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def shop(db, monkeypatch):
+    cache = Cache(MemoryCacheBackend(max_entries=100), default_ttl=300)
+    monkeypatch.setattr(course_module, "cache", cache)
+    monkeypatch.setattr(course, "cache", cache)
+    db.add_all([
+        User(id=1, email="t@example.com", username="teacher", hashed_password="x",
+             first_name="T", last_name="T", role=UserRole.TEACHER),
+        User(id=2, email="s@example.com", username="student", hashed_password="x",
+             first_name="S", last_name="S", role=UserRole.STUDENT),
+    ])
+    db.add_all([
+        Course(id=1, title="Published", teacher_id=1, price=Decimal("10.00"), is_published=True),
+        Course(id=2, title="Draft", teacher_id=1, price=Decimal("10.00"), is_published=False),
+    ])
+    await db.commit()
+    return db
+
+
+async def counts(db) -> tuple[int, list[str]]:
+    enrollments = (await db.execute(select(func.count()).select_from(Enrollment))).scalar_one()
+    topics = (await db.execute(select(OutboxEvent.topic).order_by(OutboxEvent.id))).scalars().all()
+    return enrollments, topics
+
+
+async def test_purchase_stages_one_event_with_the_enrollment(shop):
+    first = await course_crud.purchase_course(shop, student_id=2, course_id=1)
+    assert first["message"] == "Course was purchased"
+    again = await course_crud.purchase_course(shop, student_id=2, course_id=1)
+    assert again == {"message": "Already enrolled in this course", "enrollment_id": first["enrollment_id"]}
+    assert await counts(shop) == (1, [ENROLLMENT_CREATED])
+
+    event = (await shop.execute(select(OutboxEvent))).scalar_one()
+    assert event.key == "2"
+    assert event.payload["enrollment_id"] == first["enrollment_id"]
+
+
+async def test_unpublished_courses_cannot_be_bought(shop):
+    with pytest.raises(HTTPException) as error:
+        await course_crud.purchase_course(shop, student_id=2, course_id=2)
+    assert error.value.status_code == 404
+    assert await counts(shop) == (0, [])
+
+
+async def test_a_failed_event_write_rolls_back_the_enrollment(shop, monkeypatch):
+    add = outbox_crud.add
+    # topic is NOT NULL, so the commit fails after the enrollment insert
+    monkeypatch.setattr(outbox_crud, "add", lambda db, topic, payload, key=None: add(db, None, payload, key))
+    with pytest.raises(IntegrityError):
+        await course_crud.purchase_course(shop, student_id=2, course_id=1)
+    await shop.rollback()
+    assert await counts(shop) == (0, [])
+
+
+async def test_publishing_stages_one_event(shop):
+    await course_crud.publish_course(shop, CoursePublish(id=2, publish=True))
+    await course_crud.publish_course(shop, CoursePublish(id=2, publish=True))
+    assert await counts(shop) == (0, [COURSE_PUBLISHED])
+
+
+@pytest.fixture
+async def client(shop):
+    app = FastAPI()
+    app.include_router(course.router)
+
+    async def override_db():
+        yield shop
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: User(id=2, username="student")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def test_idempotency_keys_replay_the_first_response(client, shop):
+    headers = {"Idempotency-Key": "order-1"}
+    first = await client.post("/purchase_course/1", headers=headers)
+    replay = await client.post("/purchase_course/1", headers=headers)
+    assert first.status_code == replay.status_code == 200
+    assert replay.json() == first.json()
+    assert "idempotent-replayed" not in first.headers
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert await counts(shop) == (1, [ENROLLMENT_CREATED])
+
+    reused = await client.post("/purchase_course/2", headers=headers)
+    assert reused.status_code == 422
@@ -0,0 +1,128 @@
+import httpx
+import pytest
+from fastapi import FastAPI, Form
+
+from app.core import rate_limit
+from app.core.rate_limit import (
+    MAX_BUFFERED_BODY,
+    MemoryRateLimitBackend,
+    RateLimiter,
+    RateLimitMiddleware,
+    RateLimitRule,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+async def test_bucket_refills_continuously(clock):
+    backend = MemoryRateLimitBackend(max_keys=10)
+    assert await backend.acquire("k", capacity=2, period=10) == 0
+    assert await backend.acquire("k", capacity=2, period=10) == 0
+    assert await backend.acquire("k", capacity=2, period=10) == pytest.approx(5.0)
+
+    clock[0] += 5
+    assert await backend.acquire("k", capacity=2, period=10) == 0
+    assert await backend.acquire("k", capacity=2, period=10) == pytest.approx(5.0)
+    assert await backend.acquire("other", capacity=2, period=10) == 0
+
+
+async def test_least_recently_used_buckets_are_evicted(clock):
+    backend = MemoryRateLimitBackend(max_keys=2)
+    for key in ("a", "b", "c"):
+        await backend.acquire(key, capacity=1, period=60)
+    assert list(backend._buckets) == ["b", "c"]
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setattr(rate_limit.settings, "RATE_LIMIT_ENABLED", True)
+    return RateLimiter(
+        MemoryRateLimitBackend(max_keys=100),
+        rules=[
+            RateLimitRule("login_ip", "POST", "/login", "client", "ip", capacity=10, period=60),
+            RateLimitRule("login_username", "POST", "/login", "form", "username", capacity=2, period=60),
+            RateLimitRule("reset_email", "POST", "/reset", "query", "email", capacity=1, period=60),
+        ],
+        trusted_proxies=1,
+    )
+
+
+@pytest.fixture
+async def client(limiter):
+    app = FastAPI()
+
+    @app.post("/login")
+    async def login(username: str = Form(), password: str = Form()):
+        return {"username": username, "password": password}
+
+    @app.post("/reset")
+    async def reset(email: str):
+        return {"email": email}
+
+    transport = httpx.ASGITransport(app=RateLimitMiddleware(app, limiter=limiter))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def test_form_login_is_replayed_to_the_route_and_counted_per_username(client):
+    for _ in range(2):
+        response = await client.post("/login", data={"username": "Alice", "password": "secret"})
+        assert response.json() == {"username": "Alice", "password": "secret"}
+
+    response = await client.post("/login", data={"username": "alice", "password": "guess"})
+    assert response.status_code == 429
+    assert response.json() == {"detail": "Too many requests, try again later"}
+    assert response.headers["retry-after"] == "30"
+
+    assert (await client.post("/login", data={"username": "bob", "password": "x"})).status_code == 200
+
+
+async def test_query_keys_use_the_value_the_route_reads(client):
+    assert (await client.post("/reset", params={"email": "a@example.com"})).status_code == 200
+    # The route reads the last repeated value, so that is the one charged
+    response = await client.post("/reset?email=other@example.com&email=a@example.com")
+    assert response.status_code == 429
+
+
+async def test_unreadable_forms_are_refused(client):
+    response = await client.post("/login", json={"username": "alice", "password": "x"})
+    assert response.status_code == 415
+
+    padding = "x" * MAX_BUFFERED_BODY
+    response = await client.post("/login", data={"padding": padding, "username": "alice", "password": "x"})
+    assert response.status_code == 413
+
+
+async def test_spoofed_forwarded_for_entries_share_the_proxy_seen_bucket(client, limiter):
+    for i in range(10):
+        response = await client.post(
+            "/login",
+            data={"username": f"user{i}", "password": "x"},
+            headers={"X-Forwarded-For": f"10.0.0.{i}, 203.0.113.7"},
+        )
+        assert response.status_code == 200
+    response = await client.post(
+        "/login", data={"username": "user99", "password": "x"}, headers={"X-Forwarded-For": "10.9.9.9, 203.0.113.7"}
+    )
+    assert response.status_code == 429
+    assert limiter.rejected["login_ip"] == 1
+
+
+def test_client_ip_counts_trusted_hops_from_the_right():
+    limiter = RateLimiter(MemoryRateLimitBackend(max_keys=1), rules=[], trusted_proxies=2)
+    scope = {
+        "headers": [(b"x-forwarded-for", b"6.6.6.6, 198.51.100.1"), (b"x-forwarded-for", b"10.0.0.2")],
+        "client": ("10.0.0.3", 1234),
+    }
+    assert limiter.client_ip(scope) == "198.51.100.1"
+    assert limiter.client_ip({"headers": [(b"x-forwarded-for", b"198.51.100.1")], "client": None}) == "198.51.100.1"
+
+    direct = RateLimiter(MemoryRateLimitBackend(max_keys=1), rules=[], trusted_proxies=0)
+    assert direct.client_ip(scope) == "10.0.0.3"
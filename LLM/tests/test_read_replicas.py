@@ -0,0 +1,102 @@
+import time
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core import database
+from app.core.database import (
+    LAST_WRITE_COOKIE,
+    ReadYourWritesMiddleware,
+    ReplicaRouter,
+    create_engine_from_settings,
+    get_db,
+    get_read_db,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def make_router(url: str) -> ReplicaRouter:
+    return ReplicaRouter(urls=[url], strategy="round_robin", retry_seconds=30, sticky_seconds=5)
+
+
+@pytest.fixture
+async def primary(tmp_path, monkeypatch):
+    engine = create_engine_from_settings(f"sqlite+aiosqlite:///{tmp_path}/primary.db")
+    monkeypatch.setattr(database, "SessionLocal", async_sessionmaker(engine, class_=AsyncSession))
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def client(primary):
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    @app.post("/write")
+    async def write(db: AsyncSession = Depends(get_db)):
+        await db.execute(text("SELECT 1"))
+        await db.commit()
+        return {}
+
+    @app.get("/read")
+    async def read(db: AsyncSession = Depends(get_read_db)):
+        return {"primary": db.bind is primary}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+def use_router(monkeypatch, router: ReplicaRouter):
+    monkeypatch.setattr(database, "replica_router", router)
+    return router
+
+
+async def test_reads_go_to_the_replica(client, tmp_path, monkeypatch):
+    router = use_router(monkeypatch, make_router(f"sqlite+aiosqlite:///{tmp_path}/replica.db"))
+    assert (await client.get("/read")).json() == {"primary": False}
+    assert router.replica_reads == [1]
+    await router.dispose()
+
+
+async def test_writer_reads_its_writes_from_the_primary(client, tmp_path, monkeypatch):
+    router = use_router(monkeypatch, make_router(f"sqlite+aiosqlite:///{tmp_path}/replica.db"))
+    response = await client.post("/write")
+    assert LAST_WRITE_COOKIE in response.cookies
+
+    assert (await client.get("/read")).json() == {"primary": True}
+    assert router.sticky_reads == 1
+
+    # The cookie, not worker memory, carries the stickiness
+    other_worker = use_router(monkeypatch, make_router(f"sqlite+aiosqlite:///{tmp_path}/replica.db"))
+    assert (await client.get("/read")).json() == {"primary": True}
+    assert other_worker.sticky_reads == 1
+    await router.dispose()
+    await other_worker.dispose()
+
+
+async def test_expired_or_foreign_writes_read_from_the_replica(client, tmp_path, monkeypatch):
+    router = use_router(monkeypatch, make_router(f"sqlite+aiosqlite:///{tmp_path}/replica.db"))
+    client.cookies.set(LAST_WRITE_COOKIE, str(time.time() - 60))
+    assert (await client.get("/read")).json() == {"primary": False}
+    client.cookies.set(LAST_WRITE_COOKIE, "not-a-time")
+    assert (await client.get("/read")).json() == {"primary": False}
+    assert router.sticky_reads == 0
+    await router.dispose()
+
+
+async def test_reads_without_replicas_set_no_cookie(client, monkeypatch):
+    use_router(monkeypatch, ReplicaRouter(urls=[], strategy="round_robin", retry_seconds=30, sticky_seconds=5))
+    assert LAST_WRITE_COOKIE not in (await client.post("/write")).cookies
+    assert (await client.get("/read")).json() == {"primary": True}
+
+
+async def test_unreachable_replica_falls_back_to_the_primary(client, tmp_path, monkeypatch):
+    router = use_router(monkeypatch, make_router(f"sqlite+aiosqlite:///{tmp_path}/missing/replica.db"))
+    assert (await client.get("/read")).json() == {"primary": True}
+    assert router.primary_fallbacks == 1
+    assert router.candidates() == []  # skipped until retry_seconds pass
+    await router.dispose()
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from app.core import recommender as recommender_module
+from app.core.recommender import CourseRecommender, tfidf_matrix
+
+WORDS = ["python", "sql", "data", "web", "design", "cloud", "security", "music", "art", "math"]
+
+
+def make_dataset(seed: int, courses: int = 40, students: int = 60, interactions: int = 300):
+    rng = np.random.default_rng(seed)
+    course_ids = np.arange(100, 100 + courses, dtype=np.int64)
+    texts = [" ".join(rng.choice(WORDS, size=3)) for _ in range(courses)]
+    triples = (
+        rng.integers(1, students + 1, size=interactions).tolist(),
+        rng.integers(0, courses, size=interactions).tolist(),
+        rng.uniform(0.1, 2.0, size=interactions).tolist(),
+    )
+    return course_ids, texts, triples
+
+
+def dense_top_k(texts, triples, courses: int, k: int, content_weight: float):
+    """Reference: the full dense similarity matrix and its top-k per row"""
+    students, slots, weights = triples
+    rows = {student: row for row, student in enumerate(dict.fromkeys(students))}
+    interactions = np.zeros((len(rows), courses))
+    np.add.at(interactions, ([rows[s] for s in students], slots), weights)
+    norms = np.linalg.norm(interactions, axis=0)
+    interactions = interactions / np.where(norms > 0, norms, 1)
+    content = tfidf_matrix(texts).toarray()
+    similarity = (1 - content_weight) * interactions.T @ interactions + content_weight * content @ content.T
+    np.fill_diagonal(similarity, 0)
+    top = [sorted(((s, c) for c, s in enumerate(row) if s > 1e-9), reverse=True)[:k] for row in similarity]
+    return [[round(score, 4) for score, _ in row] for row in top]
+
+
+def table_scores(table, k: int):
+    return [[round(float(s), 4) for s in row[:k] if s > 0] for row in table.scores]
+
+
+def make_recommender(k: int = 5) -> CourseRecommender:
+    return CourseRecommender(neighbors=k, content_weight=0.3, refresh_interval=60, rebuild_interval=3600)
+
+
+@pytest.mark.parametrize("batch", [4, 256])
+def test_sparse_top_k_matches_the_dense_matrix(monkeypatch, batch):
+    monkeypatch.setattr(recommender_module, "SIMILARITY_BATCH", batch)
+    course_ids, texts, triples = make_dataset(seed=1)
+    table = make_recommender()._build(course_ids, texts, triples)
+    assert table_scores(table, 5) == dense_top_k(texts, triples, len(course_ids), 5, 0.3)
+    assert all(slot not in row for slot, row in enumerate(table.neighbors))
+
+
+def test_incremental_enrollments_match_a_rebuild():
+    course_ids, texts, triples = make_dataset(seed=2)
+    recommender = make_recommender()
+    table = recommender._build(course_ids, texts, triples)
+
+    # Existing and brand-new students, including a repeat of an existing pair
+    new = [(1, 105), (1, 120), (70, 105), (71, 139), (3, 110), (70, 139)]
+    table = recommender._apply_enrollments(table, new)
+
+    students, slots, weights = (list(part) for part in triples)
+    for student_id, course_id in new:
+        students.append(student_id)
+        slots.append(course_id - 100)
+        weights.append(1.0)
+    rebuilt = make_recommender()._build(course_ids, texts, (students, slots, weights))
+
+    affected = sorted({slot for student, slot in zip(students, slots) if student in {1, 3, 70, 71}})
+    assert [table_scores(table, 5)[slot] for slot in affected] == [table_scores(rebuilt, 5)[slot] for slot in affected]
+    assert list(table.popular) == list(rebuilt.popular)
+    assert recommender.stats()["interactions"] == recommender._interactions.nnz + recommender._delta.nnz
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core import search
+from app.core.search import CourseSearch
+from app.models import Course, Lesson, User
+from app.models.user import UserRole
+
+pytestmark = pytest.mark.anyio
+
+LONG_AGO = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+async def sessions(engine, monkeypatch):
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(search, "read_session", lambda last_write=None: sessions())
+    async with sessions() as db:
+        db.add(User(
+            id=1, email="teacher@example.com", username="teacher", hashed_password="x",
+            first_name="Test", last_name="Teacher", role=UserRole.TEACHER,
+        ))
+        db.add(Course(
+            id=1, title="Databases", teacher_id=1, price=Decimal("10.00"), is_published=True,
+            created_at=LONG_AGO, updated_at=LONG_AGO,
+        ))
+        await db.commit()
+    return sessions
+
+
+async def test_new_courses_get_updated_at(sessions):
+    async with sessions() as db:
+        db.add(Course(id=2, title="New", teacher_id=1, price=Decimal("0.00")))
+        await db.commit()
+        assert (await db.get(Course, 2)).updated_at is not None
+
+
+async def test_lesson_writes_reach_the_index(sessions):
+    course_search = CourseSearch(refresh_interval=30)
+    await course_search.rebuild()
+    course_search.watermark = datetime.now(timezone.utc)
+    assert course_search.search("postgres", limit=10, offset=0)[0] == 0
+
+    async with sessions() as db:
+        db.add(Lesson(id=1, title="Postgres indexes", course_id=1, order_index=0))
+        await db.commit()
+        updated_at = (await db.execute(select(Course.updated_at).where(Course.id == 1))).scalar_one()
+    assert updated_at.replace(tzinfo=timezone.utc) > LONG_AGO + timedelta(days=1)
+
+    await course_search.refresh_changed()
+    assert course_search.search("postgres", limit=10, offset=0)[1][0][0] == 1
+
+    async with sessions() as db:
+        lesson = await db.get(Lesson, 1)
+        lesson.title = "Vacuum tuning"
+        await db.commit()
+    await course_search.refresh_changed()
+    assert course_search.search("postgres", limit=10, offset=0)[0] == 0
+    assert course_search.search("vacuum", limit=10, offset=0)[0] == 1